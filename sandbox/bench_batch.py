@@ -0,0 +1,46 @@
+"""
+Throughput of latex2sympy_batch for different numbers of workers.
+
+Usage: python sandbox/bench_batch.py [n_strings]
+"""
+import os
+import random
+import sys
+import time
+
+from latex2sympy2_extended import latex2sympy_batch
+
+TEMPLATES = [
+    "{a}",
+    "\\frac{{{a}}}{{{b}}}",
+    "{a}x^{{2}} + {b}x - {c}",
+    "\\sqrt{{{a}}} + \\sin({b}x)",
+    "({a}, {b}]",
+    "x = {a}, y = {b}",
+    "\\{{{a}, {b}, {c}\\}}",
+    "\\max({a}, {b}, {c})",
+]
+
+
+def make_corpus(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    # Many duplicates as in real grading data
+    return [
+        rng.choice(TEMPLATES).format(a=rng.randint(1, 200), b=rng.randint(1, 50), c=rng.randint(1, 20))
+        for _ in range(n)
+    ]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    corpus = make_corpus(n)
+    print(f"{n} strings, {len(set(corpus))} unique")
+    workers = 1
+    baseline = None
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        latex2sympy_batch(corpus, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers={workers:3d}  {elapsed:8.2f}s  {n / elapsed:10.0f} strings/s  speedup={baseline / elapsed:.2f}x")
+        workers *= 2
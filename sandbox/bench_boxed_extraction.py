@@ -0,0 +1,34 @@
+"""
+Time of extract_boxed_content on long outputs with many \\boxed commands, for growing sizes. The time per MB should
+stay flat as the size grows.
+
+Usage:
+    python sandbox/bench_boxed_extraction.py [max_size]
+"""
+import sys
+import time
+
+from latex2sympy2_extended.math_normalization import extract_boxed_content
+
+# Chain-of-thought like text, many boxed intermediate results and a final \fbox
+STEP = r"so the next term is \boxed{\frac{n+1}{2}} and we continue with $x_{n} = {n \choose 2}$. "
+
+
+def best_of(f, n):
+    best = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    size = 62_500
+    while size <= max_size:
+        text = STEP * (size // len(STEP)) + r"The answer is \fbox{42}."
+        for mode in ["last", "all"]:
+            elapsed = best_of(lambda: extract_boxed_content(text, mode), 3)
+            print(f"{len(text):>9} chars  mode={mode:<4} {elapsed * 1e3:9.2f} ms  {elapsed / len(text) * 1e9:7.1f} ns/char")
+        size *= 2
@@ -0,0 +1,45 @@
+"""
+Measures the overhead of the cooperative deadline checks (`latex2sympy(..., timeout=...)`) on normal inputs.
+
+Usage: python sandbox/bench_deadline_overhead.py
+"""
+import math
+import time
+
+from latex2sympy2_extended import Deadline, latex2sympy
+from latex2sympy2_extended.dfa_cache import WARMUP_CORPUS
+
+ROUNDS = 5
+REPEATS = 7
+
+
+def convertible(latex_str: str) -> bool:
+    try:
+        latex2sympy(latex_str)
+        return True
+    except Exception:
+        return False
+
+
+def run(corpus: list[str], timeout) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for latex_str in corpus:
+            latex2sympy(latex_str, timeout=timeout)
+    return (time.perf_counter() - start) / (ROUNDS * len(corpus))
+
+
+if __name__ == "__main__":
+    # Also warms up the DFA of the parser
+    corpus = [latex_str for latex_str in WARMUP_CORPUS if convertible(latex_str)]
+    # Alternate the two so that both see the same machine load, and keep the best of each
+    without = with_timeout = unlimited = float("inf")
+    for _ in range(REPEATS):
+        without = min(without, run(corpus, None))
+        with_timeout = min(with_timeout, run(corpus, 60))
+        # What the async API passes when there is no timeout, so that the call can still be cancelled
+        unlimited = min(unlimited, run(corpus, Deadline(math.inf)))
+    print(f"{len(corpus)} inputs")
+    print(f"without timeout {without * 1e6:10.1f} us per conversion")
+    print(f"with timeout    {with_timeout * 1e6:10.1f} us per conversion ({(with_timeout / without - 1) * 100:+.1f}%)")
+    print(f"unlimited       {unlimited * 1e6:10.1f} us per conversion ({(unlimited / without - 1) * 100:+.1f}%)")
@@ -0,0 +1,48 @@
+"""
+Shows the trade-off of the DFA cache limits: throughput against the size of the DFA on a stream of
+diverse inputs.
+
+Usage: python sandbox/bench_dfa_cache_limit.py
+"""
+import random
+import time
+
+from latex2sympy2_extended import latex2sympy, reset_dfa_cache, set_dfa_cache_limit, dfa_cache_info
+from latex2sympy2_extended.dfa_cache import WARMUP_CORPUS
+
+N = 1000
+
+
+def make_inputs(n: int) -> list[str]:
+    # Random combinations of the corpus make the DFA grow with the input diversity
+    rng = random.Random(0)
+    return [f"{rng.choice(WARMUP_CORPUS)} + \\frac{{{rng.choice(WARMUP_CORPUS[:40])}}}{{{rng.randint(1, 9)}}}" for _ in range(n)]
+
+
+def run(inputs: list[str], **limits):
+    reset_dfa_cache()
+    set_dfa_cache_limit(**limits)
+    resets = dfa_cache_info().resets
+    peak = 0
+    start = time.perf_counter()
+    for i, latex_str in enumerate(inputs):
+        try:
+            latex2sympy(latex_str)
+        except Exception:
+            pass
+        if i % 100 == 0:
+            info = dfa_cache_info()
+            peak = max(peak, info.parser_states + info.lexer_states)
+    elapsed = time.perf_counter() - start
+    info = dfa_cache_info(estimate_memory=True)
+    set_dfa_cache_limit()
+    print(f"{str(limits or 'no limit'):>24}: {len(inputs) / elapsed:6.1f} conversions/s, peak states {peak:5d}, "
+          f"final {info.parser_states + info.lexer_states:5d} states ~{info.estimated_bytes / 1e6:.1f} MB, resets {info.resets - resets}")
+
+
+if __name__ == "__main__":
+    inputs = make_inputs(N)
+    run(inputs)
+    run(inputs, max_states=2000)
+    run(inputs, max_states=500)
+    run(inputs, max_parses=200)
@@ -0,0 +1,42 @@
+"""
+Measures the latency of the first conversions in a fresh process, with a cold DFA and with a DFA
+snapshot loaded at import.
+
+Usage: python sandbox/bench_dfa_snapshot.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from latex2sympy2_extended import warmup, save_dfa_snapshot
+from latex2sympy2_extended.dfa_cache import SNAPSHOT_ENV_VAR
+
+CHILD = r"""
+import time
+start = time.perf_counter()
+from latex2sympy2_extended import latex2sympy
+imported = time.perf_counter()
+for latex_str in ["\\frac{x^{2} + 1}{3} = 2", "\\sin^{2} x + \\cos x", "(1, 2] \\cup \\{3\\}", "\\int_{0}^{1} x^{3} dx"]:
+    latex2sympy(latex_str)
+done = time.perf_counter()
+print(f"import {(imported - start) * 1e3:7.1f} ms, first 4 conversions {(done - imported) * 1e3:7.1f} ms")
+"""
+
+
+def run_child(env: dict) -> str:
+    return subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True).stdout.strip()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dfa.snap")
+        warmup()
+        save_dfa_snapshot(path)
+        print(f"snapshot size: {os.path.getsize(path) / 1e6:.2f} MB")
+
+        cold_env = {k: v for k, v in os.environ.items() if k != SNAPSHOT_ENV_VAR}
+        warm_env = dict(cold_env, **{SNAPSHOT_ENV_VAR: path})
+        for _ in range(3):
+            print(f"cold:     {run_child(cold_env)}")
+            print(f"snapshot: {run_child(warm_env)}")
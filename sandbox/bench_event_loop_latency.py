@@ -0,0 +1,71 @@
+"""
+Event loop latency while converting a batch of strings from asyncio code: a ticker coroutine sleeps for 1 ms in a
+loop and records how late it wakes up, while the batch is converted by calling latex2sympy directly (blocking the
+loop), with AsyncConverter on threads and with AsyncConverter on processes.
+
+Usage:
+    python sandbox/bench_event_loop_latency.py [n] [workers]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from latex2sympy2_extended import latex2sympy, AsyncConverter
+
+STRINGS = [r"\frac{x^{2} + 1}{x - 1}", r"\sqrt{2} + 3", r"x < y \le z", r"\sin(x)^{2} + \cos(x)^{2}",
+           r"\int_{0}^{1} x^{2} dx", r"\binom{10}{3} + \frac{1}{2}", r"\max(x, 2) - 1"]
+TICK = 0.001
+
+
+async def ticker(lags: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def blocking(strings, workers):
+    for s in strings:
+        latex2sympy(s)
+        # Let the ticker run between conversions
+        await asyncio.sleep(0)
+
+
+async def with_converter(strings, executor, workers):
+    async with AsyncConverter(executor, workers=workers) as converter:
+        # Start the workers before measuring
+        await asyncio.gather(*(converter.convert(s) for s in STRINGS * workers))
+        async for _ in converter.as_completed(strings):
+            pass
+
+
+async def measure(name, convert, strings, workers):
+    lags: list[float] = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    start = time.perf_counter()
+    await convert(strings, workers)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99)] if lags else 0
+    print(f"{name:<24} {len(strings) / elapsed:8.0f} conversions/s   lag p50 {statistics.median(lags) * 1e3:7.2f} ms"
+          f"   p99 {p99 * 1e3:7.2f} ms   max {lags[-1] * 1e3:7.2f} ms")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    # Distinct strings, so that nothing is served from the symbol or parser caches only
+    strings = [f"{STRINGS[i % len(STRINGS)]} + {i}" for i in range(n)]
+    for s in STRINGS:
+        latex2sympy(s)
+    asyncio.run(measure("blocking", blocking, strings, workers))
+    asyncio.run(measure("AsyncConverter(thread)", lambda s, w: with_converter(s, "thread", w), strings, workers))
+    asyncio.run(measure("AsyncConverter(process)", lambda s, w: with_converter(s, "process", w), strings, workers))
+
+
+if __name__ == "__main__":
+    main()
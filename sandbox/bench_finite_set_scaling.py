@@ -0,0 +1,36 @@
+"""
+Measures how building a FiniteSet scales with the number of elements, for sets which take the fast
+path (numbers or symbols without duplicates) and for sets which don't (duplicates, expressions).
+
+Usage: python sandbox/bench_finite_set_scaling.py
+"""
+import time
+
+from sympy import Float, Integer, Rational, Symbol
+
+from latex2sympy2_extended.sets import FiniteSet
+
+SIZES = [10, 100, 1000, 5000, 20000]
+FAMILIES = {
+    "integers": lambda n: [Integer(i) for i in reversed(range(n))],
+    "rationals": lambda n: [Rational(i, 7) for i in range(n)],
+    "floats": lambda n: [Float(i / 4) for i in range(n)],
+    "symbols": lambda n: [Symbol(f"x_{i}") for i in range(n)],
+    "duplicates": lambda n: [Integer(i % (n // 2 + 1)) for i in range(n)],
+    "expressions": lambda n: [Symbol("x") + i for i in range(n)],
+}
+
+
+def run(elements: list, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        FiniteSet(*elements)
+    return (time.perf_counter() - start) / rounds
+
+
+if __name__ == "__main__":
+    for name, make in FAMILIES.items():
+        for n in SIZES:
+            elements = make(n)
+            seconds = run(elements, rounds=max(1, 10_000 // n))
+            print(f"{name:12s} n={n:6d} {seconds * 1e3:10.2f} ms {seconds / n * 1e6:8.2f} us per element")
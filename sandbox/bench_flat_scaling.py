@@ -0,0 +1,34 @@
+"""
+Measures how converting long sums and products (explicit and implicit) scales with the number of terms. The parse tree is
+built once per input and only the conversion is timed.
+
+Usage: python sandbox/bench_flat_scaling.py
+"""
+import time
+
+from latex2sympy2_extended.latex2sympy2 import _Latex2Sympy, ConversionConfig
+
+SIZES = [10, 100, 1000, 10000]
+FAMILIES = {
+    "sum": lambda n: " + ".join(f"{i} x" for i in range(1, n + 1)),
+    "difference": lambda n: " - ".join(f"{i} x" for i in range(1, n + 1)),
+    "product": lambda n: " \\cdot ".join("x" for _ in range(n)),
+    "implicit product": lambda n: " ".join("x" if i % 2 else "y" for i in range(n)),
+}
+
+
+def convert_time(latex_str: str, rounds: int) -> float:
+    converter = _Latex2Sympy(config=ConversionConfig())
+    with converter.pooled_parser(latex_str) as parser:
+        relation = converter.parse_math(parser, latex_str).relation()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            converter.convert_relation(relation)
+        return (time.perf_counter() - start) / rounds
+
+
+if __name__ == "__main__":
+    for name, make in FAMILIES.items():
+        for n in SIZES:
+            seconds = convert_time(make(n), rounds=max(1, 1000 // n))
+            print(f"{name:16s} n={n:6d} {seconds * 1e3:10.2f} ms {seconds / n * 1e6:8.2f} us per term")
@@ -0,0 +1,36 @@
+"""
+Measures converting multi-argument functions, function definitions and derivative fractions,
+whose arguments are converted from the parse tree of the whole input.
+
+Usage: python sandbox/bench_func_args.py
+"""
+import time
+
+from latex2sympy2_extended import latex2sympy
+
+CORPUS = [
+    "\\max(1, x, y)",
+    "\\min(a + 1, b^2, 3)",
+    "\\gcd(12, 18)",
+    "\\operatorname{lcm}(4, 6, 8)",
+    "\\operatorname{diag}(1, 2, 3)",
+    "f(x, y)",
+    "g(a, b, c, d)",
+    "\\frac{dy}{dx}",
+    "\\frac{\\partial f}{\\partial x}",
+]
+ROUNDS = 100
+
+
+def run(latex_str: str) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        latex2sympy(latex_str, normalization_config=None)
+    return (time.perf_counter() - start) / ROUNDS
+
+
+if __name__ == "__main__":
+    for latex_str in CORPUS:
+        # Warm up the DFA of the parser
+        run(latex_str)
+        print(f"{latex_str:35s} {min(run(latex_str) for _ in range(3)) * 1e6:8.1f} us per conversion")
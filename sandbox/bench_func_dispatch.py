@@ -0,0 +1,39 @@
+"""
+Measures converting function heavy inputs (nested \\sin\\cos\\log, ...) from an already built parse tree,
+so that the cost of picking the handler of each function isn't hidden by the parser.
+
+Usage: python sandbox/bench_func_dispatch.py
+"""
+import time
+
+from latex2sympy2_extended.latex2sympy2 import _Latex2Sympy, ConversionConfig
+
+CORPUS = [
+    "\\sin\\cos\\log x",
+    "\\sin\\cos\\tan\\sinh\\cosh\\tanh\\log\\ln\\exp x",
+    "\\arcsin x + \\arccos x + \\arctan x + \\arccot x",
+    "\\sin^2 x + \\cos^2 x + \\tan^{-1} x + \\sinh^{-1} x",
+    "\\operatorname{floor}(x) + \\operatorname{ceil}(x) + \\floor x + \\ceil x",
+    "\\max(x, y) + \\min(x, y) + \\max(1, 2, 3)",
+]
+ROUNDS = 500
+
+
+def convert_time(latex_str: str) -> float:
+    converter = _Latex2Sympy(config=ConversionConfig())
+    with converter.pooled_parser(latex_str) as parser:
+        relation = converter.parse_math(parser, latex_str).relation()
+        # Warm up the sympy caches
+        converter.convert_relation(relation)
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                converter.convert_relation(relation)
+            best = min(best, (time.perf_counter() - start) / ROUNDS)
+        return best
+
+
+if __name__ == "__main__":
+    for latex_str in CORPUS:
+        print(f"{latex_str:60s} {convert_time(latex_str) * 1e6:8.1f} us per conversion")
@@ -0,0 +1,44 @@
+"""
+Per-conversion overhead of IsolatedConverter compared to converting in-process and to starting a new process for
+every conversion.
+
+Usage:
+    python sandbox/bench_isolation.py [n]
+"""
+import multiprocessing
+import sys
+import time
+
+from latex2sympy2_extended import latex2sympy
+from latex2sympy2_extended.isolation import IsolatedConverter
+
+STRINGS = [r"\frac{x^{2} + 1}{x - 1}", r"\sqrt{2} + 3", r"x < y \le z", r"\sin(x)^{2} + \cos(x)^{2}"]
+
+
+def _convert_in_new_process(latex_str):
+    context = multiprocessing.get_context("fork")
+    process = context.Process(target=latex2sympy, args=(latex_str,))
+    process.start()
+    process.join()
+
+
+def bench(name, convert, n):
+    start = time.perf_counter()
+    for i in range(n):
+        convert(STRINGS[i % len(STRINGS)])
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed / n * 1e6:10.1f} us/conversion")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    for s in STRINGS:
+        latex2sympy(s)
+    bench("in-process", latex2sympy, n)
+    with IsolatedConverter(workers=1, max_memory=512 * 2**20, max_cpu_seconds=5) as converter:
+        bench("IsolatedConverter", converter.convert, n)
+    bench("new process per conversion", _convert_in_new_process, n // 10)
+
+
+if __name__ == "__main__":
+    main()
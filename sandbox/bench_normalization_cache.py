@@ -0,0 +1,39 @@
+"""
+normalize_latex on a grading-like workload, where the same gold and predicted answers are normalized many times
+with the same config, with and without a NormalizationCache.
+
+Usage:
+    python sandbox/bench_normalization_cache.py [rounds]
+"""
+import sys
+import time
+
+from latex2sympy2_extended import NormalizationCache, NormalizationConfig, normalize_latex
+
+ANSWERS = [
+    r"The answer is \boxed{\dfrac{1}{2}}.",
+    r"So we get $\boxed{5 \text{ meters}}$",
+    r"\boxed{\left( 3, \frac{\pi}{2} \right)}",
+    r"\boxed{x \in \left(-\infty, 2\right] \cup [3, \infty)}",
+    r"Therefore \fbox{50\%} of the students and \boxed{12}",
+    r"\boxed{\{1, 2, 3\}}",
+]
+CONFIG = NormalizationConfig(units=True, malformed_operators=True, nits=True, boxed="all")
+
+
+def run(rounds, cache):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for answer in ANSWERS:
+            normalize_latex(answer, CONFIG, cache=cache)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    calls = rounds * len(ANSWERS)
+    uncached = run(rounds, None)
+    cache = NormalizationCache()
+    cached = run(rounds, cache)
+    print(f"no cache: {uncached / calls * 1e6:7.2f} us/call")
+    print(f"cache:    {cached / calls * 1e6:7.2f} us/call  {cache.cache_info()}")
@@ -0,0 +1,57 @@
+"""
+Throughput of the basic_latex normalizations with the "passes" and "fused" engines of `NormalizationConfig`, on
+short answers (one call each), on a single large text and on texts which are mostly matches of a single rule.
+
+Usage:
+    python sandbox/bench_normalization_engines.py [large_size]
+"""
+import sys
+import time
+
+from latex2sympy2_extended.math_normalization import NormalizationConfig, normalize_latex
+
+STRINGS = [
+    r"\left( 3, \frac{\pi}{2} \right)",
+    r"$\dfrac{1}{2}$ and $\sqrt{2}$",
+    r"\mathrm{d}x + \int_{0}^{1} f(x) \, \mathrm{d}x",
+    r"\left[\begin{matrix}1 & 2\\3 & 4\end{matrix}\right]",
+    r"50 \% \text{ of } 1{,}000",
+    r"x \in \left(-\infty, 2\right] \cup [3, \infty)",
+    r"\displaystyle \sum_{k=1}^{n} k^{2} = \frac{n(n+1)(2n+1)}{6}",
+    r"\{1, 2, 3\} \text{ or } \{4\}",
+    r"a_{1} = .5, a_{2} = 0 .25",
+    r"\binom{n}{k} \cdot \tfrac{3}{4}",
+]
+
+# The fused engine handles each match in Python, these are slower with it
+DENSE = {"and_or": "and ", "decimal_space": " .", "comma": "{ , } ", "percent": "5 percent "}
+
+
+def best_of(f, n):
+    best = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    large_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    large = " ".join(STRINGS)
+    large = (large * (large_size // len(large) + 1))[:large_size]
+    small_size = sum(map(len, STRINGS))
+
+    for engine in ["passes", "fused"]:
+        config = NormalizationConfig(boxed="none", engine=engine)
+        small = best_of(lambda: [normalize_latex(s, config) for s in STRINGS], 200)
+        big = best_of(lambda: normalize_latex(large, config), 3)
+        print(f"{engine:<8} small: {small / len(STRINGS) * 1e6:6.1f} us/call {small_size / small / 1e6:5.2f} MB/s"
+              f"   large: {large_size / big / 1e6:5.2f} MB/s")
+
+    for name, repeated in DENSE.items():
+        dense = repeated * (large_size // len(repeated) // 5)
+        times = {engine: best_of(lambda: normalize_latex(dense, NormalizationConfig(boxed="none", engine=engine)), 3)
+                 for engine in ["passes", "fused"]}
+        print(f"dense {name:<14} passes: {times['passes'] * 1e3:6.1f} ms   fused: {times['fused'] * 1e3:6.1f} ms"
+              f"   ({times['fused'] / times['passes']:.2f}x)")
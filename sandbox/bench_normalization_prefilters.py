@@ -0,0 +1,37 @@
+"""
+normalize_latex on short answers with the literal prefilters of the normalization regexes, and with every regex
+run as before the prefilters, with the share of the regex runs skipped.
+
+Usage:
+    python sandbox/bench_normalization_prefilters.py [rounds]
+"""
+import sys
+import time
+
+from latex2sympy2_extended import math_normalization
+from latex2sympy2_extended.math_normalization import NormalizationConfig, normalization_stats, normalize_latex
+
+ANSWERS = ["5", "\\frac{1}{2}", "x^{2}", "12", "\\sqrt{3}", "-7", "3.5", "2\\pi", "\\infty", "x = 3", "(1, 2)",
+           "\\dfrac{3}{4}", "10\\%", "\\boxed{42}", "a + b", "$4$", "\\left( 3, \\frac{\\pi}{2} \\right)"]
+CONFIG = NormalizationConfig(units=True, malformed_operators=True, nits=True)
+
+
+def run(rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for answer in ANSWERS:
+            normalize_latex(answer, CONFIG)
+    return (time.perf_counter() - start) / (rounds * len(ANSWERS))
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    normalization_stats.reset()
+    prefiltered = min(run(rounds) for _ in range(3))
+    skip_rate = normalization_stats.skip_rate
+    may_match = math_normalization._may_match
+    math_normalization._may_match = lambda rule, text: True
+    unfiltered = min(run(rounds) for _ in range(3))
+    math_normalization._may_match = may_match
+    print(f"all regexes: {unfiltered * 1e6:6.2f} us/answer")
+    print(f"prefilters:  {prefiltered * 1e6:6.2f} us/answer  ({skip_rate:.0%} of the regex runs skipped)")
@@ -0,0 +1,34 @@
+"""
+Compares converting bare numeric answers with the numeric fast path and with the parser.
+
+Usage: python sandbox/bench_numeric_fast_path.py
+"""
+import time
+
+from latex2sympy2_extended import latex2sympy
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig
+
+CORPUS = ["42", "-7", "3.14", "0.5", "1,000", "12,345.67", "25\\%", "2.5%", "\\frac{1}{2}", "-\\frac{3}{4}", "\\dfrac{10}{3}"]
+ROUNDS = 100
+
+
+def run(config: ConversionConfig, **kwargs) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for latex_str in CORPUS:
+            latex2sympy(latex_str, conversion_config=config, **kwargs)
+    return (time.perf_counter() - start) / (ROUNDS * len(CORPUS))
+
+
+if __name__ == "__main__":
+    parser = ConversionConfig(numeric_fast_path=False)
+    fast = ConversionConfig()
+    # Warm up the DFA of the parser
+    run(parser)
+    # With the default normalization, and converting only
+    for label, kwargs in (("with normalization", {}), ("without normalization", {"normalization_config": None})):
+        parser_time = run(parser, **kwargs)
+        fast_time = run(fast, **kwargs)
+        print(label)
+        print(f"  parser:    {parser_time * 1e6:8.1f} us per conversion")
+        print(f"  fast path: {fast_time * 1e6:8.1f} us per conversion ({parser_time / fast_time:.1f}x)")
@@ -0,0 +1,45 @@
+"""
+Per-call cost of building a new lexer/parser pair (create_parser) compared to resetting a pooled one
+(pooled_parser), on short inputs.
+
+Usage: python sandbox/bench_parser_pool.py
+"""
+import timeit
+
+from latex2sympy2_extended.latex2sympy2 import _Latex2Sympy
+
+INPUTS = ["1", "x", "\\frac{1}{2}", "x + 1", "2^{10}"]
+NUMBER = 2000
+
+
+def construct_only(converter: _Latex2Sympy, latex_str: str):
+    converter.create_parser(latex_str)
+
+
+def pooled_only(converter: _Latex2Sympy, latex_str: str):
+    with converter.pooled_parser(latex_str):
+        pass
+
+
+def construct_and_parse(converter: _Latex2Sympy, latex_str: str):
+    converter.create_parser(latex_str).math()
+
+
+def pooled_and_parse(converter: _Latex2Sympy, latex_str: str):
+    with converter.pooled_parser(latex_str) as parser:
+        parser.math()
+
+
+if __name__ == "__main__":
+    converter = _Latex2Sympy()
+    # Warm up the DFA caches, so that only the construction overhead is measured
+    for latex_str in INPUTS:
+        construct_and_parse(converter, latex_str)
+
+    print(f"{'input':<14}{'new pair':>12}{'pooled':>12}{'new+parse':>12}{'pooled+parse':>14}  (us per call)")
+    for latex_str in INPUTS:
+        times = [
+            timeit.timeit(lambda: f(converter, latex_str), number=NUMBER) / NUMBER * 1e6
+            for f in (construct_only, pooled_only, construct_and_parse, pooled_and_parse)
+        ]
+        print(f"{latex_str:<14}" + "".join(f"{t:>12.1f}" for t in times[:3]) + f"{times[3]:>14.1f}")
@@ -0,0 +1,47 @@
+"""
+Compares parsing long single-expression inputs through the general math rule and through the
+relation_math rule chosen by the token-level pre-classifier.
+
+Usage: python sandbox/bench_preclassify.py
+"""
+import time
+
+from latex2sympy2_extended import latex2sympy
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig
+
+NO_PRECLASSIFY = ConversionConfig(preclassify_relations=False)
+ROUNDS = 5
+
+INPUTS = {
+    "fractions": lambda n: " + ".join(f"\\frac{{{i}}}{{{i + 1}}} \\cdot {i}" for i in range(n)),
+    "roots": lambda n: " - ".join(f"\\sqrt{{{i} + y}}" for i in range(n)),
+    "relation": lambda n: " + ".join(f"\\frac{{{i}}}{{{i + 1}}}" for i in range(n)) + " = x",
+    # Superscripts and function names: parsed with the general rule in both cases
+    "polynomial": lambda n: " + ".join(f"\\frac{{x^{{{i}}}}}{{{i + 1}}}" for i in range(n)) + " = 0",
+    "functions": lambda n: " + ".join(f"{i} \\sin{{y}}" for i in range(n)) + " \\le 1",
+}
+
+
+def timed(latex_str: str, config: ConversionConfig) -> float:
+    start = time.perf_counter()
+    latex2sympy(latex_str, conversion_config=config)
+    return time.perf_counter() - start
+
+
+def run(latex_str: str) -> tuple[float, float]:
+    # Rounds of both configs are interleaved and the best one is kept, the conversion itself is
+    # included in both cases
+    general = preclassified = float("inf")
+    for _ in range(ROUNDS):
+        general = min(general, timed(latex_str, NO_PRECLASSIFY))
+        preclassified = min(preclassified, timed(latex_str, ConversionConfig()))
+    return general, preclassified
+
+
+if __name__ == "__main__":
+    for name, make_input in INPUTS.items():
+        for n in (10, 50, 200):
+            latex_str = make_input(n)
+            general, preclassified = run(latex_str)
+            print(f"{name:>10} {len(latex_str):6d} chars: general {general * 1e3:8.2f} ms, "
+                  f"pre-classified {preclassified * 1e3:8.2f} ms ({general / preclassified:.2f}x)")
@@ -0,0 +1,38 @@
+"""
+Compares ANTLR's full LL prediction with the two-stage SLL-then-LL prediction.
+
+Usage: python sandbox/bench_prediction_mode.py
+"""
+import time
+
+from latex2sympy2_extended import latex2sympy
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig, parser_stats
+
+CORPUS = [
+    "1", "-3", "\\frac{1}{2}", "x + 1", "2x^{2} - 3x + 1", "\\sqrt{2}", "\\pi", "3.14",
+    "\\frac{\\sqrt{3}}{2}", "(1, 2)", "[0, \\infty)", "1, 2, 3", "x = 2", "x \\le 5",
+    "\\sin x + \\cos x", "\\log_{2} 8", "\\{1, 2, 3\\}", "e^{i\\pi}", "10\\%", "2 \\frac{1}{2}",
+]
+ROUNDS = 20
+
+
+def run(config: ConversionConfig) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for latex_str in CORPUS:
+            latex2sympy(latex_str, conversion_config=config)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # Warm up the DFA caches of both modes
+    run(ConversionConfig())
+    run(ConversionConfig(prediction_mode="sll"))
+
+    ll = run(ConversionConfig())
+    parser_stats.reset()
+    sll = run(ConversionConfig(prediction_mode="sll"))
+    n = ROUNDS * len(CORPUS)
+    print(f"LL:  {ll / n * 1e6:8.1f} us per conversion")
+    print(f"SLL: {sll / n * 1e6:8.1f} us per conversion  ({ll / sll:.2f}x)")
+    print(f"SLL parses: {parser_stats.sll_parses}, LL fallbacks: {parser_stats.ll_fallbacks}")
@@ -0,0 +1,32 @@
+"""
+Measures how converting chained relations (a < b < c < ...) scales with the number of relations.
+
+Usage: python sandbox/bench_relation_chain.py
+"""
+import time
+
+from latex2sympy2_extended import latex2sympy
+
+SIZES = [5, 20, 50, 100, 200, 500]
+OPERATORS = ["<", "\\le", "=", "\\neq"]
+FAMILIES = {
+    "inequalities": lambda n: " < ".join(f"{i} x" for i in range(n + 1)),
+    "mixed": lambda n: "".join(f"{i} x {OPERATORS[i % 4]} " for i in range(n)) + f"{n} x",
+}
+
+
+def run(latex_str: str, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        latex2sympy(latex_str, normalization_config=None)
+    return (time.perf_counter() - start) / rounds
+
+
+if __name__ == "__main__":
+    for name, make in FAMILIES.items():
+        for n in SIZES:
+            latex_str = make(n)
+            # Warm up the DFA of the parser
+            run(latex_str, 1)
+            seconds = run(latex_str, rounds=max(1, 100 // n))
+            print(f"{name:12s} n={n:4d} {seconds * 1e3:10.2f} ms {seconds / n * 1e6:8.2f} us per relation")
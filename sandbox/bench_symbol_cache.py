@@ -0,0 +1,49 @@
+"""
+Measures the symbol intern table, both on symbol lookups alone and on converting symbol heavy expressions.
+
+Usage: python sandbox/bench_symbol_cache.py
+"""
+import time
+
+from latex2sympy2_extended import latex2sympy, symbol_cache_info, clear_symbol_cache
+from latex2sympy2_extended.symbols import get_symbol, make_symbol
+
+NAMES = ["x", "y", "z", "a", "b", "c", "\\alpha", "\\beta", "\\theta", "\\pi", "x_{1}", "x_{2}", "n", "k", "t"]
+CORPUS = [
+    "a x^2 + b x + c",
+    "\\alpha \\beta + \\gamma \\delta - \\theta",
+    "x_{1} + x_{2} + x_{3} + x_{4}",
+    "\\frac{a b}{c d} + \\frac{x y}{z w}",
+    "p q r s t u v w",
+]
+ROUNDS = 20_000
+
+
+def lookup_time(get, make) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for name in NAMES:
+            get(name, True, False)
+            make(name, True, False)
+    return (time.perf_counter() - start) / (ROUNDS * len(NAMES) * 2)
+
+
+def convert_time(rounds: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for latex_str in CORPUS:
+            latex2sympy(latex_str, normalization_config=None)
+    return (time.perf_counter() - start) / (rounds * len(CORPUS))
+
+
+if __name__ == "__main__":
+    uncached = lookup_time(get_symbol.__wrapped__, make_symbol.__wrapped__)
+    cached = lookup_time(get_symbol, make_symbol)
+    print(f"lookup   uncached: {uncached * 1e6:6.2f} us   interned: {cached * 1e6:6.2f} us ({uncached / cached:.1f}x)")
+
+    # Warm up the DFA of the parser
+    convert_time(rounds=5)
+    clear_symbol_cache()
+    seconds = convert_time()
+    info = symbol_cache_info()
+    print(f"convert  {seconds * 1e6:8.1f} us per conversion, hit rate {info.hit_rate:.1%} ({info.hits} hits, {info.misses} misses)")
@@ -0,0 +1,35 @@
+"""
+Unit removal on long strings, with the units regex and with the reversed trie used by normalize_latex.
+
+Usage:
+    python sandbox/bench_units_removal.py [max_size]
+"""
+import sys
+import time
+
+from latex2sympy2_extended.math_normalization import NormalizationConfig, normalize_latex, remove_units, units_regex
+
+STEP = r"x_{1} + 2 \cdot 3 = 7 so the distance is 12 m and "
+
+
+def best_of(f, n):
+    best = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    config = NormalizationConfig(units=True, boxed="none")
+    size = 1_000
+    while size <= max_size:
+        text = STEP * (size // len(STEP)) + "42 meters"
+        regex = best_of(lambda: units_regex.sub(r"\1", text), 3)
+        trie = best_of(lambda: remove_units(text), 3)
+        normalize = best_of(lambda: normalize_latex(text, config), 3)
+        print(f"{len(text):>8} chars  regex: {regex * 1e3:8.3f} ms  trie: {trie * 1e3:8.3f} ms"
+              f"  normalize_latex(units=True): {normalize * 1e3:8.3f} ms")
+        size *= 10
@@ -405,6 +405,9 @@ NOTIN: '\\notin' | '∉';
 // We also have set elements so that 1,2,3,4 is parsed as a set
 math: (set_elements_relation | set_elements | set_relation) EOF;
 
+// Entry for inputs which are pre-classified as a single relation, skips the lookahead needed by math
+relation_math: relation EOF;
+
 transpose: '^T' | '^{T}' |  '^{\\\top}' | '\'';
 degree: '^\\circ' | '^\\degree' | '^\\circle' | '^°' | '^{\\circ}' | '^{\\degree}' | '^{\\circle}' | '^{°}';
 
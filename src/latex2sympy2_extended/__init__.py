@@ -1,5 +1,14 @@
 from .latex2sympy2 import latex2sympy
-from .math_normalization import normalize_latex, NormalizationConfig
+from .math_normalization import normalize_latex, NormalizationConfig, register_units, unregister_units
 from .latex2sympy2 import is_expr_of_only_symbols, convert_to_pct
+from .batch import latex2sympy_batch
+from .isolation import IsolatedConverter
+from .async_converter import latex2sympy_async, AsyncConverter
+from .cache import ConversionCache, NormalizationCache
+from .errors import InputLimitError, ConversionTimeoutError, ResourceLimitError
+from .deadline import Deadline
+from .functions import register_function, unregister_function
+from .symbols import symbol_cache_info, clear_symbol_cache
+from .dfa_cache import warmup, save_dfa_snapshot, load_dfa_snapshot, reset_dfa_cache, set_dfa_cache_limit, dfa_cache_info
 
-__all__ = ['latex2sympy', 'normalize_latex', 'NormalizationConfig', 'is_expr_of_only_symbols', 'convert_to_pct']
+__all__ = ['latex2sympy', 'normalize_latex', 'NormalizationConfig', 'register_units', 'unregister_units', 'is_expr_of_only_symbols', 'convert_to_pct', 'latex2sympy_batch', 'ConversionCache', 'NormalizationCache', 'warmup', 'save_dfa_snapshot', 'load_dfa_snapshot', 'reset_dfa_cache', 'set_dfa_cache_limit', 'dfa_cache_info', 'symbol_cache_info', 'clear_symbol_cache', 'register_function', 'unregister_function', 'InputLimitError', 'ConversionTimeoutError', 'Deadline', 'ResourceLimitError', 'IsolatedConverter', 'latex2sympy_async', 'AsyncConverter']
@@ -0,0 +1,248 @@
+import asyncio
+import math
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable
+
+from latex2sympy2_extended import batch
+from latex2sympy2_extended.batch import _convert_one, _init_worker, dumps_result, loads_result
+from latex2sympy2_extended.cache import ConversionCache
+from latex2sympy2_extended.deadline import Deadline
+from latex2sympy2_extended.latex2sympy2 import latex2sympy, ConversionConfig
+from latex2sympy2_extended.math_normalization import NormalizationConfig
+
+
+async def _await_with_deadline(future: Future, deadline: Deadline) -> Any:
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        # The future can only be cancelled before it starts, a running conversion stops at its next check
+        deadline.cancel()
+        raise
+
+
+async def latex2sympy_async(latex_str: str, variable_values: dict | None = None, is_real=None, convert_degrees: bool = False, normalization_config: NormalizationConfig | None = NormalizationConfig(), conversion_config: ConversionConfig = ConversionConfig(), cache: ConversionCache | None = None, timeout: float | Deadline | None = None):
+    """
+    Same as `latex2sympy`, but converts in the default executor of the event loop instead of blocking it.
+
+    Cancelling the call also stops the conversion: it raises `ConversionTimeoutError` in its thread at the next
+    deadline check.
+    """
+    deadline = Deadline.of(timeout) or Deadline(math.inf)
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(None, lambda: latex2sympy(latex_str, variable_values, is_real, convert_degrees, normalization_config, conversion_config, cache=cache, timeout=deadline))
+    try:
+        return await future
+    except asyncio.CancelledError:
+        deadline.cancel()
+        raise
+
+
+def _release_soon(loop: asyncio.AbstractEventLoop, release: Callable[[], None]):
+    try:
+        loop.call_soon_threadsafe(release)
+    except RuntimeError:
+        # The event loop was closed while the conversion was running
+        pass
+
+
+# Shared with the parent, one flag per slot of conversions in flight, set to cancel the conversion in the slot
+_cancel_flags: Any = None
+
+
+def _init_process_worker(kwargs: dict[str, Any], cancel_flags: Any):
+    global _cancel_flags
+    _init_worker(kwargs)
+    _cancel_flags = cancel_flags
+
+
+class _FlagDeadline(Deadline):
+    """Deadline of a conversion in a worker process, which is also cancelled by the flag of its slot"""
+    __slots__ = ("slot",)
+
+    def __init__(self, timeout: float, slot: int):
+        super().__init__(timeout)
+        self.slot = slot
+
+    def check(self):
+        if _cancel_flags[self.slot]:
+            self.cancel()
+        super().check()
+
+
+def _convert_in_process(latex_str: str, timeout: float | None, slot: int) -> bytes:
+    deadline = _FlagDeadline(math.inf if timeout is None else timeout, slot)
+    return dumps_result(_convert_one(latex_str, {**batch._worker_kwargs, "timeout": deadline}))
+
+
+class AsyncConverter:
+    """
+    Converts latex strings from asyncio code in an executor it manages, with at most `max_in_flight`
+    conversions submitted at once. Further calls wait (in the event loop) for a free slot, so a burst of
+    requests doesn't queue unbounded work behind the executor.
+
+    Cancelling a call stops its conversion at the next deadline check (see `Deadline`), in a worker process
+    through a flag in shared memory. With `executor="thread"` (the default) the conversions still hold the GIL
+    while they run, `executor="process"` keeps the event loop responsive under load. Process workers are started
+    with the `multiprocessing` default start method, functions added with `register_function` are only known to
+    them if it's fork.
+
+    Usage:
+        async with AsyncConverter(executor="process", max_in_flight=16) as converter:
+            expr = await converter.convert(r"\\frac{1}{2}", timeout=1)
+            async for index, result in converter.as_completed([r"x^{2}", r"\\frac{"]):
+                ...
+    """
+    def __init__(
+        self,
+        executor: str = "thread",
+        workers: int | None = None,
+        max_in_flight: int | None = None,
+        variable_values: dict | None = None,
+        is_real=None,
+        convert_degrees: bool = False,
+        normalization_config: NormalizationConfig | None = NormalizationConfig(),
+        conversion_config: ConversionConfig = ConversionConfig(),
+        cache: ConversionCache | None = None,
+    ):
+        """
+        Args:
+            executor: "thread" or "process"
+            workers: Number of threads or processes, defaults to the number of CPUs
+            max_in_flight: Maximum number of conversions submitted to the executor at once, defaults to twice
+                the number of workers
+            variable_values, is_real, convert_degrees, normalization_config, conversion_config:
+                Same as in `latex2sympy`, shared by all conversions
+            cache: `ConversionCache` used by the conversions, only with the thread executor
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"executor must be 'thread' or 'process', not {executor!r}")
+        if executor == "process" and cache is not None:
+            raise ValueError("A ConversionCache can't be shared with worker processes")
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self._kwargs = dict(
+            variable_values=variable_values,
+            is_real=is_real,
+            convert_degrees=convert_degrees,
+            normalization_config=normalization_config,
+            conversion_config=conversion_config,
+        )
+        self._cache = cache
+        self._executor: Executor
+        if executor == "thread":
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="latex2sympy")
+        else:
+            # Each submitted conversion takes a free slot and its cancel flag, there are at most max_in_flight
+            self._cancel_flags = multiprocessing.RawArray("b", self.max_in_flight)
+            self._free_slots = list(range(self.max_in_flight))
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_init_process_worker, initargs=(self._kwargs, self._cancel_flags))
+        self._is_process = executor == "process"
+        # Created lazily, it belongs to the event loop which first uses it
+        self._slots: asyncio.Semaphore | None = None
+        # Deadlines of the running thread conversions, cancelled on close
+        self._deadlines: set[Deadline] = set()
+
+    def _convert_in_thread(self, latex_str: str, deadline: Deadline) -> Any:
+        try:
+            return latex2sympy(latex_str, **self._kwargs, cache=self._cache, timeout=deadline)
+        finally:
+            self._deadlines.discard(deadline)
+
+    async def convert(self, latex_str: str, timeout: float | None = None) -> Any:
+        """
+        Convert a single latex string, raising the conversion error if it fails. `timeout` is the maximum
+        number of seconds of the conversion itself, not counting the wait for a free slot.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        slots = self._slots
+        await slots.acquire()
+        loop = asyncio.get_running_loop()
+        if self._is_process:
+            return await self._convert_with_cancel_flag(loop, slots, latex_str, timeout)
+
+        deadline = Deadline(math.inf if timeout is None else timeout)
+        self._deadlines.add(deadline)
+        try:
+            future = self._executor.submit(self._convert_in_thread, latex_str, deadline)
+        except BaseException:
+            self._deadlines.discard(deadline)
+            slots.release()
+            raise
+        # The slot is freed once the executor is done with the conversion, not when the caller stops waiting
+        future.add_done_callback(lambda _: _release_soon(loop, slots.release))
+        return await _await_with_deadline(future, deadline)
+
+    async def _convert_with_cancel_flag(self, loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore, latex_str: str, timeout: float | None) -> Any:
+        # Holding a semaphore slot guarantees a free cancel flag
+        slot = self._free_slots.pop()
+        self._cancel_flags[slot] = 0
+
+        def release():
+            self._free_slots.append(slot)
+            slots.release()
+
+        try:
+            future = self._executor.submit(_convert_in_process, latex_str, timeout, slot)
+        except BaseException:
+            release()
+            raise
+        future.add_done_callback(lambda _: _release_soon(loop, release))
+
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Once the future is done its slot may already be reused, until then the worker owns the flag
+            if not future.done():
+                self._cancel_flags[slot] = 1
+            raise
+        result = loads_result(result)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def _convert_or_error(self, index: int, latex_str: str) -> tuple[int, Any]:
+        try:
+            return index, await self.convert(latex_str)
+        except Exception as e:
+            return index, e
+
+    async def as_completed(self, strings: Iterable[str]) -> AsyncIterator[tuple[int, Any]]:
+        """
+        Convert many strings, yielding `(index, result)` pairs in the order the conversions finish, with the
+        exception in place of the result for failed items. `strings` is consumed lazily, at most
+        `max_in_flight` strings are converted at once. Closing the iterator early cancels the pending conversions.
+        """
+        pending: set[asyncio.Task] = set()
+        try:
+            for index, latex_str in enumerate(strings):
+                if len(pending) >= self.max_in_flight:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                pending.add(asyncio.create_task(self._convert_or_error(index, latex_str)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def close(self):
+        """
+        Stop the executor, cancelling the pending and running conversions.
+        """
+        for deadline in list(self._deadlines):
+            deadline.cancel()
+        if self._is_process:
+            self._cancel_flags[:] = [1] * self.max_in_flight
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
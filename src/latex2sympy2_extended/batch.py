@@ -0,0 +1,143 @@
+import io
+import multiprocessing
+import os
+import pickle
+from typing import Any, Iterable
+
+from sympy import Basic
+
+from latex2sympy2_extended.latex2sympy2 import latex2sympy, ConversionConfig
+from latex2sympy2_extended.math_normalization import NormalizationConfig
+
+# Conversion arguments of the current worker process, set once by _init_worker
+_worker_kwargs: dict[str, Any] = {}
+
+
+def _init_worker(kwargs: dict[str, Any]):
+    """
+    Runs once per worker process. The lexer and parser are imported together with this module,
+    so the only thing left is to remember the conversion arguments shared by the whole batch.
+    """
+    global _worker_kwargs
+    _worker_kwargs = kwargs
+
+
+# Hash and assumptions are recomputed lazily, args are passed to Basic.__new__
+_SKIPPED_SLOTS = {"_mhash", "_args", "_assumptions"}
+
+
+def _rebuild_basic(cls, args, state):
+    obj = Basic.__new__(cls, *args)
+    for name, value in state.items():
+        setattr(obj, name, value)
+    return obj
+
+
+class _ResultPickler(pickle.Pickler):
+    """
+    Sympy pickles objects by calling their constructors again, which evaluates them (2^{10} comes back
+    as 1024, Integral(x, x) gets new args, ...). Compound expressions are therefore rebuilt with
+    Basic.__new__ and their instance state is restored as is.
+    """
+    def reducer_override(self, obj):
+        if not isinstance(obj, Basic) or obj.is_Atom:
+            return NotImplemented
+        state = {}
+        for cls in type(obj).__mro__:
+            for name in cls.__dict__.get("__slots__", ()):
+                if name not in _SKIPPED_SLOTS and hasattr(obj, name):
+                    state[name] = getattr(obj, name)
+        state.update(getattr(obj, "__dict__", {}))
+        return _rebuild_basic, (type(obj), obj.args, state)
+
+
+def dumps_result(result: Any) -> bytes:
+    """
+    Pickle a conversion result (or exception) so that it can be sent to another process,
+    keeping the exact (unevaluated) structure of the expression.
+    """
+    buffer = io.BytesIO()
+    try:
+        _ResultPickler(buffer).dump(result)
+    except Exception:
+        # Some exceptions (e.g. with unpicklable args) can't be sent back to the parent process
+        if not isinstance(result, Exception):
+            raise
+        buffer = io.BytesIO()
+        _ResultPickler(buffer).dump(Exception(f"{type(result).__name__}: {result}"))
+    return buffer.getvalue()
+
+
+def loads_result(data: bytes) -> Any:
+    """
+    Unpickle a result created by `dumps_result`.
+    """
+    return pickle.loads(data)
+
+
+def _convert_one(latex_str: str, kwargs: dict[str, Any]):
+    try:
+        return latex2sympy(latex_str, **kwargs)
+    except Exception as e:
+        return e
+
+
+def _convert_in_worker(latex_str: str) -> bytes:
+    return dumps_result(_convert_one(latex_str, _worker_kwargs))
+
+
+def latex2sympy_batch(
+    strings: Iterable[str],
+    variable_values: dict | None = None,
+    is_real=None,
+    convert_degrees: bool = False,
+    normalization_config: NormalizationConfig | None = NormalizationConfig(),
+    conversion_config: ConversionConfig = ConversionConfig(),
+    workers: int | None = None,
+    chunksize: int | None = None,
+) -> list[Any]:
+    """
+    Convert many latex strings at once using a pool of worker processes.
+
+    Duplicate inputs are converted only once. The result list has the same order as the input, and
+    each item is either the converted expression or the exception raised while converting it.
+
+    Args:
+        strings: The latex strings to convert
+        variable_values, is_real, convert_degrees, normalization_config, conversion_config:
+            Same as in `latex2sympy`, shared by all strings
+        workers: Number of worker processes, defaults to the number of CPUs. With 1 or less the
+            conversion runs in the current process.
+        chunksize: Number of strings sent to a worker at once, by default it's chosen based on the
+            number of unique strings and workers.
+
+    Returns:
+        A list with one result (or exception) per input string
+    """
+    strings = list(strings)
+    unique = list(dict.fromkeys(strings))
+    kwargs = dict(
+        variable_values=variable_values,
+        is_real=is_real,
+        convert_degrees=convert_degrees,
+        normalization_config=normalization_config,
+        conversion_config=conversion_config,
+    )
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(unique))
+
+    if workers <= 1:
+        converted = [_convert_one(s, kwargs) for s in unique]
+    else:
+        if chunksize is None:
+            # Same heuristic as multiprocessing.Pool.map
+            chunksize, extra = divmod(len(unique), workers * 4)
+            if extra:
+                chunksize += 1
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(kwargs,)) as pool:
+            converted = [loads_result(data) for data in pool.imap(_convert_in_worker, unique, chunksize=chunksize)]
+
+    results = dict(zip(unique, converted))
+    return [results[s] for s in strings]
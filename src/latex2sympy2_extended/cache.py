@@ -0,0 +1,193 @@
+import copy
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple
+
+from sympy import Basic, MatrixBase, srepr
+
+from latex2sympy2_extended.errors import ConversionTimeoutError
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+    max_size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class _WeightedLRUCache:
+    """
+    Thread-safe LRU cache which evicts entries based on their total weight instead of their count.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key: Hashable, value: Any, weight: int):
+        # Entries bigger than the whole cache would just evict everything else
+        if weight > self.max_size:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (value, weight)
+            self._size += weight
+            while self._size > self.max_size:
+                _, (_, evicted_weight) = self._entries.popitem(last=False)
+                self._size -= evicted_weight
+                self.evictions += 1
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, len(self._entries), self._size, self.max_size)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def expr_tree_size(expr: Any) -> int:
+    """
+    Approximate size of a conversion result, counted as the number of nodes in the expression tree.
+    """
+    size = 0
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        size += 1
+        if isinstance(node, Basic):
+            stack.extend(node.args)
+        elif isinstance(node, MatrixBase):
+            stack.extend(node)
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            stack.extend(node.keys())
+            stack.extend(node.values())
+    return size
+
+
+def _copy_if_mutable(value: Any) -> Any:
+    # Sympy expressions are immutable, but some operators (rref, nullspace, eigenvals, ...) return
+    # mutable matrices, lists or dicts which the caller could modify
+    if isinstance(value, MatrixBase) and not isinstance(value, Basic):
+        return value.copy()
+    if isinstance(value, (list, dict)):
+        return copy.deepcopy(value)
+    return value
+
+
+class ConversionCache:
+    """
+    Cache for `latex2sympy` results, pass it as `latex2sympy(..., cache=cache)`.
+
+    Entries are keyed on the input string and all the conversion arguments. Both results and failures
+    (except timeouts) are cached, a cached failure is raised again without running the parser. The least
+    recently used entries are evicted once the total size of the cached expressions (number of nodes in the
+    expression trees) exceeds `max_size`.
+    """
+    def __init__(self, max_size: int = 1_000_000):
+        self._cache = _WeightedLRUCache(max_size)
+
+    @staticmethod
+    def make_key(latex_str: str, variable_values: dict | None, is_real, convert_degrees: bool, normalization_config, conversion_config) -> Hashable:
+        variables = None
+        if variable_values:
+            variables = tuple(sorted((str(var), srepr(val)) for var, val in variable_values.items()))
+        return (latex_str, normalization_config, conversion_config, is_real, convert_degrees, variables)
+
+    def get_or_convert(self, key: Hashable, convert: Callable[[], Any]) -> Any:
+        found, value = self._cache.get(key)
+        if not found:
+            try:
+                value = convert()
+            except ConversionTimeoutError:
+                # Depends on the timeout of the call and on the load, not on the input
+                raise
+            except Exception as e:
+                self._cache.put(key, _CachedError(e), 1)
+                raise
+            self._cache.put(key, value, expr_tree_size(value))
+        elif isinstance(value, _CachedError):
+            # Drop the old traceback so that it doesn't grow with every hit
+            raise value.error.with_traceback(None)
+        return _copy_if_mutable(value)
+
+    def cache_info(self) -> CacheInfo:
+        return self._cache.cache_info()
+
+    def clear(self):
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class _CachedError:
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+class NormalizationCache:
+    """
+    Cache for `normalize_latex` results, pass it as `normalize_latex(text, config, cache=cache)`.
+
+    Entries are keyed on the input string and the `NormalizationConfig`. It's separate from `ConversionCache`, so
+    that normalizing strings for string-match grading doesn't fill the conversion cache and the other way around.
+    The least recently used entries are evicted once the memory used by the cached strings (inputs and results,
+    in bytes) exceeds `max_size`.
+    """
+    def __init__(self, max_size: int = 64 * 2**20):
+        self._cache = _WeightedLRUCache(max_size)
+
+    def get_or_normalize(self, text: str, config, normalize: Callable[[], str]) -> str:
+        key = (text, config)
+        found, value = self._cache.get(key)
+        if not found:
+            # Failures (timeouts) aren't cached, they don't depend on the input only
+            value = normalize()
+            size = sys.getsizeof(text)
+            if value is not text:
+                size += sys.getsizeof(value)
+            self._cache.put(key, value, size)
+        return value
+
+    def cache_info(self) -> CacheInfo:
+        return self._cache.cache_info()
+
+    def clear(self):
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
@@ -0,0 +1,43 @@
+import math
+import time
+
+from latex2sympy2_extended.errors import ConversionTimeoutError
+
+
+class Deadline:
+    """
+    Point in time after which a conversion stops with `ConversionTimeoutError`.
+
+    The deadline is checked cooperatively between the normalization steps, on every parser rule entry and
+    on every node converted to sympy, so it doesn't need signals and works in any thread. A single sympy
+    call which takes long (e.g. evaluating a huge power) is not interrupted, see
+    `ConversionConfig(construction_only=True)` for avoiding those.
+    """
+    __slots__ = ("timeout", "expires_at")
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    @staticmethod
+    def of(timeout: "float | Deadline | None") -> "Deadline | None":
+        """Deadline for a `timeout` argument, which is either a number of seconds, a Deadline or None"""
+        if timeout is None or isinstance(timeout, Deadline):
+            return timeout
+        return Deadline(timeout)
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def cancel(self):
+        """Expire the deadline now, the conversion which checks it stops at its next check"""
+        self.expires_at = -math.inf
+
+    def check(self):
+        # A deadline without a timeout (`Deadline(math.inf)`) only expires when cancelled, don't read the clock
+        if self.expires_at == math.inf:
+            return
+        if self.expires_at == -math.inf:
+            raise ConversionTimeoutError("Conversion was cancelled")
+        if time.monotonic() > self.expires_at:
+            raise ConversionTimeoutError(f"Conversion took longer than {self.timeout} seconds")
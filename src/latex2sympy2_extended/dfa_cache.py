@@ -0,0 +1,367 @@
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Iterable, NamedTuple
+
+from antlr4.PredictionContext import PredictionContext
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.LexerAction import LexerMoreAction, LexerPopModeAction, LexerSkipAction
+from antlr4.atn.LexerActionExecutor import LexerActionExecutor
+from antlr4.atn.SemanticContext import SemanticContext
+from antlr4.dfa.DFA import DFA
+from antlr4.dfa.DFAState import DFAState
+
+from latex2sympy2_extended.antlr_parser import PSLexer, PSParser, antlr_version
+
+logger = logging.getLogger(__name__)
+
+# Environment variable with the path of a snapshot which is loaded when the package is imported
+SNAPSHOT_ENV_VAR = "LATEX2SYMPY2_DFA_SNAPSHOT"
+_SNAPSHOT_FORMAT = 1
+
+# Representative inputs, covering the common rules of the grammar (and their DFA decisions)
+WARMUP_CORPUS = (
+    "1", "-3", "3.14", "1,000", "10\\%", "2.5 \\times 10^{3}", "\\frac{1}{2}", "-\\frac{3}{4}", "\\dfrac{7}{8}",
+    "2 \\frac{1}{3}", "\\sqrt{2}", "\\sqrt[3]{27}", "2\\sqrt{3}", "\\frac{\\sqrt{3}}{2}", "\\pi", "e", "\\infty",
+    "x", "x + 1", "2x - 3", "x^{2}", "x^2 + 2x + 1", "(x + 1)(x - 1)", "\\frac{x + 1}{x - 1}", "a^{2} + b^{2} = c^{2}",
+    "x_{1} + x_{2}", "\\alpha + \\beta", "3 \\cdot 4", "6 \\div 2", "|x - 1|", "\\left( \\frac{1}{2} \\right)^{2}",
+    "\\sin x", "\\cos^{2} \\theta", "\\tan(2x)", "\\arcsin \\frac{1}{2}", "\\log_{2} 8", "\\ln(e^{2})", "\\exp(x)",
+    "\\lfloor 2.5 \\rfloor", "\\lceil x \\rceil", "5!", "\\binom{5}{2}", "30^\\circ", "f(x) = x^{2}", "g(2)",
+    "\\int_{0}^{1} x^{2} dx", "\\int x dx", "\\sum_{i=1}^{n} i", "\\prod_{k=1}^{3} k", "\\lim_{x \\to 0} \\frac{\\sin x}{x}",
+    "\\frac{d}{dx} x^{2}", "\\frac{dy}{dx}", "x = 2", "x \\le 5", "x > -1", "2 < x \\leq 3", "x \\neq 0", "y = 2x + 1",
+    "1, 2, 3", "x = 1, y = 2", "(1, 2)", "[0, \\infty)", "(-\\infty, 3]", "\\{1, 2, 3\\}", "x \\in (0, 1)",
+    "(0, 1) \\cup (2, 3)", "[1, 2] \\cap [0, 3]", "\\mathbb{R} \\setminus \\{0\\}", "\\emptyset", "\\pm 2", "1 \\pm \\sqrt{2}",
+    "\\begin{pmatrix} 1 & 2 \\\\ 3 & 4 \\end{pmatrix}", "\\det \\begin{bmatrix} 1 & 0 \\\\ 0 & 1 \\end{bmatrix}",
+    "\\boxed{42}", "\\text{5 cm}", "\\$5", "i^{2}", "\\overline{z}", "\\vec{v}",
+)
+
+
+def warmup(corpus: Iterable[str] | None = None, **kwargs):
+    """
+    Convert a representative corpus so that ANTLR builds the prediction DFA of the lexer and parser
+    before the first real input. Conversion errors are ignored.
+
+    Args:
+        corpus: The latex strings to convert, defaults to `WARMUP_CORPUS`
+        kwargs: Passed to `latex2sympy`, e.g. normalization_config and conversion_config
+    """
+    # The converter imports this module to enforce the DFA cache limits
+    from latex2sympy2_extended.latex2sympy2 import latex2sympy
+
+    for latex_str in WARMUP_CORPUS if corpus is None else corpus:
+        try:
+            latex2sympy(latex_str, **kwargs)
+        except Exception:
+            pass
+
+
+class DFACacheInfo(NamedTuple):
+    parser_states: int
+    lexer_states: int
+    # Prediction contexts in the parser's shared context cache
+    contexts: int
+    # Parses since the last reset, and the number of resets
+    parses: int
+    resets: int
+    # Approximate size of the DFA and context cache objects, only computed if requested
+    estimated_bytes: int | None
+
+
+def _dfa_state_count(recognizer) -> int:
+    return sum(len(dfa._states) for dfa in recognizer.decisionsToDFA)
+
+
+def _estimate_dfa_bytes() -> int:
+    seen = set()
+    size = 0
+
+    def add(obj) -> bool:
+        nonlocal size
+        if obj is None or id(obj) in seen:
+            return False
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        return True
+
+    contexts = list(PSParser.sharedContextCache.cache)
+    add(PSParser.sharedContextCache.cache)
+    for recognizer in (PSParser, PSLexer):
+        for dfa in recognizer.decisionsToDFA:
+            add(dfa)
+            add(dfa._states)
+            for state in dfa._states:
+                add(state)
+                add(state.edges)
+                add(state.predicates)
+                if add(state.configs):
+                    add(state.configs.configs)
+                    for config in state.configs:
+                        if add(config):
+                            contexts.append(config.context)
+    # Contexts form a graph along their parents
+    while contexts:
+        context = contexts.pop()
+        if add(context):
+            parents = getattr(context, "parents", None)
+            if parents is not None:
+                add(parents)
+                add(getattr(context, "returnStates", None))
+                contexts.extend(parents)
+            elif getattr(context, "parentCtx", None) is not None:
+                contexts.append(context.parentCtx)
+    return size
+
+
+def reset_dfa_cache():
+    """
+    Drop the prediction DFA of the lexer and parser and the parser's shared context cache, releasing their memory.
+    The following parses are slower until the DFA is built again.
+    """
+    with _monitor.lock:
+        # Replace the contents in place, existing parsers and lexers share these objects
+        for recognizer in (PSParser, PSLexer):
+            recognizer.decisionsToDFA[:] = [DFA(state, i) for i, state in enumerate(recognizer.atn.decisionToState)]
+        PSParser.sharedContextCache.cache.clear()
+        _monitor.parses = 0
+        _monitor.resets += 1
+
+
+def set_dfa_cache_limit(max_states: int | None = None, max_parses: int | None = None):
+    """
+    Reset the DFA cache (see `reset_dfa_cache`) once it has more than `max_states` DFA states (lexer and parser
+    together), or after every `max_parses` parses. None means no limit, which is the default.
+    """
+    with _monitor.lock:
+        _monitor.max_states = max_states
+        _monitor.max_parses = max_parses
+
+
+def dfa_cache_info(estimate_memory: bool = False) -> DFACacheInfo:
+    """
+    Size of the prediction DFA of the lexer and parser. Estimating the memory walks all the DFA states,
+    so it's only done if `estimate_memory` is set.
+    """
+    return DFACacheInfo(
+        parser_states=_dfa_state_count(PSParser),
+        lexer_states=_dfa_state_count(PSLexer),
+        contexts=len(PSParser.sharedContextCache.cache),
+        parses=_monitor.parses,
+        resets=_monitor.resets,
+        estimated_bytes=_estimate_dfa_bytes() if estimate_memory else None,
+    )
+
+
+class _DFACacheMonitor:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.max_states: int | None = None
+        self.max_parses: int | None = None
+        self.parses = 0
+        self.resets = 0
+
+    def after_parse(self):
+        """Called by the converter after every parse, resets the DFA cache once it's over the limits"""
+        self.parses += 1
+        if self.max_parses is not None and self.parses >= self.max_parses:
+            reset_dfa_cache()
+        elif self.max_states is not None and _dfa_state_count(PSParser) + _dfa_state_count(PSLexer) > self.max_states:
+            reset_dfa_cache()
+
+
+_monitor = _DFACacheMonitor()
+
+
+def _grammar_hash() -> str:
+    # The snapshot refers to ATN states by number, so it's only valid for the exact same grammar
+    digest = hashlib.sha256()
+    for recognizer in (PSParser, PSLexer):
+        digest.update(repr(sys.modules[recognizer.__module__].serializedATN()).encode())
+    return digest.hexdigest()
+
+
+def _snapshot_header() -> tuple:
+    return (_SNAPSHOT_FORMAT, antlr_version, _grammar_hash())
+
+
+# DFA edges pointing to the shared error state
+_ERROR_EDGE = -1
+
+
+def _flatten_dfa(dfa: DFA) -> tuple:
+    """Turn the DFA state graph into a list of states with edges stored as indices, so that pickling doesn't recurse along the edges"""
+    index = {}
+    order = []
+
+    def visit(state):
+        if state is None or state is ATNSimulator.ERROR:
+            return
+        if id(state) not in index:
+            index[id(state)] = len(order)
+            order.append(state)
+
+    visit(dfa.s0)
+    for state in dfa._states:
+        visit(state)
+    # Edges can only point to states which are already visited or appended later in the loop
+    i = 0
+    while i < len(order):
+        for target in order[i].edges or ():
+            visit(target)
+        i += 1
+
+    def edge_index(target):
+        if target is None:
+            return None
+        return _ERROR_EDGE if target is ATNSimulator.ERROR else index[id(target)]
+
+    states = [
+        (
+            state.stateNumber, state.configs, state.isAcceptState, state.prediction, state.lexerActionExecutor,
+            state.requiresFullContext, state.predicates,
+            None if state.edges is None else [edge_index(target) for target in state.edges],
+        )
+        for state in order
+    ]
+    s0 = None if dfa.s0 is None else index[id(dfa.s0)]
+    return dfa.decision, s0, [index[id(state)] for state in dfa._states], states
+
+
+def _restore_dfa(atn, flat: tuple) -> DFA:
+    decision, s0, registered, states = flat
+    dfa = DFA(atn.decisionToState[decision], decision)
+    rebuilt = []
+    for state_number, configs, is_accept, prediction, lexer_action_executor, requires_full_context, predicates, _ in states:
+        state = DFAState(state_number, configs)
+        state.isAcceptState = is_accept
+        state.prediction = prediction
+        state.lexerActionExecutor = lexer_action_executor
+        state.requiresFullContext = requires_full_context
+        state.predicates = predicates
+        # Cached hashes can come from a process with a different hash seed
+        configs.cachedHashCode = -1
+        rebuilt.append(state)
+    for state, (*_, edges) in zip(rebuilt, states):
+        if edges is not None:
+            state.edges = [
+                None if target is None else ATNSimulator.ERROR if target == _ERROR_EDGE else rebuilt[target]
+                for target in edges
+            ]
+    if s0 is not None:
+        dfa.s0 = rebuilt[s0]
+    for i in registered:
+        dfa._states[rebuilt[i]] = rebuilt[i]
+    return dfa
+
+
+def _shared_objects() -> list[tuple[object, tuple]]:
+    """Objects of the runtime and of the generated recognizers which are referenced by the snapshot instead of copied"""
+    shared = [
+        (PredictionContext.EMPTY, ("empty_context",)),
+        (SemanticContext.NONE, ("no_semantic_context",)),
+        (ATNSimulator.ERROR, ("error_state",)),
+        (LexerSkipAction.INSTANCE, ("skip_action",)),
+        (LexerMoreAction.INSTANCE, ("more_action",)),
+        (LexerPopModeAction.INSTANCE, ("pop_mode_action",)),
+    ]
+    for name, recognizer in (("parser", PSParser), ("lexer", PSLexer)):
+        shared.extend((state, (name, "state", i)) for i, state in enumerate(recognizer.atn.states) if state is not None)
+    shared.extend((action, ("lexer", "action", i)) for i, action in enumerate(PSLexer.atn.lexerActions or ()))
+    return shared
+
+
+class _SnapshotPickler(pickle.Pickler):
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.shared = {}
+        for obj, pid in _shared_objects():
+            self.shared.setdefault(id(obj), pid)
+
+    def persistent_id(self, obj):
+        return self.shared.get(id(obj))
+
+    def reducer_override(self, obj):
+        # The hash of the executor is computed from strings, which are hashed differently in every process
+        if isinstance(obj, LexerActionExecutor):
+            return LexerActionExecutor, (obj.lexerActions,)
+        return NotImplemented
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file):
+        super().__init__(file)
+        self.shared = {pid: obj for obj, pid in _shared_objects()}
+
+    def persistent_load(self, pid):
+        return self.shared[pid]
+
+
+@contextmanager
+def _recursion_limit(limit: int):
+    # Prediction contexts are pickled recursively along their parents
+    old = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old, limit))
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(old)
+
+
+def save_dfa_snapshot(path: str | os.PathLike):
+    """
+    Save the prediction DFA of the lexer and parser (and the parser's shared context cache) to a file,
+    usually after `warmup()`. The file is written atomically, so workers can load it while it's being replaced.
+    """
+    snapshot = {
+        "header": _snapshot_header(),
+        "parser": [_flatten_dfa(dfa) for dfa in PSParser.decisionsToDFA],
+        "lexer": [_flatten_dfa(dfa) for dfa in PSLexer.decisionsToDFA],
+        "contexts": list(PSParser.sharedContextCache.cache),
+    }
+    tmp_path = f"{os.fspath(path)}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f, _recursion_limit(10_000):
+            _SnapshotPickler(f).dump(snapshot)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_dfa_snapshot(path: str | os.PathLike):
+    """
+    Replace the prediction DFA of the lexer and parser with the one saved by `save_dfa_snapshot`.
+
+    The snapshot must come from the same grammar and ANTLR runtime version. It's a pickle, so only load files
+    you created yourself. Load it before parsing in other threads.
+    """
+    with open(path, "rb") as f, _recursion_limit(10_000):
+        snapshot = _SnapshotUnpickler(f).load()
+    if not isinstance(snapshot, dict) or snapshot.get("header") != _snapshot_header():
+        raise Exception(f"DFA snapshot {path} was created for a different grammar or ANTLR version")
+
+    parser_dfas = [_restore_dfa(PSParser.atn, flat) for flat in snapshot["parser"]]
+    lexer_dfas = [_restore_dfa(PSLexer.atn, flat) for flat in snapshot["lexer"]]
+    # Replace the contents in place, existing parsers and lexers share these objects
+    PSParser.decisionsToDFA[:] = parser_dfas
+    PSLexer.decisionsToDFA[:] = lexer_dfas
+    context_cache = PSParser.sharedContextCache.cache
+    context_cache.clear()
+    context_cache.update((context, context) for context in snapshot["contexts"])
+
+
+def _load_snapshot_from_env():
+    path = os.environ.get(SNAPSHOT_ENV_VAR)
+    if not path:
+        return
+    try:
+        load_dfa_snapshot(path)
+    except Exception as e:
+        # A missing or stale snapshot only makes the first parses slower
+        logger.warning(f"Could not load the DFA snapshot from {SNAPSHOT_ENV_VAR}={path}: {e}")
+
+
+_load_snapshot_from_env()
@@ -0,0 +1,43 @@
+class InputLimitError(Exception):
+    """
+    Raised when an input exceeds one of the limits of `ConversionConfig` (max_input_length, max_tokens,
+    max_nesting_depth, max_number_digits or max_matrix_dimension). The input is rejected while it's being
+    lexed, before the parser or sympy do any work on it.
+
+    Attributes:
+        limit: Name of the exceeded `ConversionConfig` field
+        value: Size of the input which exceeded it, counted up to the point where the input was rejected
+        max_value: Value of the limit
+    """
+    def __init__(self, limit: str, value: int, max_value: int):
+        super().__init__(f"Input exceeds {limit}={max_value} (got {value})")
+        self.limit = limit
+        self.value = value
+        self.max_value = max_value
+
+    def __reduce__(self):
+        # Exception pickles only the message by default, which doesn't match __init__
+        return type(self), (self.limit, self.value, self.max_value)
+
+
+class ConversionTimeoutError(TimeoutError):
+    """
+    Raised when a conversion runs past its `timeout` (see `Deadline`). Unlike other failures, it's never
+    stored in a `ConversionCache`, the same input may convert in time on the next call.
+    """
+
+
+class ResourceLimitError(Exception):
+    """
+    Returned or raised by `IsolatedConverter` when a conversion exceeded a resource limit of its worker process.
+
+    Attributes:
+        resource: "memory" (the address space limit), "cpu" (the CPU time limit) or "crash" (the worker died for
+            another reason, e.g. a signal)
+    """
+    def __init__(self, resource: str, message: str):
+        super().__init__(message)
+        self.resource = resource
+
+    def __reduce__(self):
+        return type(self), (self.resource, str(self))
@@ -0,0 +1,168 @@
+from typing import Any, Callable
+
+import sympy
+import sympy.functions.elementary.trigonometric as sympy_trig
+import sympy.functions.elementary.hyperbolic as sympy_hyperbolic
+import sympy.functions.elementary.miscellaneous as sympy_misc
+import sympy.functions.elementary.integers as sympy_integers
+from sympy.matrices import GramSchmidt
+
+# Functions are keyed on the latex command including its backslash (\sin) or on the name inside
+# \operatorname{...} (rank). Handlers are called with the converted arguments.
+
+
+def _unevaluated(f):
+    return lambda *args: f(*args, evaluate=False)
+
+
+def gcd_lcm(f: str, args):
+    """
+    Return the result of gcd() or lcm(), as UnevaluatedExpr
+
+    f: str - name of function ("gcd" or "lcm")
+    args: List[Expr] - list of function arguments
+    """
+
+    args = tuple(map(sympy.nsimplify, args))
+
+    # gcd() and lcm() don't support evaluate=False
+    return sympy.UnevaluatedExpr(getattr(sympy, f)(args))
+
+
+def _orthogonalize(*args):
+    if len(args) == 1:
+        arg = args[0]
+        return GramSchmidt([arg.col(i) for i in range(arg.cols)], True)
+    return GramSchmidt(args, True)
+
+
+SINGLE_ARG_FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "\\log": lambda arg: sympy.log(arg, 10, evaluate=False),
+    "\\ln": lambda arg: sympy.log(arg, sympy.E, evaluate=False),
+    "\\exp": _unevaluated(sympy.exp),
+    "\\exponentialE": _unevaluated(sympy.exp),
+    "\\floor": _unevaluated(sympy_integers.floor),
+    "\\ceil": _unevaluated(sympy_integers.ceiling),
+    "\\det": lambda arg: arg.det(),
+    "\\Gamma": sympy.gamma,
+    "\\gamma": sympy.gamma,
+    "floor": _unevaluated(sympy_integers.floor),
+    "ceil": _unevaluated(sympy_integers.ceiling),
+    "eye": sympy.eye,
+    "rank": lambda arg: sympy.Integer(arg.rank()),
+    "trace": lambda arg: arg.trace(),
+    "tr": lambda arg: arg.trace(),
+    "rref": lambda arg: arg.rref()[0],
+    "nullspace": lambda arg: arg.nullspace(),
+    "norm": lambda arg: arg.norm(),
+    "cols": lambda arg: [arg.col(i) for i in range(arg.cols)],
+    "rows": lambda arg: [arg.row(i) for i in range(arg.rows)],
+    "eig": lambda arg: arg.diagonalize(),
+    "eigen": lambda arg: arg.diagonalize(),
+    "diagonalize": lambda arg: arg.diagonalize(),
+    "eigenvals": lambda arg: arg.eigenvals(),
+    "eigenvalues": lambda arg: arg.eigenvals(),
+    "eigenvects": lambda arg: arg.eigenvects(),
+    "eigenvectors": lambda arg: arg.eigenvects(),
+    "svd": lambda arg: arg.singular_value_decomposition(),
+    "SVD": lambda arg: arg.singular_value_decomposition(),
+}
+
+# f^{-1} is the inverse function instead of a power
+INVERSE_FUNCTIONS: dict[str, str] = {}
+
+for _name in ["sin", "cos", "tan", "csc", "sec", "cot"]:
+    SINGLE_ARG_FUNCTIONS["\\" + _name] = _unevaluated(getattr(sympy_trig, _name))
+    SINGLE_ARG_FUNCTIONS["\\arc" + _name] = _unevaluated(getattr(sympy_trig, "a" + _name))
+    INVERSE_FUNCTIONS["\\" + _name] = "\\arc" + _name
+
+for _name in ["sinh", "cosh", "tanh"]:
+    SINGLE_ARG_FUNCTIONS["\\" + _name] = _unevaluated(getattr(sympy_hyperbolic, _name))
+    # \arsinh, \arcsinh, \operatorname{arsinh} and \operatorname{arcsinh}
+    for _prefix in ["\\ar", "\\arc", "ar", "arc"]:
+        SINGLE_ARG_FUNCTIONS[_prefix + _name] = _unevaluated(getattr(sympy_hyperbolic, "a" + _name))
+    INVERSE_FUNCTIONS["\\" + _name] = "\\arc" + _name
+
+MULTI_ARG_FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "\\gcd": lambda *args: gcd_lcm("gcd", args),
+    "\\lcm": lambda *args: gcd_lcm("lcm", args),
+    "\\max": _unevaluated(sympy_misc.Max),
+    "\\min": _unevaluated(sympy_misc.Min),
+    "gcd": lambda *args: gcd_lcm("gcd", args),
+    "lcm": lambda *args: gcd_lcm("lcm", args),
+    "zeros": sympy.zeros,
+    "ones": sympy.ones,
+    "diag": sympy.diag,
+    "hstack": sympy.Matrix.hstack,
+    "vstack": sympy.Matrix.vstack,
+    "orth": _orthogonalize,
+    "ortho": _orthogonalize,
+    "orthogonal": _orthogonalize,
+    "orthogonalize": _orthogonalize,
+}
+
+
+def _undefined(name: str):
+    return lambda *args: sympy.Function(name)(*args, evaluate=False)
+
+
+# Used instead of the functions above with ConversionConfig(construction_only=True). These ones evaluate
+# their result, and may take time which isn't bounded by the size of the input (\Gamma(10^{6}), eye(10^{9}),
+# eigenvalues, ...). They become unevaluated nodes or undefined functions of the same name.
+_CONSTRUCTION_ONLY_SINGLE_ARG_FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "\\Gamma": _unevaluated(sympy.gamma),
+    "\\gamma": _unevaluated(sympy.gamma),
+    "\\det": sympy.Determinant,
+    "eye": sympy.Identity,
+    "trace": sympy.Trace,
+    "tr": sympy.Trace,
+}
+for _name in ["rank", "rref", "nullspace", "norm", "eig", "eigen", "diagonalize", "eigenvals", "eigenvalues",
+              "eigenvects", "eigenvectors", "svd", "SVD"]:
+    _CONSTRUCTION_ONLY_SINGLE_ARG_FUNCTIONS[_name] = _undefined(_name)
+
+_CONSTRUCTION_ONLY_MULTI_ARG_FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "\\gcd": _undefined("gcd"),
+    "\\lcm": _undefined("lcm"),
+    "gcd": _undefined("gcd"),
+    "lcm": _undefined("lcm"),
+    "zeros": sympy.ZeroMatrix,
+    "ones": sympy.OneMatrix,
+}
+for _name in ["orth", "ortho", "orthogonal", "orthogonalize"]:
+    _CONSTRUCTION_ONLY_MULTI_ARG_FUNCTIONS[_name] = _undefined(_name)
+
+CONSTRUCTION_ONLY_SINGLE_ARG_FUNCTIONS = {**SINGLE_ARG_FUNCTIONS, **_CONSTRUCTION_ONLY_SINGLE_ARG_FUNCTIONS}
+CONSTRUCTION_ONLY_MULTI_ARG_FUNCTIONS = {**MULTI_ARG_FUNCTIONS, **_CONSTRUCTION_ONLY_MULTI_ARG_FUNCTIONS}
+
+_user_functions: dict[str, Callable[..., Any]] = {}
+
+
+def register_function(name: str, handler: Callable[..., Any]):
+    """
+    Convert the function `name` with `handler(*args)`, where args are the converted arguments.
+
+    `name` is either a latex command with its backslash (`"\\sin"`), a name inside `\\operatorname{...}`
+    (`"rank"`) or the name of a function applied with parentheses (`"f"` for `f(x, y)`). Registered
+    handlers take precedence over the built-in ones, for any number of arguments. Results already
+    stored in a `ConversionCache` are not updated.
+    """
+    _user_functions[name] = handler
+
+
+def unregister_function(name: str):
+    """
+    Remove a handler added with `register_function`, going back to the built-in conversion.
+    """
+    _user_functions.pop(name, None)
+
+
+def get_user_function(name: str) -> Callable[..., Any] | None:
+    return _user_functions.get(name)
+
+
+def call_function(name: str, functions: dict[str, Callable[..., Any]], args: list):
+    handler = _user_functions.get(name) or functions.get(name)
+    if handler is None:
+        return sympy.Function(name.lstrip("\\"))(*args, evaluate=False)
+    return handler(*args)
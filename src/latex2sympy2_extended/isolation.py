@@ -0,0 +1,247 @@
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable
+
+from latex2sympy2_extended.batch import _convert_one, dumps_result, loads_result
+from latex2sympy2_extended.errors import ResourceLimitError
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig
+from latex2sympy2_extended.math_normalization import NormalizationConfig
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+def _address_space_size() -> int:
+    """Current size of the address space of the process, 0 if it's not known"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _set_soft_limit(limit: int, soft: int):
+    _, hard = resource.getrlimit(limit)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(limit, (soft, hard))
+
+
+def _worker_main(conn, kwargs: dict[str, Any], max_memory: int | None, max_cpu_seconds: float | None):
+    """
+    Converts the strings received on conn until it's closed. The worker exits after a conversion runs out of
+    memory, since a failed allocation can leave the process in a bad state, and is killed by SIGXCPU when it
+    runs over its CPU time.
+    """
+    # Killed workers shouldn't leave core dumps behind
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if max_memory is not None:
+        # The forked worker already maps the whole parent process
+        _set_soft_limit(resource.RLIMIT_AS, _address_space_size() + max_memory)
+
+    while True:
+        try:
+            latex_str = conn.recv()
+        except (EOFError, OSError):
+            return
+        if max_cpu_seconds is not None:
+            # RLIMIT_CPU counts the CPU time of the whole process, so every conversion moves it forward
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            _set_soft_limit(resource.RLIMIT_CPU, math.ceil(usage.ru_utime + usage.ru_stime + max_cpu_seconds))
+
+        result = _convert_one(latex_str, kwargs)
+        if isinstance(result, MemoryError):
+            conn.send_bytes(dumps_result(ResourceLimitError("memory", "Conversion exceeded the memory limit")))
+            return
+        conn.send_bytes(dumps_result(result))
+
+
+class _WorkerDied(Exception):
+    pass
+
+
+class _Worker:
+    def __init__(self, context, kwargs: dict[str, Any], max_memory: int | None, max_cpu_seconds: float | None):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, kwargs, max_memory, max_cpu_seconds), daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def convert(self, latex_str: str) -> Any:
+        try:
+            self.conn.send(latex_str)
+            return loads_result(self.conn.recv_bytes())
+        except (EOFError, OSError) as e:
+            raise _WorkerDied() from e
+
+    def stop(self):
+        self.conn.close()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+def _death_error(exitcode: int | None) -> ResourceLimitError:
+    if exitcode == -signal.SIGXCPU:
+        return ResourceLimitError("cpu", "Conversion exceeded the CPU time limit")
+    # Allocations which fail outside of Python (or the OOM killer) end the process without a MemoryError
+    return ResourceLimitError("crash", f"Conversion worker died (exit code {exitcode})")
+
+
+class IsolatedConverter:
+    """
+    Converts latex strings in a pool of forked worker processes with memory (`RLIMIT_AS`) and CPU time
+    (`RLIMIT_CPU`) limits, for inputs which can blow up inside sympy where a `timeout` can't stop them.
+
+    The workers are started once and stay warm: they are forked from the current process, so they share its
+    imported modules and parser DFA (call `warmup()` before creating the converter). A worker which hits a limit
+    or crashes is replaced by a new one, forked from a supervisor thread, and the conversion fails with
+    `ResourceLimitError`. Only available on POSIX systems, the memory limit is only enforced on Linux.
+
+    Usage:
+        with IsolatedConverter(workers=4, max_memory=512 * 2**20, max_cpu_seconds=5) as converter:
+            converter.convert(r"\\frac{1}{2}")
+            converter.convert_many([r"x^{2}", r"\\frac{"])
+    """
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_memory: int | None = None,
+        max_cpu_seconds: float | None = None,
+        variable_values: dict | None = None,
+        is_real=None,
+        convert_degrees: bool = False,
+        normalization_config: NormalizationConfig | None = NormalizationConfig(),
+        conversion_config: ConversionConfig = ConversionConfig(),
+    ):
+        """
+        Args:
+            workers: Number of worker processes, defaults to the number of CPUs
+            max_memory: Bytes each worker may allocate on top of what it shares with the current process, None
+                for no limit
+            max_cpu_seconds: CPU time of a single conversion, rounded up to whole seconds, None for no limit
+            variable_values, is_real, convert_degrees, normalization_config, conversion_config:
+                Same as in `latex2sympy`, shared by all conversions
+        """
+        if resource is None or "fork" not in multiprocessing.get_all_start_methods():
+            raise NotImplementedError("IsolatedConverter needs the resource module and fork (POSIX systems)")
+        self._context = multiprocessing.get_context("fork")
+        self._kwargs = dict(
+            variable_values=variable_values,
+            is_real=is_real,
+            convert_degrees=convert_degrees,
+            normalization_config=normalization_config,
+            conversion_config=conversion_config,
+        )
+        self._max_memory = max_memory
+        self._max_cpu_seconds = max_cpu_seconds
+        self.workers = workers or os.cpu_count() or 1
+        # Number of workers replaced after hitting a limit or crashing
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._all = [self._start_worker() for _ in range(self.workers)]
+        self._idle: queue.SimpleQueue[_Worker] = queue.SimpleQueue()
+        for worker in self._all:
+            self._idle.put(worker)
+        # Workers which died, replaced by the supervisor thread (None stops it)
+        self._dead: queue.SimpleQueue[_Worker | None] = queue.SimpleQueue()
+        self._supervisor = threading.Thread(target=self._supervise, name="IsolatedConverter-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def _start_worker(self) -> _Worker:
+        return _Worker(self._context, self._kwargs, self._max_memory, self._max_cpu_seconds)
+
+    def _supervise(self):
+        """
+        Replace the dead workers. New workers are only forked from this thread, never from the threads of
+        `convert_many` while they wait on other workers.
+        """
+        while (worker := self._dead.get()) is not None:
+            worker.stop()
+            with self._lock:
+                # The workers of a closed converter are not replaced, close() couldn't stop the new one
+                if self._closed:
+                    continue
+                new_worker = self._start_worker()
+                self._all[self._all.index(worker)] = new_worker
+                self.restarts += 1
+            self._idle.put(new_worker)
+
+    def _idle_worker(self) -> _Worker:
+        # Wait with a timeout, so that calls which wait for a worker (all of them busy or being replaced) notice
+        # when the converter is closed
+        while not self._closed:
+            try:
+                return self._idle.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise ValueError("IsolatedConverter is closed")
+
+    def _convert_or_error(self, latex_str: str) -> Any:
+        worker = self._idle_worker()
+        try:
+            result = worker.convert(latex_str)
+        except _WorkerDied:
+            worker.process.join()
+            result = _death_error(worker.process.exitcode)
+            self._dead.put(worker)
+            return result
+        except BaseException:
+            # Interrupted in the middle of a request, the pipe can't be used anymore
+            self._dead.put(worker)
+            raise
+        if isinstance(result, ResourceLimitError):
+            # The worker exits after running out of memory
+            self._dead.put(worker)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def convert(self, latex_str: str) -> Any:
+        """
+        Convert a single latex string in one of the workers, raising the conversion error (or
+        `ResourceLimitError`) if it fails. Can be called from several threads at once.
+        """
+        result = self._convert_or_error(latex_str)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def convert_many(self, strings: Iterable[str]) -> list[Any]:
+        """
+        Convert many strings using all the workers. Like `latex2sympy_batch`, duplicates are converted once and
+        the result list has the input order, with the exception (or `ResourceLimitError`) in place of failed items.
+        """
+        strings = list(strings)
+        unique = list(dict.fromkeys(strings))
+        with ThreadPoolExecutor(self.workers) as executor:
+            results = dict(zip(unique, executor.map(self._convert_or_error, unique)))
+        return [results[s] for s in strings]
+
+    def close(self):
+        """Stop all the workers, conversions which are still running fail with `ResourceLimitError`"""
+        with self._lock:
+            self._closed = True
+            workers = list(self._all)
+        self._dead.put(None)
+        self._supervisor.join()
+        for worker in workers:
+            worker.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,21 +1,32 @@
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from typing import Literal
 import sympy
 import re
+import threading
+from collections import deque
 from sympy import Basic, Matrix, MatrixBase, Number, Pow, Rational, matrix_symbols, simplify, factor, expand, apart, expand_trig, UnevaluatedExpr
-from antlr4 import InputStream, CommonTokenStream
+from antlr4 import InputStream, CommonTokenStream, Token
 from antlr4.error.ErrorListener import ErrorListener
-from latex2sympy2_extended.symbols import get_symbol, GREEK_LETTER_MAP
+from antlr4.tree.Tree import ParseTreeListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy
+from antlr4.atn.PredictionMode import PredictionMode
+from latex2sympy2_extended.symbols import get_symbol, make_symbol, GREEK_LETTER_MAP
 from latex2sympy2_extended.math_normalization import normalize_latex, NormalizationConfig
 from latex2sympy2_extended.antlr_parser import PSParser, PSLexer
-import sympy.functions.elementary.trigonometric as sympy_trig
-import sympy.functions.elementary.hyperbolic as sympy_hyperbolic
-import sympy.functions.elementary.miscellaneous as sympy_misc
 import sympy.functions.elementary.integers as sympy_integers
 from sympy.core.relational import Relational
 from sympy.printing.str import StrPrinter
-from sympy.matrices import GramSchmidt
 from latex2sympy2_extended.sets import FiniteSet
 from latex2sympy2_extended.logic import And
+from latex2sympy2_extended.cache import ConversionCache
+from latex2sympy2_extended.errors import InputLimitError, ConversionTimeoutError
+from latex2sympy2_extended.deadline import Deadline
+from latex2sympy2_extended.functions import (
+    SINGLE_ARG_FUNCTIONS, MULTI_ARG_FUNCTIONS, CONSTRUCTION_ONLY_SINGLE_ARG_FUNCTIONS, CONSTRUCTION_ONLY_MULTI_ARG_FUNCTIONS,
+    INVERSE_FUNCTIONS, call_function, get_user_function,
+)
+from latex2sympy2_extended import dfa_cache
 from sympy.parsing.sympy_parser import parse_expr
 
 @dataclass(frozen=True)
@@ -24,18 +35,79 @@ class ConversionConfig:
     interpret_simple_eq_as_assignment: bool = False
     interpret_contains_as_eq: bool = True
     lowercase_symbols: bool = True
+    prediction_mode: Literal["ll", "sll"] = "ll"
+    preclassify_relations: bool = True
+    numeric_fast_path: bool = True
+    construction_only: bool = False
+    max_input_length: int | None = None
+    max_tokens: int | None = None
+    max_nesting_depth: int | None = None
+    max_number_digits: int | None = None
+    max_matrix_dimension: int | None = None
     """
     Args:
         interpret_as_mixed_fractions (bool): Whether to interpert 2 \frac{1}{2} as 2/2 or 2 + 1/2
         interpret_simple_eq_as_assignment (bool): Whether to interpret simple equations as assignments k=1 -> 1
         interpret_contains_as_eq (bool): Whether to interpret contains as equality x \\in {1,2,3} -> x = {1,2,3}
         lowercase_symbols (bool): Whether to lowercase all symbols
+        prediction_mode (str): "ll" parses with ANTLR's full LL prediction. "sll" first tries the faster SLL prediction
+            and parses again with LL only if SLL fails, see `parser_stats` for how often that happens
+        preclassify_relations (bool): Whether to parse inputs which can only be a single relation (no top-level commas,
+            set operators or sets) with the relation_math rule instead of the general math rule. Inputs with
+            superscripts or function names are always parsed with the general rule, the pre-classification doesn't
+            speed them up
+        numeric_fast_path (bool): Whether to convert inputs which are just a number, a percentage or a fraction of integers
+            without running the parser
+        construction_only (bool): Whether to only build the expression without evaluating anything, so that the conversion
+            time is bounded by the size of the input. Binomials, gamma functions, exponentials, gcd/lcm, determinants and
+            traces stay unevaluated, evaluations at a point (f|_{x=a}) become Subs, identity/zero/one matrices become
+            matrix expressions and the other matrix operations (rank, rref, eigenvals, ...) become undefined functions
+        max_input_length (int | None): Maximum number of characters of the input, checked before and after normalization
+        max_tokens (int | None): Maximum number of tokens of the input
+        max_nesting_depth (int | None): Maximum depth of nested brackets, braces, parentheses, ...
+        max_number_digits (int | None): Maximum number of digits of a single number
+        max_matrix_dimension (int | None): Maximum number of rows and of columns of a matrix
+            Inputs over any of the limits raise `InputLimitError` while they are lexed, before they are parsed or
+            converted. None means no limit.
     """
 
 
+@dataclass
+class ParserStats:
+    """
+    Counters of the parsing strategies used, shared by all conversions in the process.
+    """
+    sll_parses: int = 0
+    ll_fallbacks: int = 0
+    # Inputs parsed with the relation_math rule, and those of them which had to be parsed again with math
+    preclassified_parses: int = 0
+    preclassify_fallbacks: int = 0
+    # Inputs converted by the numeric fast path, without the parser
+    numeric_fast_paths: int = 0
+
+    def reset(self):
+        for field in fields(self):
+            setattr(self, field.name, 0)
+
+
+parser_stats = ParserStats()
+
+
 def flatten_list(l):
     return [item for sublist in l for item in sublist]
 
+integer_regex = re.compile(r'-?(0|[1-9][0-9]*)')
+decimal_regex = re.compile(r'-?[0-9]*\.[0-9]+')
+
+def number_from_text(text: str):
+    """Same as sympy.Number(text), but plain integers and decimals don't go through the sympy expression parser"""
+    if integer_regex.fullmatch(text):
+        return sympy.Integer(int(text))
+    if decimal_regex.fullmatch(text):
+        # The expression parser creates Float from the string as well, which keeps its precision
+        return sympy.Float(text)
+    return Number(text)
+
 def convert_number(number: str):
     # If it's 0,111 it's a float
     if "," in number and number.startswith("0"):
@@ -44,7 +116,7 @@ def convert_number(number: str):
     integer = number.translate(str.maketrans("", "", ", ")).lstrip("0")
     if len(integer) == 0:
         integer = "0"
-    return Number(integer)
+    return number_from_text(integer)
 
 def is_expr_of_only_symbols(expr):
     if hasattr(expr, 'is_Symbol') and expr.is_Symbol:
@@ -64,53 +136,531 @@ def is_expr_of_only_symbols(expr):
 
 comma_number_regex = re.compile(r'^\s*-?\d{1,3}(,\d{3})+(\.\d+)?\s*$')
 
+# Inputs which are just a number, matched before the parser. Only the whitespace skipped by the lexer is allowed.
+_WS = r"[ \t\r\n]*"
+plain_number_regex = re.compile(
+    rf"{_WS}(?P<sign>-{_WS})?(?P<number>[0-9]+|[0-9]*\.[0-9]+)(?P<percent>[ \t\r\n]?(?:\\%|%))?{_WS}"
+)
+plain_frac_regex = re.compile(
+    rf"{_WS}(?P<sign>-{_WS})?\\[dtc]?frac{_WS}"
+    rf"\{{{_WS}(?P<upper_sign>-{_WS})?(?P<upper>[0-9]+){_WS}\}}{_WS}"
+    rf"\{{{_WS}(?P<lower_sign>-{_WS})?(?P<lower>[0-9]+){_WS}\}}{_WS}"
+)
+plain_comma_number_regex = re.compile(rf"{_WS}-?[0-9]{{1,3}}(,[0-9]{{3}})+(\.[0-9]+)?{_WS}")
+
+
+def check_limit(limit: str, value: int, max_value: int | None):
+    if max_value is not None and value > max_value:
+        raise InputLimitError(limit, value, max_value)
+
+
+def count_digits(text: str) -> int:
+    return sum(c.isdigit() for c in text)
+
+
+_TOKEN_LIMITS = ("max_tokens", "max_nesting_depth", "max_number_digits", "max_matrix_dimension")
+
+
+class _LimitedLexer(PSLexer):
+    """
+    PSLexer which checks the token limits of a ConversionConfig on every token, so that inputs over the
+    limits are rejected before the parser (or sympy) does anything with them.
+    """
+    def __init__(self, input_stream):
+        super().__init__(input_stream)
+        self.config = None
+        self.reset_counts()
+
+    def set_config(self, config: ConversionConfig):
+        # Tokens are only checked if one of the limits is set
+        self.config = config if any(getattr(config, name) is not None for name in _TOKEN_LIMITS) else None
+
+    def reset(self):
+        # Called whenever the lexer gets a new input
+        super().reset()
+        self.reset_counts()
+
+    def reset_counts(self):
+        self.token_count = 0
+        self.depth = 0
+        # [rows, columns of the current row, whether the current row has started] of the open matrices
+        self.matrices = []
+
+    def nextToken(self):
+        token = super().nextToken()
+        if self.config is not None and token.type != Token.EOF:
+            self.check_token(token)
+        return token
+
+    def check_token(self, token):
+        config = self.config
+        token_type = token.type
+        self.token_count += 1
+        check_limit("max_tokens", self.token_count, config.max_tokens)
+
+        if token_type in _OPENING_TOKENS:
+            self.depth += 1
+            check_limit("max_nesting_depth", self.depth, config.max_nesting_depth)
+        elif token_type in _CLOSING_TOKENS:
+            self.depth = max(self.depth - 1, 0)
+        elif token_type in _NUMBER_TOKENS and config.max_number_digits is not None:
+            if len(token.text) > config.max_number_digits:
+                check_limit("max_number_digits", count_digits(token.text), config.max_number_digits)
+
+        if self.matrices:
+            self.count_matrix_cell(token_type)
+        if token_type in _MATRIX_START_TOKENS:
+            self.matrices.append([0, 0, False])
+
+    def count_matrix_cell(self, token_type):
+        matrix = self.matrices[-1]
+        if token_type in _MATRIX_END_TOKENS:
+            self.matrices.pop()
+            return
+        if token_type == PSLexer.MATRIX_DEL_ROW:
+            matrix[2] = False
+            return
+        if not matrix[2]:
+            matrix[0] += 1
+            matrix[1] = 1
+            matrix[2] = True
+            check_limit("max_matrix_dimension", matrix[0], self.config.max_matrix_dimension)
+        if token_type == PSLexer.MATRIX_DEL_COL:
+            matrix[1] += 1
+            check_limit("max_matrix_dimension", matrix[1], self.config.max_matrix_dimension)
+
+
+class _DeadlineListener(ParseTreeListener):
+    """Parse listener which checks the deadline whenever the parser enters a rule"""
+    def __init__(self, deadline: Deadline):
+        self.deadline = deadline
+
+    def enterEveryRule(self, ctx):
+        self.deadline.check()
+
+
+class _PooledParser:
+    """
+    Lexer/parser pair which can be reused for different inputs.
+    """
+    def __init__(self, error_listener: ErrorListener):
+        self.error_listener = error_listener
+        self.lexer = _LimitedLexer(InputStream(""))
+        self.lexer.removeErrorListeners()
+        self.lexer.addErrorListener(error_listener)
+        self.tokens = CommonTokenStream(self.lexer)
+        self.parser = PSParser(self.tokens)
+        self.parser.removeErrorListeners()
+        self.parser.addErrorListener(error_listener)
+
+    def reset(self, latex_str: str, config: ConversionConfig):
+        self.error_listener.src = latex_str
+        self.lexer.set_config(config)
+        reset_parser(self.parser, latex_str)
+        return self.parser
+
+    def release(self) -> bool:
+        """Forget the last input, returns False if the pair can't be reused"""
+        # Don't keep the tokens of the last input alive
+        self.tokens.setTokenSource(self.lexer)
+        self.parser.removeParseListeners()
+        # A reset which raised leaves the parser without its token stream
+        return self.parser.getTokenStream() is self.tokens
+
+
+def reset_parser(parser: PSParser, latex_str: str, deadline_listener: _DeadlineListener | None = None):
+    """Reset the parser and its lexer to parse latex_str from the start"""
+    tokens = parser.getTokenStream()
+    lexer = tokens.tokenSource
+    lexer.inputStream = InputStream(latex_str)
+    tokens.setTokenSource(lexer)
+    # Parser.reset() removes its (None) tracer from the parse listeners, which fails when there are
+    # other listeners, so the deadline listener is added again after the reset
+    if deadline_listener is not None:
+        parser.removeParseListener(deadline_listener)
+    parser.setTokenStream(tokens)
+    if deadline_listener is not None:
+        parser.addParseListener(deadline_listener)
+
+
+@contextmanager
+def bail_on_error(parser: PSParser, prediction_mode=PredictionMode.LL):
+    """
+    Make the parser bail out on the first syntax error without reporting it, optionally with a different
+    prediction mode.
+    """
+    error_handler = parser._errHandler
+    listeners = list(parser._listeners)
+    parser._interp.predictionMode = prediction_mode
+    parser._errHandler = BailErrorStrategy()
+    parser.removeErrorListeners()
+    try:
+        yield parser
+    finally:
+        parser._interp.predictionMode = PredictionMode.LL
+        parser._errHandler = error_handler
+        for listener in listeners:
+            parser.addErrorListener(listener)
+
+
+def _token_types(*names):
+    return frozenset(getattr(PSParser, name) for name in names)
+
+
+# Tokens which can only be matched by the set rules of `math`
+_SET_TOKENS = _token_types(
+    "SEMICOLON", "NOTIN", "SUBSET", "SUPSET", "UNION", "INTERSECTION", "SET_MINUS", "PLUS_MINUS",
+    "SET_NATURALS", "SET_INTEGERS", "SET_RATIONALS", "SET_REALS", "SET_COMPLEX", "SET_PRIMES", "SET_EMPTY",
+)
+# `x = ...` and `x \in ...` can also be set relations, but only if the left side is an atom_expr_list
+_SET_RELATION_TOKENS = _token_types("IN", "ASSIGNMENT")
+_ATOM_EXPR_START_TOKENS = _token_types("LETTER_NO_E", "GREEK_CMD", "OTHER_SYMBOL_CMD", "ACCENT")
+_OPENING_TOKENS = _token_types(*[name for name in PSParser.symbolicNames if name.startswith("L_")])
+_CLOSING_TOKENS = _token_types(*[name for name in PSParser.symbolicNames if name.startswith("R_")])
+# Every set atom (interval, tuple, finite set) starts with one of these
+_SET_START_TOKENS = _OPENING_TOKENS | _token_types("BOXED_CMD")
+_NUMBER_TOKENS = _token_types("NUMBER", "E_NOTATION", "PERCENT_NUMBER")
+# Inputs with superscripts or function names spend their parse time predicting inside `expr`, where relation_math
+# doesn't help (sandbox/bench_preclassify.py measured down to 0.85x), so they are parsed with `math`
+_NOT_PRECLASSIFIED_TOKENS = _token_types(
+    "CARET", "CMD_OPERATORNAME",
+    *[name for name in PSParser.symbolicNames
+      if name.startswith("FUNC_") and name not in ("FUNC_LIM", "FUNC_INT", "FUNC_SUM", "FUNC_PROD", "FUNC_SQRT")],
+)
+_MATRIX_START_TOKENS = _token_types("CMD_MATRIX_START", "CMD_ARRAY_START", "CMD_DET_START")
+_MATRIX_END_TOKENS = _token_types("CMD_MATRIX_END", "CMD_ARRAY_END", "CMD_DET_END")
+
+
+def is_plain_relation(tokens) -> bool:
+    """
+    Check on the token level whether the input can only be parsed by `math` as a single relation,
+    that is without any top-level commas, set operators or set atoms.
+
+    The check is conservative, it may return False for a plain relation but never True for a set.
+    """
+    if not tokens or tokens[0].type in _SET_START_TOKENS:
+        return False
+    set_tokens = _SET_TOKENS
+    if tokens[0].type in _ATOM_EXPR_START_TOKENS:
+        set_tokens = _SET_TOKENS | _SET_RELATION_TOKENS
+    depth = 0
+    for token in tokens:
+        token_type = token.type
+        if token_type in _OPENING_TOKENS:
+            depth += 1
+        elif token_type in _CLOSING_TOKENS:
+            depth -= 1
+            if depth < 0:
+                return False
+        elif token_type in set_tokens or token_type == PSParser.COMMA and depth == 0:
+            return False
+    return True
+
+
+class _ParserPool(threading.local):
+    def __init__(self):
+        self.free: list[_PooledParser] = []
+
+
+# Lexer/parser pairs are not thread-safe, so each thread has its own pool
+_parser_pool = _ParserPool()
+# Only nested parse calls need more than one pair
+_PARSER_POOL_SIZE = 8
+
+# Attribute which add_flat, mul_flat, mat_add_flat and mat_mul_flat check to flatten their operands
+_FLAT_ATTRS = {sympy.Add: 'is_Add', sympy.Mul: 'is_Mul', sympy.MatAdd: 'is_MatAdd', sympy.MatMul: 'is_MatMul'}
+
+
+class _FlatFold:
+    """
+    Fold with add_flat, mul_flat, mat_add_flat or mat_mul_flat. The args of the flat node are
+    collected in a deque and the node is only built once it's needed, instead of once per operand.
+    """
+    def __init__(self, value):
+        self.value = value
+        self.cls = None
+        self.args = None
+
+    def get(self):
+        if self.cls is not None:
+            self.value = self.cls(*self.args, evaluate=False)
+            self.cls = self.args = None
+        return self.value
+
+    def is_matrix(self):
+        if self.cls is not None:
+            return self.cls is sympy.MatAdd or self.cls is sympy.MatMul
+        return hasattr(self.value, 'is_Matrix') and self.value.is_Matrix
+
+    def is_rational(self):
+        return self.cls is None and hasattr(self.value, 'is_Rational') and self.value.is_Rational
+
+    def start(self, cls):
+        if self.cls is not cls:
+            value = self.get()
+            self.args = deque(value.args) if getattr(value, _FLAT_ATTRS[cls], False) else deque([value])
+            self.cls = cls
+
+    def append(self, cls, rh):
+        # Same as flat(value, rh)
+        self.start(cls)
+        if getattr(rh, _FLAT_ATTRS[cls], False):
+            self.args.extend(rh.args)
+        else:
+            self.args.append(rh)
+
+    def prepend(self, cls, lh):
+        # Same as flat(lh, value)
+        self.start(cls)
+        if getattr(lh, _FLAT_ATTRS[cls], False):
+            self.args.extendleft(reversed(lh.args))
+        else:
+            self.args.appendleft(lh)
+
+
+class _AndChain:
+    """
+    Left fold of chained relations (a < b = c ...). Every relation is added as
+    And(*lh._unsorted_args, relation) like before, but the relations are collected in a list and the
+    And is only built once it's needed. And keeps duplicates in _unsorted_args, but evaluates contradictions
+    and collapses to the relation itself when there is a single distinct one, so the canonical forms seen so far
+    are tracked and only in those cases the intermediate result is built.
+    """
+    def __init__(self, value):
+        self.value = value
+        self.args = None
+        self.seen = set()
+        self.negated = set()
+
+    def get(self):
+        if self.args is not None:
+            self.value = And(*self.args)
+            self.args = None
+        return self.value
+
+    def track(self, rel):
+        # Whether And keeps rel next to the relations seen so far, either as it is or as a duplicate
+        try:
+            if rel.binary_symbols:
+                return False
+            canonical = rel.canonical
+            negated = canonical.negated.canonical
+        except Exception:
+            return False
+        if negated in self.seen or canonical in self.negated:
+            return False
+        self.seen.add(canonical)
+        self.negated.add(negated)
+        return True
+
+    def append(self, cls, rh):
+        if self.args is None:
+            lh = self.value
+            if isinstance(lh, And):
+                args = list(lh._unsorted_args)
+            elif isinstance(lh, Relational):
+                args = [lh]
+            else:
+                self.value = cls(lh, rh, evaluate=False)
+                return
+            self.seen = set()
+            self.negated = set()
+            if not all([self.track(arg) for arg in args]):
+                self.value = And(*args, cls(args[-1].rhs, rh, evaluate=False))
+                return
+            self.args = args
+
+        rel = cls(self.args[-1].rhs, rh, evaluate=False)
+        if not self.track(rel) or len(self.seen) == 1:
+            self.value = And(*self.args, rel)
+            self.args = None
+            return
+        self.args.append(rel)
+
+
 class _Latex2Sympy:
-    def __init__(self, variable_values: dict | None = None, is_real=None, convert_degrees: bool = False, config: ConversionConfig = ConversionConfig()):
+    def __init__(self, variable_values: dict | None = None, is_real=None, convert_degrees: bool = False, config: ConversionConfig = ConversionConfig(), deadline: Deadline | None = None):
         # Instance variables
         self.is_real = is_real
         self.variances = {}  # For substituting
         self.var = {var:val if isinstance(val, Basic) or isinstance(val, MatrixBase) else parse_expr(val) for var, val in variable_values.items()} if variable_values else {}
         self.convert_degrees = convert_degrees
         self.config = config
+        self.deadline = deadline
+        # Shared by the parsers of nested parse calls
+        self.deadline_listener = _DeadlineListener(deadline) if deadline is not None else None
+        if config.construction_only:
+            self.single_arg_functions = CONSTRUCTION_ONLY_SINGLE_ARG_FUNCTIONS
+            self.multi_arg_functions = CONSTRUCTION_ONLY_MULTI_ARG_FUNCTIONS
+        else:
+            self.single_arg_functions = SINGLE_ARG_FUNCTIONS
+            self.multi_arg_functions = MULTI_ARG_FUNCTIONS
 
     def create_parser(self, latex_str):
         """Create parser for latex string"""
         stream = InputStream(latex_str)
-        lex = PSLexer(stream)
+        lex = _LimitedLexer(stream)
+        lex.set_config(self.config)
         lex.removeErrorListeners()
         lex.addErrorListener(self.MathErrorListener(latex_str))
         tokens = CommonTokenStream(lex)
         parser = PSParser(tokens)
         parser.removeErrorListeners()
         parser.addErrorListener(self.MathErrorListener(latex_str))
+        if self.deadline_listener is not None:
+            parser.addParseListener(self.deadline_listener)
         return parser
+
+    @contextmanager
+    def pooled_parser(self, latex_str):
+        """
+        Same as create_parser, but reuses a lexer/parser pair from the thread-local pool.
+        The pair is only reset with the new input instead of being constructed again.
+        """
+        free = _parser_pool.free
+        pooled = free.pop() if free else _PooledParser(self.MathErrorListener(latex_str))
+        try:
+            parser = pooled.reset(latex_str, self.config)
+            if self.deadline_listener is not None:
+                parser.addParseListener(self.deadline_listener)
+            yield parser
+        finally:
+            if pooled.release() and len(free) < _PARSER_POOL_SIZE:
+                free.append(pooled)
+            dfa_cache._monitor.after_parse()
     
     def parse(self, latex_str: str):
         """Main entry point to parse latex string"""
-        # setup listener
-        parser = self.create_parser(latex_str)
+        self.check_input_length(latex_str)
+        self.check_deadline()
+        if self.config.numeric_fast_path:
+            number = self.parse_plain_number(latex_str)
+            if number is not None:
+                parser_stats.numeric_fast_paths += 1
+                return number
+
+        # The parser goes back to the pool only after the conversion, so that nested
+        # parse calls take a different one
+        with self.pooled_parser(latex_str) as parser:
+            # process the input
+            math = self.parse_math(parser, latex_str)
+            if isinstance(math, PSParser.Relation_mathContext):
+                return self.convert_relation(math.relation())
+
+            # if set relation
+            if math.set_relation():
+                return self.convert_set_relation(math.set_relation())
+            
+            if math.set_elements():
+                # The issue with 333,333 or 3,333 is that it makess sets and numbers with commas ambigous
+                # is that 333333 or {333,333}?
+                # What we therefore do is that default to numbers with commas
+                # We make the regex match directly on latex_str, because otherwise don't know if there is space
+                # between the comma and the number, in this case it should be a set
+                if comma_number_regex.match(latex_str):
+                    check_limit("max_number_digits", count_digits(latex_str), self.config.max_number_digits)
+                    return convert_number(latex_str)
+                return self.convert_set_elements(math.set_elements())
+            
+            if math.set_elements_relation():
+                return self.convert_set_elements_relation(math.set_elements_relation())
 
-        # process the input
-        math = parser.math()
+            raise Exception('Nothing matched')
 
-        # if set relation
-        if math.set_relation():
-            return self.convert_set_relation(math.set_relation())
-        
-        if math.set_elements():
-            # The issue with 333,333 or 3,333 is that it makess sets and numbers with commas ambigous
-            # is that 333333 or {333,333}?
-            # What we therefore do is that default to numbers with commas
-            # We make the regex match directly on latex_str, because otherwise don't know if there is space
-            # between the comma and the number, in this case it should be a set
-            if comma_number_regex.match(latex_str):
-                return convert_number(latex_str)
-            return self.convert_set_elements(math.set_elements())
-        
-        if math.set_elements_relation():
-            return self.convert_set_elements_relation(math.set_elements_relation())
+    def parse_plain_number(self, latex_str: str):
+        """
+        Convert inputs which are just an (optionally negative) integer, decimal, percentage, comma-grouped number
+        or a fraction of integers without the parser, returns None for anything else.
+        The result is the same as the one of the parser.
+        """
+        max_digits = self.config.max_number_digits
+        match = plain_number_regex.fullmatch(latex_str)
+        if match:
+            check_limit("max_number_digits", count_digits(match["number"]), max_digits)
+            if match["percent"]:
+                number = self.parse_percent_number(match["number"] + match["percent"])
+            else:
+                number = self.parse_number(match["number"])
+            return self.negate(number) if match["sign"] else number
+
+        match = plain_frac_regex.fullmatch(latex_str)
+        if match:
+            check_limit("max_number_digits", max(len(match["upper"]), len(match["lower"])), max_digits)
+            upper = self.parse_number(match["upper"])
+            if match["upper_sign"]:
+                upper = self.negate(upper)
+            lower = self.parse_number(match["lower"])
+            if match["lower_sign"]:
+                lower = self.negate(lower)
+            frac = sympy.Rational(upper, lower)
+            return self.negate(frac) if match["sign"] else frac
+
+        # Parsed as a set of numbers, which is then read as a single number, see parse
+        if plain_comma_number_regex.fullmatch(latex_str):
+            check_limit("max_number_digits", count_digits(latex_str), max_digits)
+            return convert_number(latex_str)
+        return None
+
+    def check_input_length(self, latex_str: str):
+        check_limit("max_input_length", len(latex_str), self.config.max_input_length)
+
+    def check_deadline(self):
+        if self.deadline is not None:
+            self.deadline.check()
+
+    def parse_math(self, parser, latex_str: str):
+        """
+        Run the top-level math rule using the prediction mode from the config.
 
-        raise Exception('Nothing matched')
+        Choosing between the alternatives of math can require lookahead across the whole input,
+        so inputs which can only be a relation are parsed by the relation_math rule instead. In that case
+        Relation_mathContext is returned instead of MathContext.
+        """
+        preclassified = self.config.preclassify_relations and self.is_plain_relation(parser, latex_str)
+        rule = parser.relation_math if preclassified else parser.math
+        if preclassified:
+            parser_stats.preclassified_parses += 1
+
+        if self.config.prediction_mode == "sll":
+            try:
+                with bail_on_error(parser, PredictionMode.SLL):
+                    math = rule()
+                parser_stats.sll_parses += 1
+                return math
+            except (InputLimitError, ConversionTimeoutError):
+                raise
+            except Exception:
+                # SLL fails on syntax errors and on inputs which need full context to be parsed,
+                # in both cases LL parses the input again (and reports the error if there is one)
+                parser_stats.ll_fallbacks += 1
+                reset_parser(parser, latex_str, self.deadline_listener)
+
+        if preclassified:
+            try:
+                with bail_on_error(parser):
+                    return parser.relation_math()
+            except (InputLimitError, ConversionTimeoutError):
+                raise
+            except Exception:
+                # Syntax errors are reported by the math rule, so that the message doesn't depend on the entry rule
+                parser_stats.preclassify_fallbacks += 1
+                reset_parser(parser, latex_str, self.deadline_listener)
+        return parser.math()
+
+    def is_plain_relation(self, parser, latex_str: str) -> bool:
+        """Lex the whole input and check whether it can only be parsed as a single relation"""
+        tokens = parser.getTokenStream()
+        try:
+            tokens.fill()
+        except InputLimitError:
+            raise
+        except Exception:
+            # Lexer errors are reported when parsing the input again
+            reset_parser(parser, latex_str, self.deadline_listener)
+            return False
+        # The last token is EOF
+        tokens = tokens.tokens[:-1]
+        return is_plain_relation(tokens) and not any(token.type in _NOT_PRECLASSIFIED_TOKENS for token in tokens)
 
     class MathErrorListener(ErrorListener):
         def __init__(self, src):
@@ -139,88 +689,64 @@ class _Latex2Sympy:
             raise Exception(err)
 
     def convert_relation(self, rel):
-        if rel.expr():
-            return self.convert_expr(rel.expr())
-        
-        lh = self.convert_relation(rel.relation(0))
-        rh = self.convert_relation(rel.relation(1))
-
-        if rel.LT():
-            if isinstance(lh, And):
-                return And(*lh._unsorted_args, sympy.StrictLessThan(lh._unsorted_args[-1].rhs, rh, evaluate=False))
-            elif isinstance(lh, Relational):
-                return And(lh, sympy.StrictLessThan(lh.rhs, rh, evaluate=False))
-            return sympy.StrictLessThan(lh, rh, evaluate=False)
-        elif rel.LTE():
-            if isinstance(lh, And):
-                return And(*lh._unsorted_args, sympy.LessThan(lh._unsorted_args[-1].rhs, rh, evaluate=False))
-            elif isinstance(lh, Relational):
-                return And(lh, sympy.LessThan(lh.rhs, rh, evaluate=False))
-            return sympy.LessThan(lh, rh, evaluate=False)
-        elif rel.GT():
-            if isinstance(lh, And):
-                return And(*lh._unsorted_args, sympy.StrictGreaterThan(lh._unsorted_args[-1].rhs, rh, evaluate=False))
-            elif isinstance(lh, Relational):
-                return And(lh, sympy.StrictGreaterThan(lh.rhs, rh, evaluate=False))
-            return sympy.StrictGreaterThan(lh, rh, evaluate=False)
-        elif rel.GTE():
-            if isinstance(lh, And):
-                return And(*lh._unsorted_args, sympy.GreaterThan(lh._unsorted_args[-1].rhs, rh, evaluate=False))
-            elif isinstance(lh, Relational):
-                return And(lh, sympy.GreaterThan(lh.rhs, rh, evaluate=False))
-            return sympy.GreaterThan(lh, rh, evaluate=False)
-        elif rel.EQUAL():
-            if isinstance(lh, And):
-                return And(*lh._unsorted_args, sympy.Eq(lh._unsorted_args[-1].rhs, rh, evaluate=False))
-            elif isinstance(lh, Relational):
-                return And(lh, sympy.Eq(lh.rhs, rh, evaluate=False))
-            return sympy.Eq(lh, rh, evaluate=False)
-        elif rel.ASSIGNMENT():
-            # !Use Global variances
-            if self.config.interpret_simple_eq_as_assignment and is_expr_of_only_symbols(lh):
-                # set value
-                self.variances[lh] = rh
-                self.var[str(lh)] = rh
-                return rh
-            else:
-                if isinstance(lh, And):
-                    return And(*lh._unsorted_args, sympy.Eq(lh._unsorted_args[-1].rhs, rh, evaluate=False))
-                elif isinstance(lh, Relational):
-                    return And(lh, sympy.Eq(lh.rhs, rh, evaluate=False))
-                return sympy.Eq(lh, rh, evaluate=False)
-        elif rel.APPROX():
-            if is_expr_of_only_symbols(lh):
-                self.variances[lh] = rh
-                self.var[str(lh)] = rh
-                return rh
-            else:
-                # We don't want approximation, so we jsut take the non-approximated value
-                return lh
-        elif rel.IN():
-            # !Use Global variances
-            if hasattr(rh, 'is_Pow') and rh.is_Pow and hasattr(rh.exp, 'is_Mul'):
-                n = rh.exp.args[0]
-                m = rh.exp.args[1]
-                if n in self.variances:
-                    n = self.variances[n]
-                if m in self.variances:
-                    m = self.variances[m]
-                rh = sympy.MatrixSymbol(lh, n, m)
-                self.variances[lh] = rh
-                self.var[str(lh)] = rh
-            elif self.config.interpret_simple_eq_as_assignment and is_expr_of_only_symbols(lh):
-                self.variances[lh] = rh
-                self.var[str(lh)] = rh
-                return rh
-            else:
-                raise Exception('Unrecognized relation')
-            return lh
-        elif rel.UNEQUAL():
-            if isinstance(lh, And):
-                return And(*lh._unsorted_args, sympy.Ne(lh._unsorted_args[-1].rhs, rh, evaluate=False))
-            elif isinstance(lh, Relational):
-                return And(lh, sympy.Ne(lh.rhs, rh, evaluate=False))
-            return sympy.Ne(lh, rh, evaluate=False)
+        # relation is left recursive, walk down the left operands and fold the right ones from left
+        # to right so that chains like a < b < c < ... build their And only once
+        spine = []
+        while not rel.expr():
+            spine.append(rel)
+            rel = rel.relation(0)
+
+        lh = _AndChain(self.convert_expr(rel.expr()))
+        for rel in reversed(spine):
+            rh = self.convert_relation(rel.relation(1))
+
+            if rel.LT():
+                lh.append(sympy.StrictLessThan, rh)
+            elif rel.LTE():
+                lh.append(sympy.LessThan, rh)
+            elif rel.GT():
+                lh.append(sympy.StrictGreaterThan, rh)
+            elif rel.GTE():
+                lh.append(sympy.GreaterThan, rh)
+            elif rel.EQUAL():
+                lh.append(sympy.Eq, rh)
+            elif rel.ASSIGNMENT():
+                # !Use Global variances
+                if self.config.interpret_simple_eq_as_assignment and is_expr_of_only_symbols(lh.get()):
+                    # set value
+                    self.variances[lh.get()] = rh
+                    self.var[str(lh.get())] = rh
+                    lh = _AndChain(rh)
+                else:
+                    lh.append(sympy.Eq, rh)
+            elif rel.APPROX():
+                if is_expr_of_only_symbols(lh.get()):
+                    self.variances[lh.get()] = rh
+                    self.var[str(lh.get())] = rh
+                    lh = _AndChain(rh)
+                # Otherwise we don't want approximation, so we jsut take the non-approximated value
+            elif rel.IN():
+                # !Use Global variances
+                left = lh.get()
+                if hasattr(rh, 'is_Pow') and rh.is_Pow and hasattr(rh.exp, 'is_Mul'):
+                    n = rh.exp.args[0]
+                    m = rh.exp.args[1]
+                    if n in self.variances:
+                        n = self.variances[n]
+                    if m in self.variances:
+                        m = self.variances[m]
+                    rh = sympy.MatrixSymbol(left, n, m)
+                    self.variances[left] = rh
+                    self.var[str(left)] = rh
+                elif self.config.interpret_simple_eq_as_assignment and is_expr_of_only_symbols(left):
+                    self.variances[left] = rh
+                    self.var[str(left)] = rh
+                    lh = _AndChain(rh)
+                else:
+                    raise Exception('Unrecognized relation')
+            elif rel.UNEQUAL():
+                lh.append(sympy.Ne, rh)
+        return lh.get()
 
 
     def convert_set_relation(self, expr):
@@ -465,6 +991,7 @@ class _Latex2Sympy:
 
 
     def convert_expr(self, expr):
+        self.check_deadline()
         if expr.additive():
             return self.convert_add(expr.additive())
 
@@ -633,20 +1160,24 @@ class _Latex2Sympy:
 
 
     def convert_add(self, add):
-        if add.ADD():
-            lh = self.convert_add(add.additive(0))
+        # additive is left recursive, a + b - c is parsed as ((a + b) - c). Walk down the left operands
+        # and fold the right ones from left to right, so that long sums don't recurse once per term
+        spine = []
+        while add.ADD() or add.SUB():
+            spine.append(add)
+            add = add.additive(0)
+
+        lh = _FlatFold(self.convert_mp(add.mp()))
+        for add in reversed(spine):
             rh = self.convert_add(add.additive(1))
 
-            if (hasattr(lh, 'is_Matrix') and lh.is_Matrix) or (hasattr(rh, 'is_Matrix') and rh.is_Matrix):
-                return self.mat_add_flat(lh, rh)
-            else:
-                return self.add_flat(lh, rh)
-        elif add.SUB():
-            lh = self.convert_add(add.additive(0))
-            rh = self.convert_add(add.additive(1))
-
-            if (hasattr(lh, 'is_Matrix') and lh.is_Matrix) or (hasattr(rh, 'is_Matrix') and rh.is_Matrix):
-                return self.mat_add_flat(lh, self.mat_mul_flat(-1, rh))
+            if lh.is_matrix() or (hasattr(rh, 'is_Matrix') and rh.is_Matrix):
+                if add.ADD():
+                    lh.append(sympy.MatAdd, rh)
+                else:
+                    lh.append(sympy.MatAdd, self.mat_mul_flat(-1, rh))
+            elif add.ADD():
+                lh.append(sympy.Add, rh)
             else:
                 # If we want to force ordering for variables this should be:
                 # return Sub(lh, rh, evaluate=False)
@@ -654,53 +1185,55 @@ class _Latex2Sympy:
                     rh = -rh
                 else:
                     rh = self.mul_flat(-1, rh)
-                return self.add_flat(lh, rh)
-        else:
-            return self.convert_mp(add.mp())
+                lh.append(sympy.Add, rh)
+        return lh.get()
 
 
     def convert_mp(self, mp):
-        if hasattr(mp, 'mp'):
-            mp_left = mp.mp(0)
-            mp_right = mp.mp(1)
+        # mp is left recursive like additive
+        spine = []
+        while mp.getChildCount() == 3:
+            spine.append(mp)
+            mp = mp.mp(0) if hasattr(mp, 'mp') else mp.mp_nofunc(0)
+
+        if hasattr(mp, 'unary'):
+            lh = _FlatFold(self.convert_unary(mp.unary()))
         else:
-            mp_left = mp.mp_nofunc(0)
-            mp_right = mp.mp_nofunc(1)
+            lh = _FlatFold(self.convert_unary(mp.unary_nofunc()))
+        for mp in reversed(spine):
+            if hasattr(mp, 'mp'):
+                rh = self.convert_mp(mp.mp(1))
+            else:
+                rh = self.convert_mp(mp.mp_nofunc(1))
 
-        if mp.MUL() or mp.CMD_TIMES() or mp.CMD_CDOT():
-            lh = self.convert_mp(mp_left)
-            rh = self.convert_mp(mp_right)
+            if mp.MUL() or mp.CMD_TIMES() or mp.CMD_CDOT():
+                if lh.is_matrix() or (hasattr(rh, 'is_Matrix') and rh.is_Matrix):
+                    lh.append(sympy.MatMul, rh)
+                else:
+                    lh.append(sympy.Mul, rh)
+            elif mp.DIV() or mp.CMD_DIV() or mp.COLON():
+                lh = _FlatFold(self.convert_div(lh.get(), rh))
+            elif mp.CMD_MOD():
+                if (hasattr(rh, 'is_Matrix') and rh.is_Matrix):
+                    raise Exception("Cannot perform modulo operation with a matrix as an operand")
+                else:
+                    lh = _FlatFold(sympy.Mod(lh.get(), rh, evaluate=False))
+        return lh.get()
 
-            if (hasattr(lh, 'is_Matrix') and lh.is_Matrix) or (hasattr(rh, 'is_Matrix') and rh.is_Matrix):
-                return self.mat_mul_flat(lh, rh)
-            else:
-                return self.mul_flat(lh, rh)
-        elif mp.DIV() or mp.CMD_DIV() or mp.COLON():
-            lh = self.convert_mp(mp_left)
-            rh = self.convert_mp(mp_right)
-            if (hasattr(lh, 'is_Matrix') and lh.is_Matrix) or (hasattr(rh, 'is_Matrix') and rh.is_Matrix):
-                return sympy.MatMul(lh, sympy.Pow(rh, -1, evaluate=False), evaluate=False)
-            
-            # If both are numbers, we convert to sympy.Rational
-            elif hasattr(lh, 'is_Integer') and lh.is_Integer and hasattr(rh, 'is_Integer') and rh.is_Integer:
-                return sympy.Rational(lh, rh)
-            else:
-                return sympy.Mul(lh, sympy.Pow(rh, -1, evaluate=False), evaluate=False)
-        elif mp.CMD_MOD():
-            lh = self.convert_mp(mp_left)
-            rh = self.convert_mp(mp_right)
-            if (hasattr(rh, 'is_Matrix') and rh.is_Matrix):
-                raise Exception("Cannot perform modulo operation with a matrix as an operand")
-            else:
-                return sympy.Mod(lh, rh, evaluate=False)
+
+    def convert_div(self, lh, rh):
+        if (hasattr(lh, 'is_Matrix') and lh.is_Matrix) or (hasattr(rh, 'is_Matrix') and rh.is_Matrix):
+            return sympy.MatMul(lh, sympy.Pow(rh, -1, evaluate=False), evaluate=False)
+        
+        # If both are numbers, we convert to sympy.Rational
+        elif hasattr(lh, 'is_Integer') and lh.is_Integer and hasattr(rh, 'is_Integer') and rh.is_Integer:
+            return sympy.Rational(lh, rh)
         else:
-            if hasattr(mp, 'unary'):
-                return self.convert_unary(mp.unary())
-            else:
-                return self.convert_unary(mp.unary_nofunc())
+            return sympy.Mul(lh, sympy.Pow(rh, -1, evaluate=False), evaluate=False)
 
 
     def convert_unary(self, unary):
+        self.check_deadline()
         if hasattr(unary, 'unary'):
             nested_unary = unary.unary()
         else:
@@ -715,53 +1248,60 @@ class _Latex2Sympy:
         if unary.ADD():
             return self.convert_unary(nested_unary)
         elif unary.SUB():
-            tmp_convert_nested_unary = self.convert_unary(nested_unary)
-            if (hasattr(tmp_convert_nested_unary, 'is_Matrix') and tmp_convert_nested_unary.is_Matrix):
-                return self.mat_mul_flat(-1, tmp_convert_nested_unary)
-            else:
-                if (hasattr(tmp_convert_nested_unary, 'func') and tmp_convert_nested_unary.func.is_Number):
-                    return -tmp_convert_nested_unary
-                
-                elif hasattr(tmp_convert_nested_unary, 'is_Number') and tmp_convert_nested_unary.is_Number:
-                    return -tmp_convert_nested_unary
-                else:
-                    return self.mul_flat(-1, tmp_convert_nested_unary)
+            return self.negate(self.convert_unary(nested_unary))
         elif postfix:
             return self.convert_postfix_list(postfix)
 
+    def negate(self, expr):
+        if (hasattr(expr, 'is_Matrix') and expr.is_Matrix):
+            return self.mat_mul_flat(-1, expr)
+        else:
+            if (hasattr(expr, 'func') and expr.func.is_Number):
+                return -expr
+            
+            elif hasattr(expr, 'is_Number') and expr.is_Number:
+                return -expr
+            else:
+                return self.mul_flat(-1, expr)
 
-    def convert_postfix_list(self, arr, i=0):
-        if i >= len(arr):
-            raise Exception("Index out of bounds")
 
-        res = self.convert_postfix(arr[i])
+    def convert_postfix_list(self, arr):
+        if not arr:
+            raise Exception("Index out of bounds")
 
-        if isinstance(res, sympy.Expr) or isinstance(res, sympy.Matrix):
-            if i == len(arr) - 1:
-                return res  # nothing to multiply by
+        # Convert the factors from left to right. Each expression is multiplied by everything on its
+        # right and a derivative applies to everything on its right, so they are combined from right
+        # to left afterwards. Anything else ends the list, the factors after it are ignored.
+        factors = []
+        for postfix in arr:
+            res = self.convert_postfix(postfix)
+            if isinstance(res, sympy.Expr) or isinstance(res, sympy.Matrix):
+                factors.append(res)
+            elif isinstance(res, list) and len(res) == 1:  # must be derivative
+                factors.append(res)
             else:
-                # multiply by next
-                rh = self.convert_postfix_list(arr, i + 1)
-
-                if (hasattr(res, 'is_Matrix') and res.is_Matrix) or (hasattr(rh, 'is_Matrix') and rh.is_Matrix):
-                    return self.mat_mul_flat(res, rh)
-                # Support for mixed fractions, 2 \frac{1}{2}
-                elif hasattr(res, 'is_Integer') and res.is_Integer and hasattr(rh, 'is_Rational') and rh.is_Rational and rh.p > 0 and rh.q > 0:
-                    if res < 0:
-                        return sympy.Rational(res*rh.q - rh.p, rh.q)
-                    else:
-                        return sympy.Rational(res*rh.q + rh.p, rh.q)
-                else:
-                    return self.mul_flat(res, rh)
-        elif isinstance(res, list) and len(res) == 1:  # must be derivative
-            wrt = res[0]
-            if i == len(arr) - 1:
+                break
+        else:
+            res = factors.pop()  # nothing to multiply by
+            if isinstance(res, list):
                 raise Exception("Expected expression for derivative")
+
+        rh = _FlatFold(res)
+        for res in reversed(factors):
+            if isinstance(res, list):
+                wrt = res[0]
+                rh = _FlatFold(sympy.Derivative(rh.get(), wrt))
+            elif (hasattr(res, 'is_Matrix') and res.is_Matrix) or rh.is_matrix():
+                rh.prepend(sympy.MatMul, res)
+            # Support for mixed fractions, 2 \frac{1}{2}
+            elif hasattr(res, 'is_Integer') and res.is_Integer and rh.is_rational() and rh.value.p > 0 and rh.value.q > 0:
+                if res < 0:
+                    rh = _FlatFold(sympy.Rational(res*rh.value.q - rh.value.p, rh.value.q))
+                else:
+                    rh = _FlatFold(sympy.Rational(res*rh.value.q + rh.value.p, rh.value.q))
             else:
-                expr = self.convert_postfix_list(arr, i + 1)
-                return sympy.Derivative(expr, wrt)
-        
-        return res
+                rh.prepend(sympy.Mul, res)
+        return rh.get()
 
 
     def do_subs(self, expr, at):
@@ -772,10 +1312,14 @@ class _Latex2Sympy:
                 return expr
             elif len(syms) > 0:
                 sym = next(iter(syms))
+                if self.config.construction_only:
+                    return sympy.Subs(expr, sym, at_expr)
                 return expr.subs(sym, at_expr)
         elif at.equality():
             lh = self.convert_expr(at.equality().expr(0))
             rh = self.convert_expr(at.equality().expr(1))
+            if self.config.construction_only:
+                return sympy.Subs(expr, lh, rh)
             return expr.subs(lh, rh)
 
 
@@ -816,7 +1360,7 @@ class _Latex2Sympy:
                     pass
             elif op.degree() and self.convert_degrees:
                 try:
-                    exp = sympy.Mul(exp, sympy.pi/180)
+                    exp = sympy.Mul(exp, sympy.pi/180, evaluate=not self.config.construction_only)
                 except Exception:
                     pass
 
@@ -848,6 +1392,7 @@ class _Latex2Sympy:
 
 
     def convert_comp(self, comp):
+        self.check_deadline()
         if comp.group():
             return self.convert_expr(comp.group().expr())
         elif comp.formatting_group():
@@ -870,6 +1415,11 @@ class _Latex2Sympy:
             return self.convert_matrix(comp.matrix())
         elif comp.det():
             # !Use Global variances
+            if self.config.construction_only:
+                det = sympy.Determinant(self.convert_matrix(comp.det()))
+                if self.variances:
+                    return sympy.Subs(det, *zip(*self.variances.items()))
+                return det
             return self.convert_matrix(comp.det()).subs(self.variances).det()
         elif comp.func():
             return self.convert_func(comp.func())
@@ -961,10 +1511,7 @@ class _Latex2Sympy:
         return sympy.Tuple(*converted_atoms)
 
     def create_symbol(self, text, enforce_case=False):
-        if self.config.lowercase_symbols and not enforce_case:
-            return sympy.Symbol(text.lower(), real=self.is_real)
-        else:
-            return sympy.Symbol(text, real=self.is_real)
+        return make_symbol(text, self.is_real, self.config.lowercase_symbols and not enforce_case)
 
     def convert_atom(self, atom):
         if atom.atom_expr():
@@ -987,7 +1534,7 @@ class _Latex2Sympy:
             return self.create_symbol('E')
         elif atom.DIFFERENTIAL():
             diff_var = self.get_differential_var(atom.DIFFERENTIAL())
-            return sympy.Symbol('d' + diff_var.name, real=self.is_real)
+            return make_symbol('d' + diff_var.name, self.is_real)
         elif atom.VARIABLE():
             text = atom.VARIABLE().getText()
             is_percent = text.endswith("\\%")
@@ -1013,17 +1560,21 @@ class _Latex2Sympy:
             return get_symbol(text, self.is_real, self.config.lowercase_symbols)
 
         elif atom.PERCENT_NUMBER():
-            text = atom.PERCENT_NUMBER().getText().replace("\\%", "").replace("%", "").replace(",", "")
-            number = self.parse_number(text)
-            percent = sympy.Mul(number, sympy.UnevaluatedExpr(sympy.Rational(1, 100)), evaluate=False)
-            return percent
+            return self.parse_percent_number(atom.PERCENT_NUMBER().getText())
+
+    def parse_percent_number(self, text):
+        text = text.replace("\\%", "").replace("%", "").replace(",", "")
+        number = self.parse_number(text)
+        percent = sympy.Mul(number, sympy.UnevaluatedExpr(sympy.Rational(1, 100)), evaluate=False)
+        return percent
+
     def parse_number(self, text):
         text = text.replace(",", "")
         # If it's made only of digits, remove the starting 0
         if text.isdigit():
             while len(text) > 1 and text[0] == '0':
                 text = text[1:]
-        return sympy.Number(text)
+        return number_from_text(text)
 
 
     def rule2text(self, ctx):
@@ -1065,9 +1616,11 @@ class _Latex2Sympy:
                 frac.upper.start.type == PSLexer.SYMBOL and
                 frac.upper.start.text == '\\partial'):
                 return [wrt]
+            expr_top = self.convert_derivative_letter(frac.upper, diff_op)
+            if expr_top is not None:
+                return sympy.Derivative(expr_top, wrt)
             upper_text = self.rule2text(frac.upper)
 
-            expr_top = None
             if diff_op and upper_text.startswith('d'):
                 expr_top = self.parse(upper_text[1:])
             elif partial_op and frac.upper.start.text == '\\partial':
@@ -1086,9 +1639,32 @@ class _Latex2Sympy:
             return sympy.Mul(expr_top, sympy.Pow(expr_bot, -1, evaluate=False), evaluate=False)
 
 
+    def convert_derivative_letter(self, upper, diff_op):
+        # dy/dx and \partial f/\partial x are converted from their tokens, anything else in the
+        # numerator is parsed again without the leading d or \partial
+        if diff_op:
+            if upper.start != upper.stop or upper.start.type != PSLexer.DIFFERENTIAL:
+                return None
+            if '\\' in upper.start.text:
+                return None
+            letter = self.get_differential_var_str(upper.start.text)
+        else:
+            if (upper.start.text != '\\partial' or upper.stop.tokenIndex != upper.start.tokenIndex + 1 or
+                    upper.stop.type != PSLexer.LETTER_NO_E):
+                return None
+            letter = upper.stop.text
+
+        # Same result as a lone LETTER_NO_E atom in convert_atom_expr
+        if letter in ('e', 'E', 'I') or letter in self.var:
+            return None
+        return get_symbol(letter, self.is_real, self.config.lowercase_symbols)
+
+
     def convert_binom(self, binom):
         expr_top = self.convert_expr(binom.upper)
         expr_bot = self.convert_expr(binom.lower)
+        if self.config.construction_only:
+            return sympy.binomial(expr_top, expr_bot, evaluate=False)
         return sympy.binomial(expr_top, expr_bot)
 
 
@@ -1099,8 +1675,9 @@ class _Latex2Sympy:
             else:
                 arg = self.convert_func_arg(func.func_single_arg_noparens())
 
-            name = func.func_normal_single_arg().start.text[1:]
-
+            name = func.func_normal_single_arg().start.text
+            if name == "\\operatorname":
+                name = func.func_normal_single_arg().func_operator_name.getText()
 
             # get pow
             func_pow = None
@@ -1110,93 +1687,18 @@ class _Latex2Sympy:
                 else:
                     func_pow = self.convert_atom(func.supexpr().atom())
 
-            # change arc<trig> -> a<trig>
-            if name in ["arcsin", "arccos", "arctan", "arccsc", "arcsec",
-                        "arccot"]:
-                name = "a" + name[3:]
-                expr = getattr(sympy_trig, name)(arg, evaluate=False)
-            elif name in ["arsinh", "arcosh", "artanh"]:
-                name = "a" + name[2:]
-                expr = getattr(sympy_hyperbolic, name)(arg, evaluate=False)
-            elif name in ["arcsinh", "arccosh", "arctanh"]:
-                name = "a" + name[3:]
-                expr = getattr(sympy_hyperbolic, name)(arg, evaluate=False)
-            elif name == "operatorname":
-                operatorname = func.func_normal_single_arg().func_operator_name.getText()
-
-                if operatorname in ["arsinh", "arcosh", "artanh"]:
-                    operatorname = "a" + operatorname[2:]
-                    expr = getattr(sympy_hyperbolic, operatorname)(arg, evaluate=False)
-                elif operatorname in ["arcsinh", "arccosh", "arctanh"]:
-                    operatorname = "a" + operatorname[3:]
-                    expr = getattr(sympy_hyperbolic, operatorname)(arg, evaluate=False)
-                elif operatorname == "floor":
-                    expr = self.handle_floor(arg)
-                elif operatorname == "ceil":
-                    expr = self.handle_ceil(arg)
-                elif operatorname == 'eye':
-                    expr = sympy.eye(arg)
-                elif operatorname == 'rank':
-                    expr = sympy.Integer(arg.rank())
-                elif operatorname in ['trace', 'tr']:
-                    expr = arg.trace()
-                elif operatorname == 'rref':
-                    expr = arg.rref()[0]
-                elif operatorname == 'nullspace':
-                    expr = arg.nullspace()
-                elif operatorname == 'norm':
-                    expr = arg.norm()
-                elif operatorname == 'cols':
-                    expr = [arg.col(i) for i in range(arg.cols)]
-                elif operatorname == 'rows':
-                    expr = [arg.row(i) for i in range(arg.rows)]
-                elif operatorname in ['eig', 'eigen', 'diagonalize']:
-                    expr = arg.diagonalize()
-                elif operatorname in ['eigenvals', 'eigenvalues']:
-                    expr = arg.eigenvals()
-                elif operatorname in ['eigenvects', 'eigenvectors']:
-                    expr = arg.eigenvects()
-                elif operatorname in ['svd', 'SVD']:
-                    expr = arg.singular_value_decomposition()
-                else:
-                    expr = sympy.Function(operatorname)(arg, evaluate=False)
-            elif name in ["log", "ln"]:
-                base = 10
-                if func.subexpr():
-                    if func.subexpr().atom():
-                        base = self.convert_atom(func.subexpr().atom())
-                    else:
-                        base = self.convert_expr(func.subexpr().expr())
-                elif name == "log":
-                    base = 10
+            if name in ["\\log", "\\ln"] and func.subexpr():
+                if func.subexpr().atom():
+                    base = self.convert_atom(func.subexpr().atom())
                 else:
-                    # it's ln
-                    base = sympy.E
+                    base = self.convert_expr(func.subexpr().expr())
                 expr = sympy.log(arg, base, evaluate=False)
-            elif name in ["exp", "exponentialE"]:
-                expr = sympy.exp(arg, evaluate=False)
-            elif name == "floor":
-                expr = self.handle_floor(arg)
-            elif name == "ceil":
-                expr = self.handle_ceil(arg)
-            elif name == 'det':
-                expr = arg.det()
-            elif name in ["Gamma", "gamma"]:
-                expr = sympy.gamma(arg)
-            elif name in ["sin", "cos", "tan", "csc", "sec", "cot"]:
-                if func_pow == -1:
-                    name = "a" + name
-                    func_pow = None
-                expr = getattr(sympy_trig, name)(arg, evaluate=False)
-            
-            elif name in ["sinh", "cosh", "tanh"]:
-                if func_pow == -1:
-                    name = "a" + name
-                    func_pow = None
-                expr = getattr(sympy_hyperbolic, name)(arg, evaluate=False)
-            
             else:
-                expr = sympy.Function(name)(arg, evaluate=False)
+                # \sin^{-1} -> \arcsin
+                if name in INVERSE_FUNCTIONS and func_pow == -1:
+                    name = INVERSE_FUNCTIONS[name]
+                    func_pow = None
+                expr = call_function(name, self.single_arg_functions, [arg])
 
             if func_pow:
                 expr = sympy.Pow(expr, func_pow, evaluate=False)
@@ -1205,42 +1707,13 @@ class _Latex2Sympy:
 
         elif func.func_normal_multi_arg():
             if func.func_multi_arg():  # function called with parenthesis
-                args = func.func_multi_arg().getText().split(",")
+                args = [self.convert_expr(arg) for arg in self.arg_exprs(func.func_multi_arg())]
             else:
-                args = func.func_multi_arg_noparens().split(",")
-
-            args = list(map(lambda arg: self.parse(arg), args))
-            name = func.func_normal_multi_arg().start.text[1:]
-
-            if name == "operatorname":
-                operatorname = func.func_normal_multi_arg().func_operator_name.getText()
-                if operatorname in ["gcd", "lcm"]:
-                    expr = self.handle_gcd_lcm(operatorname, args)
-                elif operatorname == 'zeros':
-                    expr = sympy.zeros(*args)
-                elif operatorname == 'ones':
-                    expr = sympy.ones(*args)
-                elif operatorname == 'diag':
-                    expr = sympy.diag(*args)
-                elif operatorname == 'hstack':
-                    expr = sympy.Matrix.hstack(*args)
-                elif operatorname == 'vstack':
-                    expr = sympy.Matrix.vstack(*args)
-                elif operatorname in ['orth', 'ortho', 'orthogonal', 'orthogonalize']:
-                    if len(args) == 1:
-                        arg = args[0]
-                        expr = GramSchmidt([arg.col(i) for i in range(arg.cols)], True)
-                    else:
-                        expr = GramSchmidt(args, True)
-                else:
-                    expr = sympy.Function(operatorname)(*args, evaluate=False)
-            elif name in ["gcd", "lcm"]:
-                expr = self.handle_gcd_lcm(name, args)
-            elif name in ["max", "min"]:
-                name = name[0].upper() + name[1:]
-                expr = getattr(sympy_misc, name)(*args, evaluate=False)
-            else:
-                expr = sympy.Function(name)(*args, evaluate=False)
+                args = [self.convert_mp(func.func_multi_arg_noparens().mp_nofunc())]
+            name = func.func_normal_multi_arg().start.text
+            if name == "\\operatorname":
+                name = func.func_normal_multi_arg().func_operator_name.getText()
+            expr = call_function(name, self.multi_arg_functions, args)
 
             func_pow = None
             should_pow = True
@@ -1257,12 +1730,16 @@ class _Latex2Sympy:
 
         elif func.atom_expr_no_supexpr():
             # define a function
-            f = sympy.Function(func.atom_expr_no_supexpr().getText())
+            name = func.atom_expr_no_supexpr().getText()
+            f = get_user_function(name) or sympy.Function(name)
             # args
-            args = func.func_common_args().getText().split(",")
-            if args[-1] == '':
-                args = args[:-1]
-            args = [self.parse(arg) for arg in args]
+            common_args = func.func_common_args()
+            if common_args.atom():
+                args = [self.convert_atom(common_args.atom())]
+            else:
+                args = [self.convert_expr(common_args.expr())]
+                if common_args.args():
+                    args += [self.convert_expr(arg) for arg in self.arg_exprs(common_args.args())]
             # supexpr
             if func.supexpr():
                 if func.supexpr().expr():
@@ -1278,6 +1755,9 @@ class _Latex2Sympy:
             expr = self.convert_expr(func.base)
             if func.root:
                 r = self.convert_expr(func.root)
+                # 1 / r evaluates r, which can be a huge unevaluated power
+                if self.config.construction_only and not isinstance(r, sympy.Integer):
+                    return sympy.Pow(expr, sympy.Pow(r, -1, evaluate=False), evaluate=False)
                 return sympy.Pow(expr, 1 / r, evaluate=False)
             else:
                 return sympy.Pow(expr, sympy.S.Half, evaluate=False)
@@ -1291,6 +1771,15 @@ class _Latex2Sympy:
             return self.handle_exp(func)
 
 
+    def arg_exprs(self, args):
+        # func_multi_arg and args are right recursive lists: expr (',' rest)?
+        exprs = []
+        while args is not None:
+            exprs.append(args.expr())
+            args = args.func_multi_arg() if hasattr(args, 'func_multi_arg') else args.args()
+        return exprs
+
+
     def convert_func_arg(self, arg):
         if hasattr(arg, 'expr'):
             return self.convert_expr(arg.expr())
@@ -1381,23 +1870,11 @@ class _Latex2Sympy:
                 exp_arg = self.convert_atom(func.supexpr().atom())
         else:
             exp_arg = 1
+        if self.config.construction_only:
+            return sympy.exp(exp_arg, evaluate=False)
         return sympy.exp(exp_arg)
 
 
-    def handle_gcd_lcm(self, f, args):
-        """
-        Return the result of gcd() or lcm(), as UnevaluatedExpr
-
-        f: str - name of function ("gcd" or "lcm")
-        args: List[Expr] - list of function arguments
-        """
-
-        args = tuple(map(sympy.nsimplify, args))
-
-        # gcd() and lcm() don't support evaluate=False
-        return sympy.UnevaluatedExpr(getattr(sympy, f)(args))
-
-
     def handle_floor(self, expr):
         """
         Apply floor() then return the floored expression.
@@ -1450,10 +1927,22 @@ class _Latex2Sympy:
 def convert_to_pct(number: Number):
     return sympy.Mul(number, sympy.UnevaluatedExpr(sympy.Rational(1, 100)), evaluate=False)
 
-def latex2sympy(latex_str: str, variable_values: dict | None = None, is_real=None, convert_degrees: bool = False, normalization_config: NormalizationConfig | None = NormalizationConfig(), conversion_config: ConversionConfig = ConversionConfig()):
-    converter = _Latex2Sympy(variable_values, is_real, convert_degrees, config=conversion_config)
+def latex2sympy(latex_str: str, variable_values: dict | None = None, is_real=None, convert_degrees: bool = False, normalization_config: NormalizationConfig | None = NormalizationConfig(), conversion_config: ConversionConfig = ConversionConfig(), cache: ConversionCache | None = None, timeout: float | Deadline | None = None):
+    """
+    Convert a latex string to a sympy expression.
+
+    `timeout` is the maximum number of seconds the call may take (or a `Deadline`), past which it raises
+    `ConversionTimeoutError`. It's checked cooperatively during normalization, parsing and conversion, without signals.
+    """
+    deadline = Deadline.of(timeout)
+    if cache is not None:
+        key = cache.make_key(latex_str, variable_values, is_real, convert_degrees, normalization_config, conversion_config)
+        return cache.get_or_convert(key, lambda: latex2sympy(latex_str, variable_values, is_real, convert_degrees, normalization_config, conversion_config, timeout=deadline))
+
+    converter = _Latex2Sympy(variable_values, is_real, convert_degrees, config=conversion_config, deadline=deadline)
     if normalization_config is not None:
-        latex_str = normalize_latex(latex_str, normalization_config)
+        converter.check_input_length(latex_str)
+        latex_str = normalize_latex(latex_str, normalization_config, deadline)
     return converter.parse(latex_str)
 
 
@@ -11,4 +11,6 @@ class And(SympyAnd):
         obj._unsorted_args = args
         return obj
 
-
+    def __getnewargs__(self):
+        # Rebuild from the original order so that pickled objects keep _unsorted_args
+        return tuple(self._unsorted_args)
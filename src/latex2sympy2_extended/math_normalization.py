@@ -1,8 +1,12 @@
 import re
-from dataclasses import dataclass
+from collections import Counter
+from dataclasses import dataclass, field
 from typing import Literal
 import logging
 
+from latex2sympy2_extended.cache import NormalizationCache
+from latex2sympy2_extended.deadline import Deadline
+
 logger = logging.getLogger(__name__)
 
 @dataclass(frozen=True)
@@ -16,6 +20,9 @@ class NormalizationConfig:
     - nits: Small formatting fixes (spaces, dots, etc.)
     - boxed: Extract content from boxed environments
     - equations: Handle equation splitting and approximations (deprecated)
+    - engine: "passes" applies the basic_latex normalizations one after the other, "fused" applies them
+      in a single scan of the text, with the same result. Each match is handled in Python, so "fused" is slower
+      on texts which are mostly matches (e.g. "and " or " ." repeated)
     """
     basic_latex: bool = True
     units: bool = False
@@ -23,10 +30,13 @@ class NormalizationConfig:
     nits: bool = False
     boxed: Literal["all", "last", "none"] = "all"
     equations: bool = False
+    engine: Literal["passes", "fused"] = "passes"
 
 # Compile all regex patterns once at module level
-r_left = re.compile(r"\\m?left(\\\{|\{|\\\||\||\[|\(|\\rbracl|\\lgroup|\\lbrace|\\lbrack|\\vert|\\lvert|\\lceil|\\lfloor|\\vert|\\lvert|\\langle|\\llcorner|\\ulcorner)")
-r_right = re.compile(r"\\m?right(\\\}|\}|\\\||\||\]|\)|\\rbrack|\\rgroup|\\rbrace|\\rbrack|\\vert|\\rvert|\\rceil|\\rfloor|\\vert|\\rvert|\\rangle|\\lrcorner|\\urcorner)")
+left_delimiters = r"\\\{|\{|\\\||\||\[|\(|\\rbracl|\\lgroup|\\lbrace|\\lbrack|\\vert|\\lvert|\\lceil|\\lfloor|\\vert|\\lvert|\\langle|\\llcorner|\\ulcorner"
+right_delimiters = r"\\\}|\}|\\\||\||\]|\)|\\rbrack|\\rgroup|\\rbrace|\\rbrack|\\vert|\\rvert|\\rceil|\\rfloor|\\vert|\\rvert|\\rangle|\\lrcorner|\\urcorner"
+r_left = re.compile(rf"\\m?left({left_delimiters})")
+r_right = re.compile(rf"\\m?right({right_delimiters})")
 
 # Units regex
 units = [
@@ -172,12 +182,121 @@ units = [
     "inch",
 ]
 
-# We sort here to that when matching from right the longest units are matched first
-# E.g "percent" is matched before "cent"
-
 units_regex_pattern = f"(?:{'|'.join(units)})(?:s|es)?"
 units_regex = re.compile(f"(\\d|\\}}|\\s)\\s*(?:{units_regex_pattern})\\s*$")
 
+# normalize_latex removes units with a trie of the reversed unit names, matched from the end of the text, instead
+# of units_regex which is tried at every position. The result is the same: "." in a unit matches any character
+# except a newline, and the unit may be followed by "s" or "es".
+_UNIT_END = ""
+_user_units: list[str] = []
+
+
+def _build_units_trie(unit_names: list[str]) -> dict:
+    root: dict = {}
+    for unit in unit_names:
+        node = root
+        for char in reversed(unit):
+            node = node.setdefault(char, {})
+        node[_UNIT_END] = True
+    return root
+
+
+def _max_unit_length(unit_names: list[str]) -> int | None:
+    """
+    Longest unit, a unit which contains a character other than "." and whitespace ends at most that far after the
+    last non-space character of the text. None if some unit can match whitespace only.
+    """
+    if any(all(char == "." or char.isspace() for char in unit) for unit in unit_names):
+        return None
+    return max(map(len, unit_names), default=0)
+
+
+_units_trie = _build_units_trie(units)
+_units_max_length = _max_unit_length(units)
+
+
+def register_units(*names: str):
+    """
+    Remove the units `names` with `NormalizationConfig(units=True)`, like the built-in ones. A unit is only removed
+    at the end of the text, after a digit, a closing brace or a space, and may be followed by "s" or "es". "." in
+    a name matches any character. Results already stored in a `ConversionCache` or a `NormalizationCache` are not
+    updated.
+    """
+    global _units_trie, _units_max_length
+    _user_units.extend(name for name in names if name not in _user_units)
+    _units_trie = _build_units_trie(units + _user_units)
+    _units_max_length = _max_unit_length(units + _user_units)
+
+
+def unregister_units(*names: str):
+    """
+    Stop removing units added with `register_units`.
+    """
+    global _units_trie, _units_max_length
+    _user_units[:] = [name for name in _user_units if name not in names]
+    _units_trie = _build_units_trie(units + _user_units)
+    _units_max_length = _max_unit_length(units + _user_units)
+
+
+def _unit_starts(text: str, end: int, trie: dict) -> list[int]:
+    """Start positions of the units which end at `end`"""
+    starts = []
+    nodes = [trie]
+    pos = end
+    while nodes and pos > 0:
+        pos -= 1
+        char = text[pos]
+        next_nodes = []
+        for node in nodes:
+            child = node.get(char)
+            if child is not None:
+                next_nodes.append(child)
+            if char != "." and char != "\n":
+                child = node.get(".")
+                if child is not None:
+                    next_nodes.append(child)
+        if any(_UNIT_END in node for node in next_nodes):
+            starts.append(pos)
+        nodes = next_nodes
+    return starts
+
+
+def remove_units(text: str) -> str:
+    """
+    Remove a unit at the end of the text, along with the spaces around it, keeping the digit, closing brace or
+    space before it. Same as `units_regex.sub(r"\\1", text)`, plus the units added with `register_units`.
+    """
+    trie = _units_trie
+    max_length = _units_max_length
+    first_kept = None
+    stripped_end = len(text.rstrip())
+    # The unit can be followed by any part of the trailing whitespace, but it contains a non-space character
+    last_end = len(text) if max_length is None else min(len(text), stripped_end + max_length)
+    for end in range(last_end, stripped_end - 1, -1):
+        unit_ends = [end]
+        if text.endswith("s", 0, end):
+            unit_ends.append(end - 1)
+            if text.endswith("es", 0, end):
+                unit_ends.append(end - 2)
+        for unit_end in unit_ends:
+            for start in _unit_starts(text, unit_end, trie):
+                # The leftmost digit, closing brace or whitespace followed only by whitespace up to the unit
+                space_start = start
+                while space_start > 0 and text[space_start - 1].isspace():
+                    space_start -= 1
+                if space_start > 0 and (text[space_start - 1].isdecimal() or text[space_start - 1] == "}"):
+                    kept = space_start - 1
+                elif space_start < start:
+                    kept = space_start
+                else:
+                    continue
+                if first_kept is None or kept < first_kept:
+                    first_kept = kept
+    if first_kept is None:
+        return text
+    return text[:first_kept + 1]
+
 # Basic latex regex
 to_remove_regex = re.compile(
     r"\\mathrm\{th\}|"  # "th"
@@ -193,6 +312,7 @@ to_remove_regex = re.compile(
 # Text replacement patterns
 to_replace_patterns = [
     # (name, pattern, replacement)
+    # The fused engine matches these rules with its own patterns (_fused_rules below), update them together
     # Not really needed only for units
     ("math", r"\\math(?:rm|it|bf)", r"\text"),
     ("text", r"\\text(?:normal|bf|it|rm)", r"\text"),
@@ -247,8 +367,9 @@ malformed_operators_patterns = [
 def _fix_malformed_operators(text: str) -> str:
     """Fix malformed operators in the given text."""
     expr_str = text
-    for pattern, replacement in malformed_operators_patterns:
-        expr_str = pattern.sub(replacement, expr_str)
+    for rule, (pattern, replacement) in zip(_malformed_operators_rules, malformed_operators_patterns):
+        if _may_match(rule, expr_str):
+            expr_str = pattern.sub(replacement, expr_str)
     expr_str = expr_str.replace(" sqrt", "\\sqrt")
     return expr_str
 
@@ -258,31 +379,58 @@ def replace(match):
     return replacements[match.lastgroup]
 
 def replace_in_latex(text: str) -> str:
+    if not _may_match("replace", text):
+        return text
     return to_replace_regex.sub(replace, text)
 
 VALID_SEPARATOR_PATTERN = re.compile(r'\b(and|or)\b|,|;')
+BRACE_PATTERN = re.compile(r"[{}]")
+
+def _boxed_commands_reversed(text: str):
+    """Yield the start and end of every \\boxed and \\fbox command, from right to left"""
+    boxed_idx = text.rfind("\\boxed")
+    fbox_idx = text.rfind("\\fbox")
+    # Each search continues below the previous match of the same command, so the text is scanned once per command
+    while boxed_idx >= 0 or fbox_idx >= 0:
+        if boxed_idx > fbox_idx:
+            yield boxed_idx, boxed_idx + 6
+            boxed_idx = text.rfind("\\boxed", 0, boxed_idx)
+        else:
+            yield fbox_idx, fbox_idx + 5
+            fbox_idx = text.rfind("\\fbox", 0, fbox_idx)
+
+class _ClosingBraces:
+    """
+    Position of the closing brace matching each opening brace of a text. The braces are indexed from the end of
+    the text as far back as needed, every brace is visited once.
+    """
+    def __init__(self, text: str):
+        self.text = text
+        self.indexed_from = len(text)
+        self.unmatched_closing: list[int] = []
+        self.matches: dict[int, int] = {}
+
+    def get(self, opening_brace_pos: int) -> int | None:
+        if opening_brace_pos < self.indexed_from:
+            braces = [match.start() for match in BRACE_PATTERN.finditer(self.text, opening_brace_pos, self.indexed_from)]
+            for pos in reversed(braces):
+                if self.text[pos] == "}":
+                    self.unmatched_closing.append(pos)
+                elif self.unmatched_closing:
+                    self.matches[pos] = self.unmatched_closing.pop()
+            self.indexed_from = opening_brace_pos
+        return self.matches.get(opening_brace_pos)
+
 def extract_boxed_content(text: str, mode: Literal["last", "all"] = "last") -> str:
     """
     Find and extract all \\boxed{...} or \\fbox{...} elements from a string, searching from right to left.
     If mode is "last", return content up to the last valid separator.
     If mode is "all", return all boxed contents joined by commas.
+
+    The commands and the matching braces are each indexed in a single pass from the end of the text, so the time
+    is linear in the length of the text.
     """
     
-    def find_content_boundaries(text: str, opening_brace_pos: int, max_pos: int) -> tuple[int, int] | None:
-        # Start searching for closing brace from the opening brace position
-        i = opening_brace_pos
-        num_left_braces_open = 1  # We start after the opening brace
-        
-        while i + 1 < max_pos:  # Check if next position is within bounds and max_pos
-            i += 1
-            if text[i] == "{":
-                num_left_braces_open += 1
-            elif text[i] == "}":
-                num_left_braces_open -= 1
-                if num_left_braces_open == 0:
-                    return opening_brace_pos, i
-        return None
-    
     def should_extract_boxed(full_text: str, boxed_text: str, next_boxed_text: str, boxed_end: int, next_boxed_start: int) -> bool:
         """
         Check if the boxed is valid last boxed. We do allow multiple boxed extraction if they are separated
@@ -308,21 +456,12 @@ def extract_boxed_content(text: str, mode: Literal["last", "all"] = "last") -> s
             return True
         return False
     
+    closing_braces = _ClosingBraces(text)
     results = []
-    current_pos = len(text)
     last_boxed_start = None
     
     max_pos = len(text)
-    while True:
-        boxed_idx = text.rfind("\\boxed", 0, current_pos)
-        fbox_idx = text.rfind("\\fbox", 0, current_pos)
-        
-        if boxed_idx < 0 and fbox_idx < 0:
-            break
-            
-        start_idx = max(boxed_idx, fbox_idx)
-        command_end = start_idx + (6 if boxed_idx > fbox_idx else 5)
-        
+    for start_idx, command_end in _boxed_commands_reversed(text):
         # Find opening brace
         next_char_pos = command_end
         while next_char_pos < max_pos and text[next_char_pos].isspace():
@@ -332,14 +471,14 @@ def extract_boxed_content(text: str, mode: Literal["last", "all"] = "last") -> s
             break
             
         if text[next_char_pos] == "{":
-            boundaries = find_content_boundaries(text, next_char_pos, max_pos)
-            if not boundaries:
+            content_end = closing_braces.get(next_char_pos)
+            # The content can't overlap the boxed which follows it
+            if content_end is None or content_end >= max_pos:
                 # This is our last box
                 if len(results) == 0:
                     results.append(text[next_char_pos:])
                 break
-            content_start, content_end = boundaries
-            content = text[content_start + 1:content_end].strip()
+            content = text[next_char_pos + 1:content_end].strip()
             
             if mode == "last" and last_boxed_start is not None:
                 if not should_extract_boxed(text, content ,results[-1] if results else "", content_end, last_boxed_start):
@@ -356,9 +495,6 @@ def extract_boxed_content(text: str, mode: Literal["last", "all"] = "last") -> s
                 results.append(text[next_char_pos:])
             # Otherwise we just ignore it
             break
-            
-        
-        current_pos = start_idx
     
     if not results:
         return text
@@ -456,57 +592,430 @@ def _fix_sqrt(text: str) -> str:
         new_string += new_substr
     return new_string
 
-def normalize_latex(text: str, config: NormalizationConfig) -> str:
+# Fused engine for the basic_latex normalizations (NormalizationConfig(engine="fused")). The rules of all the
+# passes above are alternatives of a single regex, in the order of the passes, so the text is scanned once and
+# the output is joined once. Rules which look at text an earlier pass may have changed (the spaces taken by
+# `\s*percent`, the character before `inf`, ...) check it on the output built so far instead of the input.
+# The `\\` fix only applies when the whole result has no matrix, so it still runs on the result, and the
+# `\mathrm{T}` / `\mathrm{d}` replacements, which rules can't see through, still run before the scan.
+
+# Text removed by to_remove_regex, which doesn't give back the spaces taken by `\!\s*`
+_removed = rf"(?>{to_remove_regex.pattern})*"
+_space_or_removed = rf"(?:\s|(?>{to_remove_regex.pattern}))*"
+
+
+def _gapped(literal: str) -> str:
+    """
+    Pattern matching the literal after its first character as replace_in_latex sees it: with removed text
+    between the characters
+    """
+    return "".join(_removed + re.escape(char) for char in literal[1:])
+
+
+def _literal_rules(name: str, *literals: str, suffix: str = "") -> list[tuple[str, str, str]]:
+    """Rules of the fused regex matching any of the literals, followed by suffix"""
+    rules: dict[str, list[str]] = {}
+    for literal in literals:
+        rules.setdefault(literal[0], []).append(_gapped(literal))
+    return [(name, first, f"(?:{'|'.join(rests)}){suffix}") for first, rests in rules.items()]
+
+
+# (name, first character, pattern of the rest). Every alternative of the fused regex starts with a literal
+# character, which lets the regex engine skip to the positions where a rule can start.
+_fused_rules: list[tuple[str, str, str]] = [
+    # Replacements of basic_latex before the regexes, \mathrm{T} and \mathrm{d} are replaced before the scan
+    ("begin_matrix", "\\", r"left\[\\begin\{matrix\}"),
+    ("end_matrix", "\\", r"end\{matrix\}\\right\]"),
+    # r_left and r_right, the delimiter itself is scanned next
+    ("left", "\\", rf"m?left(?={left_delimiters})"),
+    ("right", "\\", rf"m?right(?={right_delimiters})"),
+    ("permutation", "(", permutation_regex.pattern[2:]),
+    # Same alternatives as to_remove_regex
+    ("remove", "\\", r"mathrm\{th\}|!\s*|text\s*\{\s*\}|\$|displaystyle"),
+    ("remove", "$", ""),
+    ("remove", '"', r'(?<!\\")'),
+    ("remove", "'", r"(?<!\\')"),
+    # to_replace_patterns, which see the text after to_remove_regex: removed text can appear anywhere inside
+    # their matches. The \s* and ,? prefixes and the lookbehinds are checked on the output.
+    *_literal_rules("math", "\\mathrm", "\\mathit", "\\mathbf"),
+    *_literal_rules("text", "\\textnormal", "\\textbf", "\\textit", "\\textrm"),
+    *_literal_rules("frac", "\\dfrac", "\\tfrac", "\\cfrac"),
+    # Digits are never the end of removed text, so they can't be preceded by a space
+    ("decimal_space", ".", r"(?<![0-9]\.)"),
+    *_literal_rules("decimal_brace", "{."),
+    *_literal_rules("approx", "~="),
+    ("comma", "{", rf"{_space_or_removed},{_space_or_removed}\}}"),
+    *_literal_rules("and_or", "and", "or", suffix="(?![a-zA-Z])"),
+    ("and_or_text", "\\", _gapped("\\text{") + _space_or_removed + f"(?:a{_gapped('and')}|o{_gapped('or')})" + _space_or_removed + r"\}"),
+    ("backslash_space", "\\", rf"{_removed}\s"),
+    *_literal_rules("infinity", "infinity"),
+    *_literal_rules("dot", "\\ldots"),
+    *_literal_rules("percentage", "percentage", suffix=r"\b"),
+    *_literal_rules("percentage_in_text", "\\text{percentage}"),
+    *_literal_rules("percent", "percent", suffix=r"\b"),
+    *_literal_rules("percent_in_text", "\\text{percent}"),
+    *_literal_rules("pct", "pct", suffix=r"\b"),
+    *_literal_rules("pct_in_text", "\\text{pct}"),
+    *_literal_rules("inf", "inf", suffix="(?!inity)"),
+    ("sqrt", "s", rf"(?<!\\s){_gapped('sqrt')}"),
+    ("newline", "\n", ""),
+    ("newline", "\t", ""),
+]
+
+
+def _compile_fused_rules(rules: list[tuple[str, str, str]]) -> tuple[re.Pattern, list[str | None]]:
+    """
+    The fused regex, with the rules grouped by their first character (keeping their order), and the rule of each
+    of its groups (None for the groups inside the rules)
+    """
+    branches: dict[str, list[tuple[str, str]]] = {}
+    for name, first, rest in rules:
+        branches.setdefault(first, []).append((name, rest))
+    patterns = []
+    group_rules: list[str | None] = [None]
+    for first, alternatives in branches.items():
+        patterns.append(re.escape(first) + "(?:" + "|".join(f"({rest})" for _, rest in alternatives) + ")")
+        for name, rest in alternatives:
+            group_rules.append(name)
+            group_rules.extend([None] * re.compile(rest).groups)
+    return re.compile("|".join(patterns)), group_rules
+
+
+_fused_regex, _fused_group_rules = _compile_fused_rules(_fused_rules)
+
+# Rules which always emit the same text
+_fused_constants = {
+    "begin_matrix": r"\begin{bmatrix}",
+    "end_matrix": r"\end{bmatrix}",
+    "newline": " ",
+    "math": replacements["math"],
+    "text": replacements["text"],
+    "frac": replacements["frac"],
+    "decimal_brace": replacements["decimal_brace"],
+    "approx": replacements["approx"],
+    "infinity": replacements["infinity"],
+    "percentage_in_text": replacements["percentage_in_text"],
+    "percent_in_text": replacements["percent_in_text"],
+    "pct_in_text": replacements["pct_in_text"],
+}
+_fused_deletions = {"left", "right", "remove"}
+_replace_in_latex_rules = {name for name, _, _ in to_replace_patterns}
+_percent_rules = {"percentage", "percent", "pct"}
+
+# Text which replace_in_latex doesn't see, because an earlier pass removed it
+_removed_regex = re.compile(rf"{to_remove_regex.pattern}|\\m?left(?={left_delimiters})|\\m?right(?={right_delimiters})")
+
+
+def _is_word(char: str | None) -> bool:
+    return char is not None and (char.isalnum() or char == "_")
+
+
+_ascii_letters = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+# First characters of the text _removed_regex matches
+_hidden_starts = frozenset("\\$\"'")
+
+
+def _next_visible_char(text: str, pos: int) -> str | None:
+    """Character at pos as the replace_in_latex pass would see it"""
+    if pos < len(text) and text[pos] not in _hidden_starts:
+        return text[pos]
+    while True:
+        m = _removed_regex.match(text, pos)
+        if m is None or m.end() == pos:
+            break
+        pos = m.end()
+    return text[pos] if pos < len(text) else None
+
+
+def _visible_tail(views: list[str], floor: int) -> tuple[str, str | None]:
+    """
+    End of the output which the \\s* and ,? prefixes of the replace_in_latex rules can take back, with at least
+    its last two non-space characters, and the character before it.
+    """
+    i = len(views)
+    tail = ""
+    while i > floor:
+        i -= 1
+        tail = views[i] + tail
+        if len(tail.rstrip()) >= 2:
+            return tail, None
+    return tail, views[i - 1][-1] if i > 0 else None
+
+
+def _take_back(out: list[str], views: list[str], count: int):
+    """Remove count characters from the end of the output"""
+    while count > 0:
+        piece = views[-1]
+        if len(piece) > count:
+            out[-1] = out[-1][:-count]
+            views[-1] = piece[:-count]
+            return
+        count -= len(piece)
+        out.pop()
+        views.pop()
+
+
+def _and_or_prefix(views: list[str], floor: int) -> int | None:
+    """
+    Length of the `,?\\s*` prefix of `(?<![a-zA-Z])(,?\\s*(?:and|or))` at the end of the output, where the
+    match starts as far left as the lookbehind allows, None if it can't match.
+    """
+    tail, before = _visible_tail(views, floor)
+    body = tail.rstrip()
+    spaces = len(tail) - len(body)
+    if body.endswith(","):
+        if (body[-2] if len(body) > 1 else before) not in _ascii_letters:
+            return spaces + 1
+        return spaces
+    if spaces:
+        if (body[-1] if body else before) not in _ascii_letters:
+            return spaces
+        return spaces - 1
+    if views and views[-1][-1] in _ascii_letters:
+        return None
+    return 0
+
+
+def _fused_scan(text: str) -> str:
+    out: list[str] = []
+    # The text each piece of out replaced, as seen by the replace_in_latex pass (it sees the input of its own
+    # replacements, and the newlines which become spaces after it)
+    views: list[str] = []
+    # replace_in_latex can't take back its own output
+    floor = 0
+    pos = 0
+    search = _fused_regex.search
+    while (m := search(text, pos)) is not None:
+        start = m.start()
+        if start > pos:
+            piece = text[pos:start]
+            out.append(piece)
+            views.append(piece)
+        pos = m.end()
+        name = _fused_group_rules[m.lastindex]
+        if name in _fused_deletions:
+            continue
+        matched = m.group()
+        replacement = _fused_constants.get(name)
+
+        if replacement is None:
+            take = 0
+            if name == "permutation":
+                # The arguments as they are after r_left and r_right
+                n = r_right.sub(r"\1", r_left.sub(r"\1", m.group(m.lastindex + 1)))
+                k = r_right.sub(r"\1", r_left.sub(r"\1", m.group(m.lastindex + 2)))
+                replacement = None if not n or not k else f"\\frac{{({n})!}}{{(({n})-({k}))!}}"
+                if replacement is not None:
+                    out.append(_fused_scan(replacement))
+                    views.append(replacement)
+                    continue
+            elif name == "and_or":
+                take = _and_or_prefix(views, floor)
+                if take is not None and _next_visible_char(text, pos) in _ascii_letters:
+                    take = None
+                replacement = None if take is None else replacements["and_or"]
+            elif name in _percent_rules:
+                tail, _ = _visible_tail(views, floor)
+                take = len(tail) - len(tail.rstrip())
+                prev = views[-1][-1] if views else None
+                if (take or not _is_word(prev)) and not _is_word(_next_visible_char(text, pos)):
+                    replacement = replacements[name]
+            elif name in ("inf", "backslash_space"):
+                if not views or views[-1][-1] != "\\":
+                    replacement = replacements[name]
+            else:
+                tail, _ = _visible_tail(views, floor)
+                if name == "decimal_space":
+                    take = 1
+                    ok = tail[-1:].isspace()
+                elif name == "sqrt":
+                    take = 1
+                    ok = tail.endswith(" ")
+                elif name == "dot":
+                    take = 1 if tail.endswith(",") else 0
+                    ok = True
+                else:
+                    # comma and and_or_text
+                    body = tail.rstrip()
+                    take = len(tail) - len(body)
+                    if name == "and_or_text" and body.endswith(","):
+                        take += 1
+                    ok = True
+                if ok:
+                    replacement = replacements[name]
+            if replacement is None:
+                # Not a match after all, the other rules can still start after the first character
+                pos = start + 1
+                out.append(text[start])
+                views.append(text[start])
+                continue
+            if take:
+                # Usually the spaces are the whole text between the previous match and this one
+                if len(views[-1]) == take:
+                    out.pop()
+                    views.pop()
+                else:
+                    _take_back(out, views, take)
+
+        out.append(replacement)
+        if name in _replace_in_latex_rules:
+            views.append(matched)
+            floor = len(out)
+        else:
+            views.append(matched if name == "newline" else replacement)
+    if pos < len(text):
+        out.append(text[pos:])
+    return "".join(out)
+
+
+def _fused_basic_latex(text: str) -> str:
+    # Same plain replacements as the passes, the permutation rule and the others see their result
+    text = text.replace(r'\mathrm{T}', 'T')
+    text = text.replace(r'\mathrm{d}', 'd').replace(r'{\rm d}', 'd')
+    text = _fused_scan(text)
+    if "matrix" not in text and _may_match("command_slash_fix", text):
+        text = command_slash_fix_regex.sub(r"\\", text)
+    return text
+
+
+# Literal triggers of the normalization regexes: a regex can only match text which contains one of its triggers,
+# checked with `in` before running it. Most short answers contain the triggers of a few rules only. The fused
+# engine doesn't need them, its regex already skips to the positions where a rule can start.
+_WHITESPACE = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000"
+_malformed_operators_rules = ["power_parens", "sqrt_parens", "frac_digits", "log_digits", "frac_brace_digit",
+                              "frac_digit_brace", "sqrt_digit"]
+_rule_triggers: dict[str, tuple[str, ...]] = {
+    "left": ("left",),
+    "right": ("right",),
+    "permutation": (")_{",),
+    "remove": ("$", "'", '"', "\\!", "\\text", "\\mathrm{th}", "\\displaystyle"),
+    # to_replace_patterns, "." for decimal_space and decimal_brace, "inf" for infinity and "percent" for percentage,
+    # and a backslash followed by any character which \s matches
+    "replace": (",", ".", "and", "or", "\\math", "\\text", "frac", "~=", "inf", "\\ldots", "percent", "pct", " sqrt",
+                *("\\" + char for char in _WHITESPACE)),
+    "command_slash_fix": ("\\\\",),
+    "equation_split": ("=",),
+    "unit_superscript": ("\\text{", "\\mbox{"),
+    **dict(zip(_malformed_operators_rules, [("^",), ("sqrt",), ("\\frac",), ("\\log_",), ("\\frac",), ("\\frac",),
+                                           ("\\sqrt",)])),
+}
+
+
+@dataclass
+class NormalizationStats:
+    """
+    Number of times each normalization regex ran, and was skipped because the text contained none of its literal
+    triggers, shared by all normalizations in the process.
+    """
+    runs: Counter = field(default_factory=Counter)
+    skips: Counter = field(default_factory=Counter)
+
+    @property
+    def skip_rate(self) -> float:
+        total = self.runs.total() + self.skips.total()
+        return self.skips.total() / total if total else 0.0
+
+    def reset(self):
+        self.runs.clear()
+        self.skips.clear()
+
+
+normalization_stats = NormalizationStats()
+
+
+# Triggers with non-ASCII characters can't be found in ASCII text, most answers don't need to look for them
+_ascii_rule_triggers = {rule: tuple(trigger for trigger in triggers if trigger.isascii())
+                        for rule, triggers in _rule_triggers.items()}
+
+
+def _may_match(rule: str, text: str) -> bool:
+    triggers = _ascii_rule_triggers[rule] if text.isascii() else _rule_triggers[rule]
+    for trigger in triggers:
+        if trigger in text:
+            normalization_stats.runs[rule] += 1
+            return True
+    normalization_stats.skips[rule] += 1
+    return False
+
+
+def _check_deadline(deadline: Deadline | None):
+    if deadline is not None:
+        deadline.check()
+
+
+def normalize_latex(text: str, config: NormalizationConfig, deadline: Deadline | None = None, cache: NormalizationCache | None = None) -> str:
     """Normalize latex string according to the provided configuration.
     
     Args:
         text: The latex string to normalize
         config: Configuration controlling which normalizations to apply
+        deadline: Optional deadline, checked between the normalization steps
+        cache: Optional `NormalizationCache`, to normalize each (text, config) pair only once
         
     Returns:
         The normalized latex string
     """
+    if cache is not None:
+        return cache.get_or_normalize(text, config, lambda: _normalize_latex(text, config, deadline))
+    return _normalize_latex(text, config, deadline)
+
+
+def _normalize_latex(text: str, config: NormalizationConfig, deadline: Deadline | None) -> str:
     if config.boxed == "all" or config.boxed == "last":
         text = extract_boxed_content(text, mode=config.boxed)
 
-    if config.basic_latex:
+    if config.basic_latex and config.engine == "fused":
+        _check_deadline(deadline)
+        text = _fused_basic_latex(text)
+    elif config.basic_latex:
+        _check_deadline(deadline)
         # Basic latex command replacements
         text = text.replace(r'\mathrm{T}', 'T')
         text = text.replace(r'\mathrm{d}', 'd').replace(r'{\rm d}', 'd')
         text = text.replace(r'\left[\begin{matrix}', r'\begin{bmatrix}').replace(r'\end{matrix}\right]', r'\end{bmatrix}')
-        text = r_left.sub(r'\1', text)
-        text = r_right.sub(r'\1', text)
-        text = permutation_regex.sub(r"\\frac{(\1)!}{((\1)-(\2))!}", text)
+        if _may_match("left", text):
+            text = r_left.sub(r'\1', text)
+        if _may_match("right", text):
+            text = r_right.sub(r'\1', text)
+        if _may_match("permutation", text):
+            text = permutation_regex.sub(r"\\frac{(\1)!}{((\1)-(\2))!}", text)
         
         # Remove useless latex commands
-        text = to_remove_regex.sub("", text)
+        if _may_match("remove", text):
+            text = to_remove_regex.sub("", text)
         text = replace_in_latex(text)
         
         # Remove new lines and simplify tabs
         text = text.replace("\n", " ").replace("\t", " ")
         
         # Fix doubled backslashes in commands
-        if "matrix" not in text:
+        if "matrix" not in text and _may_match("command_slash_fix", text):
             text = command_slash_fix_regex.sub(r"\\", text)
     
     if config.equations:
+        _check_deadline(deadline)
         logger.warning("equations=True in NormalizationConfig is deprecated, as it handled by the parser now")
         # This is to ensure that a=1,b=2 is not splitted
-        if not "," in text and not ";" in text:
+        if not "," in text and not ";" in text and _may_match("equation_split", text):
             eq_parts = equation_split_regex.split(text)
             # We only shorten if there are more than 2 parts, otherwise we keep equation as is
             if len(eq_parts) > 2:
                 text = eq_parts[-1]
     
     if config.units:
+        _check_deadline(deadline)
         # Remove the units and possibly the superscript
-        _text = unit_superscript_regex.sub("", text).strip()
+        _text = text
+        if _may_match("unit_superscript", _text):
+            _text = unit_superscript_regex.sub("", _text)
+        _text = _text.strip()
         if _text != "" and _text != text:
             text = _text
             
         # Remove unit texts
         for _ in range(2):
-            _text = units_regex.sub(r"\1", text)
+            _check_deadline(deadline)
+            _text = remove_units(text)
             if _text != "" and _text != text:
                 text = _text
         
@@ -523,6 +1032,7 @@ def normalize_latex(text: str, config: NormalizationConfig) -> str:
             text = "\\frac{1}{2}"
     
     if config.malformed_operators:
+        _check_deadline(deadline)
         # Fix malformed operators
         text = _fix_malformed_operators(text)
         text = _fix_sqrt(text)
@@ -1,7 +1,36 @@
-from sympy import S, Basic, Set, ordered, sympify
+from fractions import Fraction
+
+from mpmath.libmp import to_rational
+from sympy import S, Basic, Set, Symbol, ordered, sympify
 from sympy.sets import FiniteSet as SympyFiniteSet
 from sympy.core.parameters import global_parameters
 
+
+def _plain_sort_keys(args) -> list | None:
+    """
+    Sort keys which order rationals, floats and symbols the same way as default_sort_key (numbers by
+    value before symbols by name). Returns None for any other arg, or if two keys are equal: sorting
+    them would then depend on the order of the input, e.g. 1.0 and 1 are neither equal nor smaller than
+    each other.
+    """
+    keys = []
+    has_rational = has_float = False
+    for arg in args:
+        if type(arg) is Symbol:
+            keys.append((1, arg.name))
+        elif arg.is_Rational:
+            has_rational = True
+            keys.append((0, arg.p if arg.q == 1 else Fraction(arg.p, arg.q)))
+        elif arg.is_Float:
+            has_float = True
+            keys.append((0, Fraction(*to_rational(arg._mpf_))))
+        else:
+            return None
+    if (has_rational and has_float) or len(set(keys)) != len(keys):
+        return None
+    return keys
+
+
 class FiniteSet(SympyFiniteSet):
     """
     FiniteSet which keeps the _unsorted_args attribute, only available till the first evaluation
@@ -17,6 +46,16 @@ class FiniteSet(SympyFiniteSet):
             args = list(map(sympify, args))
         unsorted_args = args
 
+        keys = _plain_sort_keys(args)
+        if keys is not None:
+            # Numbers and symbols have no bound symbols to canonicalize and no infimum, so without
+            # duplicates both ordered() calls below reduce to sorting by default_sort_key
+            order = sorted(range(len(args)), key=keys.__getitem__)
+            obj = Basic.__new__(cls, *[args[i] for i in order])
+            obj._args_set = set(args)
+            obj._unsorted_args = unsorted_args
+            return obj
+
         # keep the form of the first canonical arg
         dargs = {}
         for i in reversed(list(ordered(args))):
@@ -34,3 +73,7 @@ class FiniteSet(SympyFiniteSet):
         obj._args_set = _args_set
         obj._unsorted_args = unsorted_args
         return obj
+
+    def __getnewargs__(self):
+        # Rebuild from the original order so that pickled sets keep _unsorted_args
+        return tuple(self._unsorted_args)
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import NamedTuple
+
 import sympy
 
 
@@ -152,6 +155,24 @@ sympy_singleton_map = {
     'Gamma': sympy.EulerGamma,
 }
 
+# Maximum number of interned symbols, for each of get_symbol and make_symbol
+SYMBOL_CACHE_SIZE = 4096
+
+
+class SymbolCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+    max_size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# Symbols are immutable, so the same instance can be returned for every lookup of the same text
+@lru_cache(maxsize=SYMBOL_CACHE_SIZE)
 def get_symbol(latex_str: str, is_real: bool | None = True, lowercase_symbols: bool = False):
     latex_str = latex_str.strip()
     letter = GREEK_LETTER_MAP.get(latex_str.replace('"', ''))
@@ -170,4 +191,32 @@ def get_symbol(latex_str: str, is_real: bool | None = True, lowercase_symbols: b
     if letter in sympy_singleton_map:
         return sympy_singleton_map[letter]
     else:
-        return sympy.Symbol(letter, real=is_real)
\ No newline at end of file
+        return sympy.Symbol(letter, real=is_real)
+
+
+@lru_cache(maxsize=SYMBOL_CACHE_SIZE)
+def make_symbol(name: str, is_real: bool | None = True, lowercase_symbols: bool = False):
+    """
+    Symbol with the given name, without the greek letter and constant lookup of `get_symbol`.
+    """
+    if lowercase_symbols:
+        name = name.lower()
+    return sympy.Symbol(name, real=is_real)
+
+
+def symbol_cache_info() -> SymbolCacheInfo:
+    """
+    Hits and misses of the symbol intern table, shared by all conversions.
+    """
+    infos = [get_symbol.cache_info(), make_symbol.cache_info()]
+    return SymbolCacheInfo(
+        hits=sum(info.hits for info in infos),
+        misses=sum(info.misses for info in infos),
+        entries=sum(info.currsize for info in infos),
+        max_size=sum(info.maxsize for info in infos),
+    )
+
+
+def clear_symbol_cache():
+    get_symbol.cache_clear()
+    make_symbol.cache_clear()
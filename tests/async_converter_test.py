@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from latex2sympy2_extended import latex2sympy, latex2sympy_async, AsyncConverter, ConversionTimeoutError, register_function, unregister_function
+from sympy import srepr
+
+# Takes seconds to parse
+SLOW = " + ".join(f"x_{{{i}}}" for i in range(300))
+STRINGS = ["x + 1", "\\frac{", "3,1,2", "x < y < z", "\\frac{1}{2}"]
+
+
+def test_latex2sympy_async():
+    async def main():
+        return await asyncio.gather(*(latex2sympy_async(s) for s in ["x + 1", "3,1,2", "\\sin x"]))
+    assert [srepr(r) for r in asyncio.run(main())] == [srepr(latex2sympy(s)) for s in ["x + 1", "3,1,2", "\\sin x"]]
+
+
+def test_latex2sympy_async_cancel():
+    async def main():
+        task = asyncio.create_task(latex2sympy_async(SLOW))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_convert(executor):
+    async def main():
+        async with AsyncConverter(executor, workers=2) as converter:
+            assert srepr(await converter.convert("3,1,2")) == srepr(latex2sympy("3,1,2"))
+            with pytest.raises(Exception, match="I expected something else here"):
+                await converter.convert("\\frac{")
+            with pytest.raises(ConversionTimeoutError):
+                await converter.convert(SLOW, timeout=0.05)
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_as_completed(executor):
+    consumed = []
+
+    def strings():
+        for s in STRINGS * 4:
+            consumed.append(s)
+            yield s
+
+    async def main():
+        async with AsyncConverter(executor, workers=2, max_in_flight=3) as converter:
+            results = {}
+            async for index, result in converter.as_completed(strings()):
+                # The input is consumed lazily
+                assert len(consumed) <= len(results) + 4
+                results[index] = result
+            return results
+
+    results = asyncio.run(main())
+    assert sorted(results) == list(range(len(STRINGS) * 4))
+    for index, result in results.items():
+        if STRINGS[index % len(STRINGS)] == "\\frac{":
+            assert isinstance(result, Exception)
+        else:
+            assert srepr(result) == srepr(latex2sympy(STRINGS[index % len(STRINGS)]))
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_cancel_stops_conversion(executor):
+    async def main():
+        async with AsyncConverter(executor, workers=1) as converter:
+            # Starts the worker process
+            await converter.convert("x")
+            task = asyncio.create_task(converter.convert(SLOW))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # The only worker is free again
+            start = time.perf_counter()
+            assert str(await converter.convert("x + 1")) == "x + 1"
+            assert time.perf_counter() - start < 1
+    asyncio.run(main())
+
+
+def test_in_flight_limit():
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def slow_gamma(arg):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return arg
+
+    async def main():
+        async with AsyncConverter(workers=4, max_in_flight=2) as converter:
+            return await asyncio.gather(*(converter.convert(f"\\gamma({i})") for i in range(8)))
+
+    register_function("\\gamma", slow_gamma)
+    try:
+        assert [str(r) for r in asyncio.run(main())] == [str(i) for i in range(8)]
+    finally:
+        unregister_function("\\gamma")
+    assert max_running == 2
@@ -0,0 +1,30 @@
+import pickle
+from latex2sympy2_extended import latex2sympy, latex2sympy_batch
+from sympy import srepr
+
+
+def test_batch_keeps_order_and_duplicates():
+    strings = ["x + 1", "\\frac{1}{2}", "x + 1", "3,1,2", "\\frac{1}{2}"]
+    results = latex2sympy_batch(strings, workers=1)
+    assert [srepr(r) for r in results] == [srepr(latex2sympy(s)) for s in strings]
+
+
+def test_batch_process_pool():
+    strings = ["x + 1", "\\sin x", "3,1,2", "2^{10}"] * 3
+    results = latex2sympy_batch(strings, workers=2, chunksize=2)
+    assert [srepr(r) for r in results] == [srepr(latex2sympy(s)) for s in strings]
+    # Sets keep the original order of elements after being sent back from the workers
+    assert results[2]._unsorted_args == latex2sympy("3,1,2")._unsorted_args
+
+
+def test_batch_errors():
+    results = latex2sympy_batch(["x + 1", "\\frac{", "2"], workers=2)
+    assert isinstance(results[1], Exception)
+    assert srepr(results[0]) == srepr(latex2sympy("x + 1"))
+    assert srepr(results[2]) == srepr(latex2sympy("2"))
+
+
+def test_pickle_keeps_unsorted_args():
+    for latex in ["3,1,2", "x < y < z"]:
+        expr = latex2sympy(latex)
+        assert pickle.loads(pickle.dumps(expr))._unsorted_args == expr._unsorted_args
@@ -0,0 +1,90 @@
+import sys
+
+import pytest
+from latex2sympy2_extended import latex2sympy, ConversionCache, ConversionTimeoutError, Deadline, NormalizationCache, NormalizationConfig, normalize_latex
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig
+from sympy import Symbol, srepr
+
+
+def test_cache_hits_and_misses():
+    cache = ConversionCache()
+    first = latex2sympy("\\frac{1}{2} + x", cache=cache)
+    second = latex2sympy("\\frac{1}{2} + x", cache=cache)
+    assert srepr(first) == srepr(second) == srepr(latex2sympy("\\frac{1}{2} + x"))
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.entries) == (1, 1, 1)
+
+
+def test_cache_key_contains_arguments():
+    cache = ConversionCache()
+    assert latex2sympy("X", cache=cache) == Symbol("x")
+    assert latex2sympy("X", cache=cache, conversion_config=ConversionConfig(lowercase_symbols=False)) == Symbol("X")
+    assert latex2sympy("x", cache=cache, is_real=True) == Symbol("x", real=True)
+    assert latex2sympy("x + y", cache=cache, variable_values={"y": "1"}) == latex2sympy("x + y", variable_values={"y": "1"})
+    assert cache.cache_info().misses == 4
+
+
+def test_cache_failures():
+    cache = ConversionCache()
+    for _ in range(3):
+        with pytest.raises(Exception):
+            latex2sympy("\\frac{", cache=cache)
+    info = cache.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+
+
+def test_cache_evicts_by_size():
+    cache = ConversionCache(max_size=9)
+    latex2sympy("1", cache=cache)
+    latex2sympy("2", cache=cache)
+    # Big expression, evicts the least recently used ones
+    latex2sympy("a + b + c + d + e + f + g", cache=cache)
+    info = cache.cache_info()
+    assert info.size == 9
+    assert info.evictions == 1
+    # Bigger than the whole cache, not cached at all
+    latex2sympy("a b c d e f g h i j k l m n o p q r s t u v w x y z", cache=cache)
+    assert cache.cache_info().entries == 2
+
+
+def test_cache_returns_copies_of_matrices():
+    cache = ConversionCache()
+    matrix = latex2sympy("\\begin{pmatrix} 1 & 2 \\\\ 3 & 4 \\end{pmatrix}", cache=cache)
+    matrix[0, 0] = 5
+    assert latex2sympy("\\begin{pmatrix} 1 & 2 \\\\ 3 & 4 \\end{pmatrix}", cache=cache)[0, 0] == 1
+
+
+def test_normalization_cache():
+    cache = NormalizationCache()
+    config = NormalizationConfig(units=True)
+    for _ in range(3):
+        assert normalize_latex("\\boxed{5 meters}", config, cache=cache) == "5"
+    assert normalize_latex("\\boxed{5 meters}", NormalizationConfig(), cache=cache) == "5 meters"
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.entries) == (2, 2, 2)
+    assert info.hit_rate == 0.5
+    # Independent of the conversion cache
+    conversion_cache = ConversionCache()
+    latex2sympy("\\boxed{5 meters}", cache=conversion_cache)
+    assert cache.cache_info().misses == 2
+
+
+def test_normalization_cache_evicts_by_bytes():
+    config = NormalizationConfig()
+    entry_size = 2 * sys.getsizeof("\\dfrac{1}{2}")
+    cache = NormalizationCache(max_size=2 * entry_size)
+    for text in ["\\dfrac{1}{2}", "\\dfrac{1}{3}", "\\dfrac{1}{4}"]:
+        normalize_latex(text, config, cache=cache)
+    info = cache.cache_info()
+    assert (info.entries, info.evictions) == (2, 1)
+    assert info.size <= info.max_size
+    # Bigger than the whole cache, not cached at all
+    normalize_latex("x" * 1000, config, cache=cache)
+    assert cache.cache_info().entries == 2
+
+
+def test_normalization_cache_skips_timeouts():
+    cache = NormalizationCache()
+    with pytest.raises(ConversionTimeoutError):
+        normalize_latex("\\dfrac{1}{2}", NormalizationConfig(), deadline=Deadline(0), cache=cache)
+    assert len(cache) == 0
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+import sympy
+from latex2sympy2_extended import latex2sympy
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig
+from sympy import Symbol, srepr
+from sympy.core.cache import clear_cache
+
+CONSTRUCTION_ONLY = ConversionConfig(construction_only=True)
+
+x = Symbol('x')
+
+# Inputs whose eager evaluation takes seconds to hours, or more memory than there is
+ADVERSARIAL = [
+    r"\binom{100000}{50000}",
+    r"\binom{10^{9}}{5\cdot 10^{8}}",
+    r"\Gamma(100000)",
+    r"\gamma(10^{6})",
+    r"\gcd(10^{100000}, 2)",
+    r"\lcm(3^{200000}, 2)",
+    r"\operatorname{gcd}(7^{100000}, 49)",
+    r"x^2|_{x=10^{100000}}",
+    r"\binom{x}{2}|_{x=10^{9}}",
+    r"\operatorname{eye}(1000000000)",
+    r"\operatorname{zeros}(100000, 100000)",
+    r"\operatorname{ones}(100000, 100000)",
+    r"\operatorname{eigenvals}(\begin{pmatrix}x&1&2&3&4\\1&x&2&3&4\\1&2&x&3&4\\1&2&3&x&4\\1&2&3&4&x\end{pmatrix})",
+    r"e^{10^{100000}}",
+    r"\sqrt[2^{10^9}]{2}",
+    r"\binom{10^{9}}{10^{8}} + \Gamma(10^{7}) \cdot \gcd(10^{10^{6}}, 6)",
+]
+
+
+@pytest.mark.parametrize("latex", ADVERSARIAL)
+def test_adversarial_inputs_are_fast(latex):
+    # Parse once so that the time of building the parser DFA isn't counted
+    latex2sympy(latex, conversion_config=CONSTRUCTION_ONLY)
+    # Nor the results which sympy cached during that parse
+    clear_cache()
+    start = time.perf_counter()
+    latex2sympy(latex, conversion_config=CONSTRUCTION_ONLY)
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.parametrize("latex, expected", [
+    (r"\binom{6}{2}", sympy.binomial(6, 2, evaluate=False)),
+    (r"\Gamma(5)", sympy.gamma(5, evaluate=False)),
+    (r"e^{\ln x}", sympy.exp(sympy.log(x, sympy.E, evaluate=False), evaluate=False)),
+    (r"\gcd(12, 18)", sympy.Function("gcd")(12, 18)),
+    (r"\operatorname{lcm}(4, 6, 8)", sympy.Function("lcm")(4, 6, 8)),
+    (r"x^2|_{x=3}", sympy.Subs(sympy.Pow(x, 2, evaluate=False), x, 3)),
+    (r"\det(\begin{pmatrix}1&2\\3&4\end{pmatrix})", sympy.Determinant(sympy.ImmutableMatrix([[1, 2], [3, 4]]))),
+    (r"\operatorname{tr}(\begin{pmatrix}1&2\\3&4\end{pmatrix})", sympy.Trace(sympy.ImmutableMatrix([[1, 2], [3, 4]]))),
+    (r"\operatorname{rank}(\begin{pmatrix}1&2\\3&4\end{pmatrix})", sympy.Function("rank")(sympy.ImmutableMatrix([[1, 2], [3, 4]]))),
+    (r"\operatorname{eye}(3)", sympy.Identity(3)),
+    (r"\operatorname{zeros}(2, 3)", sympy.ZeroMatrix(2, 3)),
+    (r"\sqrt[n]{x}", sympy.Pow(x, sympy.Pow(sympy.Symbol("n"), -1, evaluate=False), evaluate=False)),
+])
+def test_unevaluated_nodes(latex, expected):
+    result = latex2sympy(latex, conversion_config=CONSTRUCTION_ONLY)
+    assert srepr(result) == srepr(expected)
+
+
+@pytest.mark.parametrize("latex", [
+    r"\binom{6}{2}", r"\Gamma(5)", r"x^2|_{x=3}", r"\det(\begin{pmatrix}1&2\\3&4\end{pmatrix})",
+    r"\operatorname{tr}(\begin{pmatrix}1&2\\3&4\end{pmatrix})",
+])
+def test_doit_gives_evaluated_result(latex):
+    assert latex2sympy(latex, conversion_config=CONSTRUCTION_ONLY).doit() == latex2sympy(latex)
+
+
+@pytest.mark.parametrize("latex", [r"\frac{1}{2} + x", r"\sin^{-1} x", r"\max(1, x)", r"\sqrt[3]{x}", r"\log_2 8", r"3!"])
+def test_same_result_without_evaluation(latex):
+    assert srepr(latex2sympy(latex, conversion_config=CONSTRUCTION_ONLY)) == srepr(latex2sympy(latex))
@@ -0,0 +1,101 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from latex2sympy2_extended import latex2sympy, normalize_latex, NormalizationConfig, ConversionCache, ConversionTimeoutError, Deadline
+from latex2sympy2_extended import latex2sympy2
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig
+
+# Takes seconds to parse
+SLOW = " + ".join(f"x_{{{i}}}" for i in range(300))
+
+
+def test_timeout():
+    start = time.perf_counter()
+    with pytest.raises(ConversionTimeoutError):
+        latex2sympy(SLOW, timeout=0.05)
+    assert time.perf_counter() - start < 1
+    # The pooled parser doesn't keep the deadline
+    assert str(latex2sympy("x + 1")) == "x + 1"
+
+
+@pytest.mark.parametrize("latex", ["x + 1", "1", "\\frac{1}{2}", "1, 2"])
+@pytest.mark.parametrize("config", [ConversionConfig(), ConversionConfig(prediction_mode="sll"), ConversionConfig(preclassify_relations=False)])
+def test_expired_deadline(latex, config):
+    with pytest.raises(ConversionTimeoutError):
+        latex2sympy(latex, conversion_config=config, timeout=Deadline(-1))
+    with pytest.raises(ConversionTimeoutError):
+        latex2sympy(latex, conversion_config=config, normalization_config=None, timeout=Deadline(-1))
+
+
+def test_normalization_deadline():
+    config = NormalizationConfig(units=True, malformed_operators=True, nits=True)
+    with pytest.raises(ConversionTimeoutError):
+        normalize_latex("\\frac12 \\text{ m}", config, Deadline(-1))
+    assert normalize_latex("\\frac12 \\text{ m}", config, Deadline(60)) == normalize_latex("\\frac12 \\text{ m}", config)
+
+
+def test_timeout_not_cached():
+    cache = ConversionCache()
+    with pytest.raises(ConversionTimeoutError):
+        latex2sympy("x + 1", cache=cache, timeout=Deadline(-1))
+    assert len(cache) == 0
+    assert str(latex2sympy("x + 1", cache=cache, timeout=60)) == "x + 1"
+    assert len(cache) == 1
+
+
+def test_timeout_in_threads():
+    with ThreadPoolExecutor(4) as pool:
+        slow = [pool.submit(latex2sympy, SLOW, timeout=0.05) for _ in range(4)]
+        fast = [pool.submit(latex2sympy, f"x + {i}", timeout=60) for i in range(8)]
+        for future in slow:
+            with pytest.raises(ConversionTimeoutError):
+                future.result()
+        assert [str(future.result()) for future in fast] == [f"x + {i}" for i in range(8)]
+
+
+@pytest.mark.parametrize("config", [ConversionConfig(), ConversionConfig(prediction_mode="sll"), ConversionConfig(preclassify_relations=False)])
+def test_reparse_with_deadline(config):
+    # Syntax errors parse the input again, with the deadline listener still attached
+    for _ in range(2):
+        with pytest.raises(Exception, match="I expected something else here"):
+            latex2sympy("\\frac{", conversion_config=config, timeout=60)
+        assert str(latex2sympy("x < y", conversion_config=config, timeout=60)) == "x < y"
+        # The pooled parser of the thread still works without a deadline
+        assert str(latex2sympy("x + 1", conversion_config=config)) == "x + 1"
+
+
+def test_failed_reset_discards_parser(monkeypatch):
+    latex2sympy("x + 1")
+    pool = latex2sympy2._parser_pool.free
+    broken = pool[-1]
+
+    def reset_parser(parser, latex_str, deadline_listener=None):
+        # Same state as a reset which raised in Parser.reset()
+        parser._input = None
+        raise ValueError("reset failed")
+
+    monkeypatch.setattr(latex2sympy2, "reset_parser", reset_parser)
+    with pytest.raises(ValueError, match="reset failed"):
+        latex2sympy("x + 1")
+    monkeypatch.undo()
+    assert broken not in pool
+    assert str(latex2sympy("x + 1")) == "x + 1"
+
+
+def test_cancelled_deadline():
+    deadline = Deadline(60)
+    deadline.cancel()
+    with pytest.raises(ConversionTimeoutError, match="cancelled"):
+        latex2sympy("x + 1", timeout=deadline)
+
+
+def test_unlimited_deadline(monkeypatch):
+    # A deadline without a timeout never reads the clock, but still stops the conversion once cancelled
+    deadline = Deadline(math.inf)
+    monkeypatch.setattr(time, "monotonic", lambda: pytest.fail("read the clock"))
+    assert str(latex2sympy("x + 1", timeout=deadline)) == "x + 1"
+    deadline.cancel()
+    with pytest.raises(ConversionTimeoutError, match="cancelled"):
+        latex2sympy("x + 2", timeout=deadline)
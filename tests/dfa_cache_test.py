@@ -0,0 +1,111 @@
+import os
+import pickle
+import subprocess
+import sys
+
+import pytest
+from sympy import srepr
+
+from latex2sympy2_extended import (
+    latex2sympy, warmup, save_dfa_snapshot, load_dfa_snapshot, reset_dfa_cache, set_dfa_cache_limit, dfa_cache_info,
+)
+from latex2sympy2_extended.antlr_parser import PSParser, PSLexer
+from latex2sympy2_extended.dfa_cache import SNAPSHOT_ENV_VAR, WARMUP_CORPUS
+
+
+def dfa_state_counts():
+    return [len(dfa._states) for dfa in PSParser.decisionsToDFA + PSLexer.decisionsToDFA]
+
+
+def convert_all(corpus):
+    results = []
+    for latex_str in corpus:
+        try:
+            results.append(srepr(latex2sympy(latex_str)))
+        except Exception as e:
+            results.append(str(e))
+    return results
+
+
+def test_snapshot_round_trip(tmp_path):
+    warmup()
+    expected = convert_all(WARMUP_CORPUS)
+    counts = dfa_state_counts()
+    save_dfa_snapshot(tmp_path / "dfa.snap")
+
+    load_dfa_snapshot(tmp_path / "dfa.snap")
+    assert dfa_state_counts() == counts
+    assert convert_all(WARMUP_CORPUS) == expected
+    # The corpus was already seen, so no new states are created
+    assert dfa_state_counts() == counts
+
+
+def test_snapshot_loaded_at_import(tmp_path):
+    warmup()
+    save_dfa_snapshot(tmp_path / "dfa.snap")
+    code = (
+        "from latex2sympy2_extended import latex2sympy\n"
+        "from latex2sympy2_extended.antlr_parser import PSParser\n"
+        "print(sum(len(dfa._states) for dfa in PSParser.decisionsToDFA) > 0)\n"
+        "print(latex2sympy('\\\\frac{1}{2} + x'))\n"
+    )
+    env = dict(os.environ, **{SNAPSHOT_ENV_VAR: str(tmp_path / "dfa.snap")})
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+    assert output.split("\n")[:2] == ["True", "x + 1/2"]
+
+
+def test_snapshot_for_different_grammar(tmp_path):
+    with open(tmp_path / "dfa.snap", "wb") as f:
+        pickle.dump({"header": (0, "4.0", "")}, f)
+    counts = dfa_state_counts()
+    with pytest.raises(Exception, match="different grammar"):
+        load_dfa_snapshot(tmp_path / "dfa.snap")
+    assert dfa_state_counts() == counts
+
+
+@pytest.fixture
+def no_dfa_cache_limit():
+    yield
+    set_dfa_cache_limit()
+
+
+def test_dfa_cache_info():
+    warmup()
+    info = dfa_cache_info(estimate_memory=True)
+    assert info.parser_states > 0 and info.lexer_states > 0 and info.contexts > 0
+    assert info.estimated_bytes > 0
+    assert dfa_cache_info().estimated_bytes is None
+
+
+def test_reset_dfa_cache():
+    warmup()
+    expected = convert_all(WARMUP_CORPUS)
+    resets = dfa_cache_info().resets
+    reset_dfa_cache()
+    info = dfa_cache_info()
+    assert (info.parser_states, info.lexer_states, info.contexts, info.parses) == (0, 0, 0, 0)
+    assert info.resets == resets + 1
+    assert convert_all(WARMUP_CORPUS) == expected
+
+
+def test_dfa_cache_max_parses(no_dfa_cache_limit):
+    set_dfa_cache_limit(max_parses=3)
+    reset_dfa_cache()
+    resets = dfa_cache_info().resets
+    for latex_str in ["x + 1", "\\frac{x}{2}", "\\sqrt{2}", "1, 2"]:
+        latex2sympy(latex_str)
+    info = dfa_cache_info()
+    assert (info.resets, info.parses) == (resets + 1, 1)
+
+
+def test_dfa_cache_max_states(no_dfa_cache_limit):
+    set_dfa_cache_limit(max_states=100)
+    resets = dfa_cache_info().resets
+    for latex_str in WARMUP_CORPUS:
+        try:
+            latex2sympy(latex_str)
+        except Exception:
+            pass
+        info = dfa_cache_info()
+        assert info.parser_states + info.lexer_states <= 100
+    assert dfa_cache_info().resets > resets
@@ -0,0 +1,53 @@
+from tests.context import assert_equal
+import pytest
+import sympy
+from sympy import Symbol, Function, Derivative, Max, Min, sin
+
+from latex2sympy2_extended.latex2sympy2 import _Latex2Sympy, latex2sympy
+
+x = Symbol('x', )
+y = Symbol('y', )
+t = Symbol('t', )
+f = Function('f')
+
+
+def test_multi_arg_nested_commas():
+    assert_equal("\\max(f(x, y), 1)", Max(f(x, y), 1))
+    assert_equal("\\min(\\sin x, y)", Min(sin(x), y))
+
+
+def test_multi_arg_noparens():
+    assert_equal("\\max x", Max(x))
+
+
+def test_function_definition_args():
+    assert_equal("f(x, y)", f(x, y))
+    assert_equal("f(x,)", f(x))
+    assert_equal("f(x, y, 1)", f(x, y, 1))
+
+
+def test_derivative_numerator_letter():
+    assert_equal("\\frac{dy}{dx}", Derivative(y, x))
+    assert_equal("\\frac{d y}{d t}", Derivative(y, t))
+    assert_equal("\\frac{\\partial y}{\\partial x}", Derivative(y, x))
+
+
+@pytest.mark.parametrize("latex_str", [
+    "\\max(1, x, y)",
+    "\\gcd(12, 18)",
+    "\\operatorname{diag}(1, 2, 3)",
+    "f(x, y)",
+    "\\frac{dy}{dx}",
+    "\\frac{\\partial f}{\\partial x}",
+])
+def test_arguments_not_parsed_again(latex_str, monkeypatch):
+    calls = []
+    parse = _Latex2Sympy.parse
+
+    def counting_parse(self, text):
+        calls.append(text)
+        return parse(self, text)
+
+    monkeypatch.setattr(_Latex2Sympy, "parse", counting_parse)
+    latex2sympy(latex_str)
+    assert len(calls) == 1
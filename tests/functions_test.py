@@ -0,0 +1,55 @@
+import pytest
+import sympy
+from sympy import Symbol
+
+from latex2sympy2_extended import register_function, unregister_function
+from latex2sympy2_extended.latex2sympy2 import latex2sympy
+
+x = Symbol('x')
+y = Symbol('y')
+
+
+@pytest.fixture
+def registered():
+    names = []
+
+    def register(name, handler):
+        names.append(name)
+        register_function(name, handler)
+
+    yield register
+    for name in names:
+        unregister_function(name)
+
+
+def test_builtin_dispatch():
+    assert latex2sympy("\\sin^{-1} x") == sympy.asin(x, evaluate=False)
+    assert latex2sympy("\\arcsinh x") == sympy.asinh(x, evaluate=False)
+    assert latex2sympy("\\log_2 x") == sympy.log(x, 2, evaluate=False)
+    assert latex2sympy("\\operatorname{floor}(x)") == sympy.floor(x, evaluate=False)
+    assert latex2sympy("\\max(x, y)") == sympy.Max(x, y, evaluate=False)
+
+
+def test_register_command(registered):
+    registered("\\sin", lambda arg: sympy.Function("mysin")(arg))
+    assert latex2sympy("\\sin x") == sympy.Function("mysin")(x)
+    # The inverse still goes through \arcsin
+    assert latex2sympy("\\sin^{-1} x") == sympy.asin(x, evaluate=False)
+
+
+def test_register_operatorname(registered):
+    registered("gcd", lambda *args: sympy.gcd(*args))
+    assert latex2sympy("\\operatorname{gcd}(12, 18)") == 6
+
+
+def test_register_defined_function(registered):
+    registered("f", lambda *args: sympy.Add(*args))
+    assert latex2sympy("f(x, y)") == x + y
+    assert latex2sympy("f(x, y)^2") == sympy.Pow(x + y, 2)
+
+
+def test_unregister():
+    register_function("\\cos", lambda arg: arg)
+    assert latex2sympy("\\cos x") == x
+    unregister_function("\\cos")
+    assert latex2sympy("\\cos x") == sympy.cos(x, evaluate=False)
@@ -0,0 +1,70 @@
+import pickle
+
+import pytest
+from latex2sympy2_extended import latex2sympy, latex2sympy_batch, ConversionCache, InputLimitError
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig
+
+LIMITS = ConversionConfig(
+    max_input_length=200, max_tokens=60, max_nesting_depth=5, max_number_digits=10, max_matrix_dimension=3,
+)
+
+
+@pytest.mark.parametrize("latex, limit", [
+    ("x" * 201, "max_input_length"),
+    (" + ".join("x" * 40), "max_tokens"),
+    ("(" * 6 + "x" + ")" * 6, "max_nesting_depth"),
+    ("{" * 50000 + "x" + "}" * 50000, "max_input_length"),
+    ("\\frac{1}{\\sqrt{\\frac{1}{\\sqrt{\\frac{1}{\\sqrt{x}}}}}}", "max_nesting_depth"),
+    ("12345678901", "max_number_digits"),
+    ("-12345678901\\%", "max_number_digits"),
+    ("\\frac{1}{12345678901}", "max_number_digits"),
+    ("1,234,567,890,123", "max_number_digits"),
+    ("x + 12345678901 y", "max_number_digits"),
+    ("0.12345678901", "max_number_digits"),
+    ("\\begin{pmatrix}1&2&3&4\\end{pmatrix}", "max_matrix_dimension"),
+    ("\\begin{pmatrix}1\\\\2\\\\3\\\\4\\end{pmatrix}", "max_matrix_dimension"),
+    ("\\begin{bmatrix}\\begin{pmatrix}1&2&3&4\\end{pmatrix}\\end{bmatrix}", "max_matrix_dimension"),
+])
+def test_limits(latex, limit):
+    with pytest.raises(InputLimitError) as error:
+        latex2sympy(latex, conversion_config=LIMITS)
+    assert error.value.limit == limit
+    assert error.value.max_value == getattr(LIMITS, limit)
+    assert error.value.value > error.value.max_value
+
+
+@pytest.mark.parametrize("latex, expected", [
+    ("x" * 5, "x*x*x*x*x"),
+    ("(((((x)))))", "x"),
+    ("1234567890", "1234567890"),
+    ("\\begin{pmatrix}1&2&3\\\\4&5&6\\\\7&8&9\\\\\\end{pmatrix}", "Matrix([[1, 2, 3], [4, 5, 6], [7, 8, 9]])"),
+    ("\\begin{pmatrix}1&2&3\\end{pmatrix}\\begin{pmatrix}1\\\\2\\\\3\\end{pmatrix}", "Matrix([[1, 2, 3]])*Matrix([\n[1],\n[2],\n[3]])"),
+])
+def test_within_limits(latex, expected):
+    assert str(latex2sympy(latex, conversion_config=LIMITS)) == expected
+
+
+@pytest.mark.parametrize("config", [
+    ConversionConfig(max_tokens=5, prediction_mode="sll"),
+    ConversionConfig(max_tokens=5, preclassify_relations=False),
+    ConversionConfig(max_tokens=5),
+])
+def test_limits_with_parse_strategies(config):
+    with pytest.raises(InputLimitError):
+        latex2sympy("x + y + z < 1", conversion_config=config)
+    with pytest.raises(InputLimitError):
+        latex2sympy("1, 2, 3, 4", conversion_config=config)
+    # The next parse on the same pooled lexer starts counting from zero
+    assert str(latex2sympy("x + 1", conversion_config=config)) == "x + 1"
+
+
+def test_limit_error_is_picklable():
+    cache = ConversionCache()
+    for _ in range(2):
+        with pytest.raises(InputLimitError):
+            latex2sympy("12345678901", conversion_config=LIMITS, cache=cache)
+    error = pickle.loads(pickle.dumps(InputLimitError("max_tokens", 61, 60)))
+    assert (error.limit, error.value, error.max_value) == ("max_tokens", 61, 60)
+    results = latex2sympy_batch(["12345678901", "x"], conversion_config=LIMITS, workers=2)
+    assert isinstance(results[0], InputLimitError)
+    assert str(results[1]) == "x"
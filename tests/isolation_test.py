@@ -0,0 +1,92 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+from latex2sympy2_extended import latex2sympy, register_function, unregister_function, ResourceLimitError
+from sympy import srepr
+
+pytestmark = pytest.mark.skipif(sys.platform != "linux", reason="rlimits and fork are only used on Linux")
+
+if sys.platform == "linux":
+    from latex2sympy2_extended.isolation import IsolatedConverter
+
+
+@pytest.fixture(scope="module")
+def converter():
+    # The workers are forked with the handlers registered at that point
+    register_function("\\Gamma", lambda arg: os.abort())
+    register_function("\\gamma", lambda arg: bytearray(2**31))
+    try:
+        with IsolatedConverter(workers=2, max_memory=300 * 2**20, max_cpu_seconds=1) as converter:
+            yield converter
+    finally:
+        unregister_function("\\Gamma")
+        unregister_function("\\gamma")
+
+
+def test_same_results(converter):
+    strings = ["x + 1", "3,1,2", "\\frac{1}{2}", "x < y < z", "3,1,2"]
+    results = converter.convert_many(strings)
+    assert [srepr(r) for r in results] == [srepr(latex2sympy(s)) for s in strings]
+    assert results[1]._unsorted_args == latex2sympy("3,1,2")._unsorted_args
+    assert srepr(converter.convert("x^2")) == srepr(latex2sympy("x^2"))
+
+
+def test_workers_stay_warm(converter):
+    pids = [worker.process.pid for worker in converter._all]
+    converter.convert_many([f"x + {i}" for i in range(20)])
+    with pytest.raises(Exception, match="I expected something else here"):
+        converter.convert("\\frac{")
+    assert [worker.process.pid for worker in converter._all] == pids
+
+
+@pytest.mark.parametrize("latex, resource", [
+    ("\\gamma(x)", "memory"),
+    ("\\binom{10000000}{5000000}", "cpu"),
+    ("\\Gamma(x)", "crash"),
+])
+def test_resource_limits(converter, latex, resource):
+    restarts = converter.restarts
+    with pytest.raises(ResourceLimitError) as error:
+        converter.convert(latex)
+    assert error.value.resource == resource
+    # The worker is replaced in the background
+    start = time.monotonic()
+    while converter.restarts < restarts + 1 and time.monotonic() - start < 10:
+        time.sleep(0.01)
+    assert converter.restarts == restarts + 1
+    # The replaced worker converts again
+    results = converter.convert_many(["x + 1", latex, "y"])
+    assert isinstance(results[1], ResourceLimitError)
+    assert [str(results[0]), str(results[2])] == ["x + 1", "y"]
+
+
+def test_close_while_converting():
+    converter = IsolatedConverter(workers=1)
+    results = []
+
+    def convert(latex_str):
+        try:
+            results.append(converter.convert(latex_str))
+        except Exception as e:
+            results.append(e)
+
+    running = threading.Thread(target=convert, args=("\\binom{10000000}{5000000}",))
+    waiting = threading.Thread(target=convert, args=("x",))
+    running.start()
+    time.sleep(0.5)
+    # Waits for the only worker
+    waiting.start()
+    time.sleep(0.2)
+    converter.close()
+    running.join(10)
+    waiting.join(10)
+    assert not running.is_alive() and not waiting.is_alive()
+    assert sorted(type(result).__name__ for result in results) == ["ResourceLimitError", "ValueError"]
+    # The dead worker isn't replaced after close
+    assert converter.restarts == 0
+    assert not any(worker.process.is_alive() for worker in converter._all)
+    with pytest.raises(ValueError, match="closed"):
+        converter.convert("x")
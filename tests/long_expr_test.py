@@ -0,0 +1,49 @@
+import sympy
+from sympy import Add, Mul, Symbol, Integer
+
+from latex2sympy2_extended.latex2sympy2 import latex2sympy
+
+x = Symbol('x')
+
+
+def test_long_sum_is_flat():
+    n = 2000
+    result = latex2sympy(" + ".join(f"{i} x" for i in range(1, n + 1)), normalization_config=None)
+    expected = Add(*[Mul(Integer(i), x, evaluate=False) for i in range(1, n + 1)], evaluate=False)
+    assert sympy.srepr(result) == sympy.srepr(expected)
+
+
+def test_long_difference_is_flat():
+    result = latex2sympy("x - 1 - x - 2", normalization_config=None)
+    expected = Add(x, Integer(-1), Mul(-1, x, evaluate=False), Integer(-2), evaluate=False)
+    assert sympy.srepr(result) == sympy.srepr(expected)
+
+
+def test_long_product_is_flat():
+    n = 2000
+    result = latex2sympy(" \\cdot ".join("x" for _ in range(n)), normalization_config=None)
+    assert result.func == Mul and len(result.args) == n
+
+
+def test_product_with_division_keeps_nesting():
+    result = latex2sympy("a \\cdot b / c \\cdot d", normalization_config=None)
+    a, b, c, d = sympy.symbols("a b c d")
+    inner = Mul(Mul(a, b, evaluate=False), sympy.Pow(c, -1, evaluate=False), evaluate=False)
+    assert sympy.srepr(result) == sympy.srepr(Mul(*inner.args, d, evaluate=False))
+
+
+def test_matrix_sum_is_flat():
+    result = latex2sympy("A + B + C", variable_values={"A": sympy.eye(2), "B": sympy.eye(2), "C": sympy.eye(2)}, normalization_config=None)
+    assert result.func == sympy.MatAdd and len(result.args) == 3
+
+
+def test_long_implicit_product_is_flat():
+    n = 3000
+    result = latex2sympy(" ".join("x" if i % 2 else "y" for i in range(n)), normalization_config=None)
+    assert result.func == Mul and len(result.args) == n
+
+
+def test_implicit_product_keeps_mixed_fractions_and_derivatives():
+    assert latex2sympy("x 2 \\frac{1}{2}", normalization_config=None) == Mul(x, sympy.Rational(5, 2), evaluate=False)
+    assert latex2sympy("-3 \\frac{1}{4}", normalization_config=None) == sympy.Rational(-13, 4)
+    assert latex2sympy("2 \\frac{d}{dx} x y", normalization_config=None) == Mul(2, sympy.Derivative(Mul(x, Symbol('y'), evaluate=False), x), evaluate=False)
@@ -1,4 +1,15 @@
-from latex2sympy2_extended.math_normalization import NormalizationConfig, normalize_latex
+import random
+import re
+import sys
+import time
+from dataclasses import replace
+
+import pytest
+from latex2sympy2_extended import math_normalization
+from latex2sympy2_extended.math_normalization import (
+    NormalizationConfig, extract_boxed_content, normalization_stats, normalize_latex, register_units, remove_units,
+    units_regex, unregister_units,
+)
 
 
 def test_units_normalization():
@@ -31,3 +42,139 @@ def test_boxed_normalization():
     )
 
     assert normalize_latex("\\boxed{\\left( 3, \\frac{\\pi}{2} \\right)}.", config) == "\\left( 3, \\frac{\\pi}{2} \\right)"
+
+
+
+
+
+def test_prefilters_skip_regexes():
+    config = NormalizationConfig(units=True, malformed_operators=True, nits=True)
+    normalization_stats.reset()
+    assert normalize_latex("12", config) == "12"
+    assert not normalization_stats.runs
+    assert normalization_stats.skip_rate == 1.0
+    assert normalize_latex("\\left( 1,2 \\right)", config) == "( 1,2 )"
+    assert normalization_stats.runs["left"] == normalization_stats.runs["right"] == 1
+    assert normalization_stats.skips["permutation"] == 2
+
+
+@pytest.mark.parametrize("text", ["\\　x", "a\\\tb", "x \\ y", "\\\\ \\frac12", "1\\ 000"])
+def test_prefilters_same_result(monkeypatch, text):
+    config = NormalizationConfig(malformed_operators=True)
+    expected = normalize_latex(text, config)
+    monkeypatch.setattr(math_normalization, "_may_match", lambda rule, text: True)
+    assert normalize_latex(text, config) == expected
+
+
+def test_prefilter_whitespace():
+    # The backslash_space trigger needs every character which \s matches
+    space = re.compile(r"\s")
+    assert set(math_normalization._WHITESPACE) == {char for char in map(chr, range(sys.maxunicode + 1)) if space.match(char)}
+
+
+@pytest.mark.parametrize("text", [
+    "5 m", "5m", "5 meters", "5 inches", "\\frac{1}{2} cm", "x cm", "5 q  ", "5 q x\n", "1 sq . m", "3 boxes",
+    "12 m and 42 meters", "5 \t kmph \n", "٣ m", "m", " m", "1 < ms < 2", "5\ns",
+    "5" + " " * 1000,
+])
+def test_remove_units(text):
+    assert remove_units(text) == units_regex.sub(r"\1", text)
+
+
+def test_remove_units_trailing_whitespace():
+    # Only the whitespace a unit can reach is tried
+    start = time.perf_counter()
+    assert remove_units("5 cm" + " " * 10**6) == "5"
+    assert time.perf_counter() - start < 0.5
+
+
+def test_register_units():
+    config = NormalizationConfig(basic_latex=False, units=True, boxed="none")
+    assert normalize_latex("42 parsecs", config) == "42 parsecs"
+    register_units("parsec", "light year")
+    try:
+        assert normalize_latex("42 parsecs", config) == "42"
+        assert normalize_latex("1.5 light years ", config) == "1.5"
+        assert normalize_latex("parsec", config) == "parsec"
+        # "." matches the space after the unit
+        register_units("kp.")
+        assert remove_units("7 kp" + " " * 5) == "7"
+    finally:
+        unregister_units("parsec", "light year", "kp.")
+    assert normalize_latex("42 parsecs", config) == "42 parsecs"
+
+
+@pytest.mark.parametrize("text,last,all_", [
+    ("no box here", "no box here", "no box here"),
+    (r"\boxed {1} and \boxed{2}", "1,2", "1,2"),
+    (r"\boxed{1}, \boxed{1}", "1", "1"),
+    (r"\boxed{\boxed{1}}", "1", "1"),
+    (r"\boxed{1} \boxed{2", "{2", "{2"),
+    (r"\boxed 5", "5", "5"),
+    (r"\boxed{x} \fbox{y} \boxed{x}", "x,y,x", "x,y,x"),
+    (r"x \boxed", r"x \boxed", r"x \boxed"),
+    (r"\boxed{a}\boxed{{b}}\fbox{ c }", "a,{b},c", "a,{b},c"),
+    (r"\boxed{1} a long explanation without separators ... \boxed{2}", "2", "1,2"),
+    (r"\boxed{1} a long explanation, with separators  ... and \boxed{2}", "1,2", "1,2"),
+    (r"}\boxed{1}}{", "1", "1"),
+])
+def test_extract_boxed_content(text, last, all_):
+    assert extract_boxed_content(text, "last") == last
+    assert extract_boxed_content(text, "all") == all_
+
+
+def test_extract_boxed_content_many():
+    text = "".join(f"step {i}: \\boxed{{{{x_{{{i}}}}}}} and " for i in range(20000)) + r"\fbox{y}"
+    assert extract_boxed_content(text, "all") == ",".join([f"{{x_{{{i}}}}}" for i in range(20000)] + ["y"])
+    assert extract_boxed_content(text, "last") == extract_boxed_content(text, "all")
+
+
+FUSED_CASES = [
+    "\\left( 3, \\frac{\\pi}{2} \\right)",
+    "$\\dfrac{1}{2}$ and $x$",
+    "x, and y or z",
+    "\\mathrm{T} + \\mathrm{d}x + {\\rm d}y",
+    "\\left[\\begin{matrix}1 & 2\\\\3 & 4\\end{matrix}\\right]",
+    "\\left(n\\right)_{k} + (a b)_{c}",
+    "50 percent, 3 pct or 2 percentage",
+    "\\text{percent} \\text{ and } \\ldots",
+    "1 .5 + {.5} + \\{ , \\} ~= infinity - inf + \\infty",
+    "\\\\frac{1}{2}\\\\sqrt 2 sqrt",
+    "a \\\\ b \\displaystyle \\! 'x' \"y\"\n\tz",
+    # Text removed by one rule joins the text around it for the later rules
+    "{$.5} x$and y \\\\displaystyle percent \\\\! {\\text{ }.",
+    # The permutation rule sees the text after the \mathrm{d} / \mathrm{T} replacements
+    "(n)_{\\mathrm{d}}",
+    "(x)_{\\mathrm{T}}",
+    "(\\mathrm{d})_{2}",
+    "(n)_{\\rm d}",
+]
+
+
+@pytest.mark.parametrize("text", FUSED_CASES)
+@pytest.mark.parametrize("config", [
+    NormalizationConfig(),
+    NormalizationConfig(units=True, malformed_operators=True, nits=True, boxed="none"),
+])
+def test_fused_engine(text, config):
+    assert normalize_latex(text, replace(config, engine="fused")) == normalize_latex(text, config)
+
+
+def test_fused_engine_covers_replace_rules():
+    # The fused engine has its own copy of to_replace_patterns, a new rule has to be added there too
+    fused_names = {name for name, _, _ in math_normalization._fused_rules}
+    assert {name for name, _, _ in math_normalization.to_replace_patterns} <= fused_names
+    assert set(math_normalization._fused_constants) <= fused_names
+
+
+def test_fused_engine_random():
+    # Random sequences of tokens which the rules replace, remove or look at
+    tokens = ["\\mathrm{d}", "\\left(", "\\right)", "\\left\\{", "(", ")", "_{", "}", "{", "n", "x", "2", " ", "\n", "$",
+              "\\$", "'", "\\!", "\\text{}", "\\displaystyle", "\\mathrm", "\\dfrac", ".", "{,}", "and", "or", ",",
+              "\\text{and}", "\\ ", "\\", "inf", "infinity", "\\ldots", "percent", " sqrt", "matrix", "a", "e",
+              ")_{", "\\mathrm{T}", "{\\rm d}", "\\rm d"]
+    rng = random.Random(0)
+    fused = NormalizationConfig(boxed="none", engine="fused")
+    for _ in range(3000):
+        text = "".join(rng.choice(tokens) for _ in range(rng.randint(1, 8)))
+        assert normalize_latex(text, fused) == normalize_latex(text, NormalizationConfig(boxed="none")), text
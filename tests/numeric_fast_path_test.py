@@ -0,0 +1,29 @@
+import pytest
+from latex2sympy2_extended import latex2sympy
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig, parser_stats
+from sympy import srepr
+
+NO_FAST_PATH = ConversionConfig(numeric_fast_path=False)
+
+
+@pytest.mark.parametrize("latex", [
+    "0", "007", " 12 ", "-5", "- 5", "3.14", ".5", "-0.25", "00.5",
+    "1,000", "-12,345.67", "0,111",
+    "5%", "5 %", "5\\%", "-5\\%", "2.5\\%",
+    "\\frac{1}{2}", "\\frac{4}{2}", "-\\frac{1}{2}", "\\frac{-1}{2}", "\\frac{1}{-2}", "\\dfrac{3}{4}", "\\frac { 1 } { 0 }",
+])
+def test_fast_path_same_results(latex):
+    parser_stats.reset()
+    result = latex2sympy(latex)
+    assert parser_stats.numeric_fast_paths == 1
+    assert srepr(result) == srepr(latex2sympy(latex, conversion_config=NO_FAST_PATH))
+
+
+@pytest.mark.parametrize("latex", ["5  %", "1.", "2 \\frac{1}{2}", "\\frac{1.5}{2}", "1\\,000", "+5", "1e5"])
+def test_fast_path_not_used(latex):
+    parser_stats.reset()
+    try:
+        latex2sympy(latex)
+    except Exception:
+        pass
+    assert parser_stats.numeric_fast_paths == 0
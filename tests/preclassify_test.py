@@ -0,0 +1,48 @@
+import pytest
+from latex2sympy2_extended import latex2sympy
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig, parser_stats
+from sympy import srepr
+
+NO_PRECLASSIFY = ConversionConfig(preclassify_relations=False)
+
+
+@pytest.mark.parametrize("latex", [
+    "x + 1",
+    "x = 1",
+    "f(x, y) = 2",
+    "\\frac{1}{2} \\le x < 3",
+    "\\sin^{2} x + \\cos^{2} x",
+    "\\begin{pmatrix} 1 & 2 \\\\ 3 & 4 \\end{pmatrix}",
+    "(1 + x)^{2}",
+    "1, 2, 3",
+    "(1, 2]",
+    "x = 1, y = 2",
+    "x \\in (0, 1)",
+    "\\{1, 2\\} \\cup \\{3\\}",
+    "1,000",
+])
+def test_preclassify_same_results(latex):
+    assert srepr(latex2sympy(latex)) == srepr(latex2sympy(latex, conversion_config=NO_PRECLASSIFY))
+
+
+def test_preclassify_counters():
+    parser_stats.reset()
+    latex2sympy("2x + \\frac{1}{2} = 0")
+    latex2sympy("1, 2, 3")
+    # Parsed with the general rule, which is as fast for superscripts and functions
+    latex2sympy("2x^{2} + 3x + 1 = 0")
+    latex2sympy("\\sin{y} \\le 1")
+    assert parser_stats.preclassified_parses == 1
+    assert parser_stats.preclassify_fallbacks == 0
+    with pytest.raises(Exception):
+        latex2sympy("2x + (1")
+    assert parser_stats.preclassified_parses == 2
+    assert parser_stats.preclassify_fallbacks == 1
+
+
+def test_preclassify_error():
+    with pytest.raises(Exception) as error:
+        latex2sympy("2x + (1")
+    with pytest.raises(Exception) as expected:
+        latex2sympy("2x + (1", conversion_config=NO_PRECLASSIFY)
+    assert str(error.value) == str(expected.value)
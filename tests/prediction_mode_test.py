@@ -0,0 +1,40 @@
+import pytest
+from latex2sympy2_extended import latex2sympy
+from latex2sympy2_extended.latex2sympy2 import ConversionConfig, parser_stats
+from sympy import srepr
+
+SLL = ConversionConfig(prediction_mode="sll")
+
+
+@pytest.mark.parametrize("latex", [
+    "x + 1",
+    "\\frac{1}{2}",
+    "1, 2, 3",
+    "x = 1, y = 2",
+    "(1, 2]",
+    "\\{1, 2\\} \\cup \\{3\\}",
+    "\\sin^{2} x + \\cos^{2} x",
+    "\\int_{0}^{1} x dx",
+    "x \\in \\{1, 2\\}",
+    "\\begin{pmatrix} 1 & 2 \\\\ 3 & 4 \\end{pmatrix}",
+])
+def test_sll_same_results(latex):
+    assert srepr(latex2sympy(latex, conversion_config=SLL)) == srepr(latex2sympy(latex))
+
+
+def test_sll_fallback_on_error():
+    parser_stats.reset()
+    with pytest.raises(Exception) as ll_error:
+        latex2sympy("\\frac{1}{")
+    with pytest.raises(Exception) as sll_error:
+        latex2sympy("\\frac{1}{", conversion_config=SLL)
+    assert str(sll_error.value) == str(ll_error.value)
+    assert parser_stats.ll_fallbacks == 1
+    assert parser_stats.sll_parses == 0
+
+
+def test_sll_counter():
+    parser_stats.reset()
+    latex2sympy("x + 1", conversion_config=SLL)
+    assert parser_stats.sll_parses == 1
+    assert parser_stats.ll_fallbacks == 0
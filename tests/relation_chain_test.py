@@ -0,0 +1,55 @@
+import time
+
+from sympy import Symbol, StrictLessThan, LessThan, Eq, false, symbols
+
+from latex2sympy2_extended.latex2sympy2 import latex2sympy
+from latex2sympy2_extended.logic import And
+
+x, y, z = symbols('x y z')
+
+
+def test_chain_keeps_order():
+    result = latex2sympy("x < y \\le z = 1", normalization_config=None)
+    assert isinstance(result, And)
+    assert result._unsorted_args == [
+        StrictLessThan(x, y, evaluate=False),
+        LessThan(y, z, evaluate=False),
+        Eq(z, 1, evaluate=False),
+    ]
+
+
+def test_long_chain():
+    n = 300
+    result = latex2sympy(" < ".join(f"x_{i}" if i < 10 else f"{i} x" for i in range(n + 1)), normalization_config=None)
+    assert isinstance(result, And)
+    assert len(result._unsorted_args) == n
+    assert result._unsorted_args[0] == StrictLessThan(Symbol("x_0"), Symbol("x_1"), evaluate=False)
+
+
+def test_chain_with_duplicates():
+    # And drops the duplicate relation, later relations are added to what's left
+    result = latex2sympy("x < y < x < y", normalization_config=None)
+    assert result._unsorted_args == [
+        StrictLessThan(x, y, evaluate=False),
+        StrictLessThan(y, x, evaluate=False),
+        StrictLessThan(x, y, evaluate=False),
+    ]
+
+
+def test_chain_with_contradiction():
+    assert latex2sympy("1 \\le x < 1", normalization_config=None) is false
+
+
+def test_long_chain_with_repeats():
+    def convert(n):
+        start = time.perf_counter()
+        result = latex2sympy("x < y" + " < y" * n, normalization_config=None)
+        return result, time.perf_counter() - start
+
+    result, _ = convert(400)
+    assert len(result._unsorted_args) == 401
+    assert result._unsorted_args[-1] == StrictLessThan(y, y, evaluate=False)
+    # Linear in the number of relations even though they repeat
+    small = min(convert(100)[1] for _ in range(3))
+    large = min(convert(400)[1] for _ in range(3))
+    assert large < 8 * small
@@ -4,6 +4,7 @@ from sympy import (
     Complement, Contains, Not, Add, Mul, Pow, UnevaluatedExpr, Rational
 )
 import sympy
+from latex2sympy2_extended.latex2sympy2 import latex2sympy
 from tests.context import assert_equal, _Add, _Mul, _Pow
 
 x = Symbol('x')
@@ -134,3 +135,29 @@ def test_set_of_sets(input, output):
 def test_and_or_text(input, output):
     assert_equal(input, output)
 
+
+
+def test_plain_finite_set_matches_sympy():
+    from latex2sympy2_extended.sets import FiniteSet as OrderedFiniteSet
+    for elements in [
+        [y, 3, Rational(1, 2), 1, -2, x, Rational(-7, 3)],
+        [sympy.Float(2.5), z, sympy.Float(-1), sympy.Float('0.1', 30), sympy.Float(0.1)],
+        [x, sympy.Float(1.0), 1],
+        [y, Symbol('y', real=True), S.Infinity, sympy.pi],
+    ]:
+        result = OrderedFiniteSet(*elements)
+        expected = FiniteSet(*elements)
+        assert result.args == expected.args
+        assert result._args_set == expected._args_set
+        assert result._unsorted_args == list(map(sympy.sympify, elements))
+    # Duplicates take the general path and still keep the original order
+    result = OrderedFiniteSet(3, x, 1, x, 3)
+    assert result.args == (1, 3, x)
+    assert result._unsorted_args == [3, x, 1, x, 3]
+
+
+def test_large_finite_set():
+    n = 2000
+    result = latex2sympy(", ".join(str(i) for i in reversed(range(n))))
+    assert result.args == FiniteSet(*range(n)).args
+    assert result._unsorted_args == list(reversed(range(n)))
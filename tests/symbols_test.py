@@ -20,3 +20,22 @@ def test_symbol(input, output, symbolically):
     input_parsed = latex2sympy(input)
     output_parsed = latex2sympy(output)
     assert input_parsed == output_parsed
+
+
+def test_symbols_are_interned():
+    from latex2sympy2_extended import symbol_cache_info, clear_symbol_cache
+    from latex2sympy2_extended.latex2sympy2 import ConversionConfig
+
+    clear_symbol_cache()
+    first = latex2sympy("x + y")
+    info = symbol_cache_info()
+    second = latex2sympy("x \\cdot y")
+    assert symbol_cache_info().hits >= info.hits + 2
+    assert set(first.free_symbols) == set(second.free_symbols)
+    assert latex2sympy("z") is latex2sympy("z")
+
+    # The assumptions and the case handling are part of the key
+    assert latex2sympy("x", is_real=False) == sympy.Symbol("x", real=False)
+    assert latex2sympy("X", conversion_config=ConversionConfig(lowercase_symbols=True)) == sympy.Symbol("x")
+    assert latex2sympy("X", conversion_config=ConversionConfig(lowercase_symbols=False)) == sympy.Symbol("X")
+    assert 0 < symbol_cache_info().hit_rate < 1